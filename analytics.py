@@ -7,6 +7,9 @@ Provides helper functions to analyze habit data, such as show all the created ha
 finding the longest streak amongst all, and specific habit streaks.
 """
 import datetime    # Used to check streak status based on dates (last_completed vs today).
+from habit import Habit, period_for, break_day   # Habit objects keep their dates as day numbers, so no parsing is needed.
+from registry import HabitRegistry    # Indexed habit collection, used for direct lookups when available.
+import metrics                        # calls of the functions below are counted and timed when metrics are enabled
 
 def habits_list(list):
     """Return all habits.
@@ -20,6 +23,7 @@ def habits_list(list):
 
 
 
+@metrics.instrument('analytics.same_periodicity_habits')
 def same_periodicity_habits(list, freq):
     """
     Filter and return habits by specified periodicity.
@@ -31,73 +35,177 @@ def same_periodicity_habits(list, freq):
     Returns:
         list: Filtered list of habits.
     """
+    if isinstance(list, HabitRegistry):
+        return list.by_periodicity(freq)                 # the registry already keeps one bucket per periodicity
     return [h for h in list if h['periodicity'] == freq] # h= habit, list = list of habits, freq = frequency to filter by (daily/weekly).
 
 
 
+def iter_same_periodicity(habits, freq):
+    """
+    Yield the habits with the given periodicity one at a time.
+    Works on a stream such as HabitDatabase.iter_habits(), so nothing but the current habit is kept in memory.
+    """
+    return (h for h in habits if h['periodicity'] == freq)
+
+
+
+def last_ordinal(habit):
+    """
+    Return the day number of a habit's last check-off, or None if it was never checked off.
+    Works on Habit objects (dates already stored as day numbers) and on habit dictionaries.
+    """
+    if isinstance(habit, Habit):
+        return habit.last                                                          # day number, nothing to parse
+    if habit['last_completed']:
+        return datetime.date.fromisoformat(habit['last_completed']).toordinal()    # Parse the string date [For Ex: ("2025-05-27")] into a day number.
+    return None
+
+
+
+def streak_break_day(habit):
+    """
+    Day number from which the habit's streak counts as broken (None if it can never break).
+    """
+    if isinstance(habit, Habit):
+        return habit.breaks_on
+    return break_day(period_for(habit['periodicity']), last_ordinal(habit))
+
+
+
 def streak_evaluate(habit, current_date=None):
     """
     - Function used to evaluate whether a habit's current streak is still valid.
     - Used internally by below three functions.
+    - Works on Habit objects (dates already stored as day numbers) and on habit dictionaries.
     """
-    if not habit['last_completed']:
+    last = last_ordinal(habit)
+    if last is None:
         return 0                                                                      #  If the habit has never been completed, return streak 0.
 
     
     if current_date is None:
         current_date = datetime.date.today()                                          # date of date_created
-    last_date = datetime.datetime.strptime(habit['last_completed'], "%Y-%m-%d").date() # Parse the string date [For Ex: ("2025-05-27")] into a real datetime.date object.
-    diff = (current_date - last_date).days                                              # Calculate how many days ago the habit was last completed.
+    period = habit.period if isinstance(habit, Habit) else period_for(habit['periodicity'])   # day -> period number (day, ISO week, month, ...)
+    if period is None:
+        return habit['streak']                                      # unknown periodicity: the streak never breaks
 
 
-    if habit['periodicity'] == 'daily' and diff > 1:                # If the habit is daily and more than 1 day has passed since last completion
+    if period.index(current_date.toordinal()) - period.index(last) > 1:   # If a whole period (day, week, ...) passed without a check-off
         return 0                                                    # reset the streak to 0. 
-    elif habit['periodicity'] == 'weekly' and diff > 7:            # If the habit is weekly and more than 7 days have passed since last completion
-        return 0                                                  # reset the streak to 0.
     
     return habit['streak']                                       # Otherwise, return the current streak value if the habit is still valid.
 
 
 
-def longest_streak(list):
+@metrics.instrument('analytics.longest_streak')
+def longest_streak(list, current_date=None):
     """
     Find the longest streak among all habits.
 
-    list: List of habit dictionaries.
+    list: List of habit dictionaries (or any iterable of habits, e.g. a stream from HabitDatabase.iter_habits()).
+    current_date: Day the streaks are evaluated on (default today); for many days use streak_timeline.StreakTimeline.
 
     Returns: Longest streak found.
     """
-    if not list:
-        return 0                                           # If the list is empty, return 0.
-    return max(streak_evaluate(h) for h in list)  # Use streak_evaluate to get the streak for each habit and return the maximum value.
+    today = current_date or datetime.date.today()          # looked up once instead of once per habit
+    return max((streak_evaluate(h, today) for h in list), default=0)  # Use streak_evaluate to get the streak for each habit and return the maximum value, or 0 if there are none.
 
 
 
+@metrics.instrument('analytics.habit_longest_streak')
 def habit_longest_streak(list, name):                       
     """
-    Get the longest streak value for a specific habit by name.
+    Get the longest streak ever reached by a specific habit, by name.
+    Habits keep this value up to date on every check-off, so nothing is recomputed here.
 
         list: List of habit dictionaries.
         name (str): Name of the habit to search for.
 
     Returns Streak value or 0 if not found.
     """
+    if isinstance(list, HabitRegistry):
+        h = list.get(name)                    # direct lookup through the name index
+        return longest_ever_streak(h) if h is not None else 0
+
     for h in list:                            # Iterate through the list of habits
         
         if h['name'] == name:                 # Check if the habit's name matches the provided name
-            return streak_evaluate(h)       # If a match is found, evaluate the streak
+            return longest_ever_streak(h)   # If a match is found, return its longest streak
     return 0                          # If no match is found, return 0
+
+
+
+def longest_ever_streak(habit):
+    """
+    Longest streak a habit ever reached (never less than its current streak).
+    Habit dictionaries saved before the history was tracked fall back to their current streak.
+    """
+    return max(habit.get('longest_streak', 0), habit['streak'])
 	
 	
 
 
-def reset_broken_streaks(list):
+@metrics.instrument('analytics.reset_broken_streaks')
+def reset_broken_streaks(list, current_date=None):
     """
     Resets the streak of habit to 0 if the user doesn't maintain the streak by not checking off a habit daily/weekly, making streak invalid.
     This avoids confusion when analyzing.
 	Informs the user in the output when a streak is reset due to inactivity.
+    current_date: Day the streaks are evaluated on (default today).
     """
+    today = current_date or datetime.date.today()
     for habit in list:                         # Iterate through each habit in the list
-        if streak_evaluate(habit) == 0:            # If the habit's streak is evaluated to 0 (meaning it has been broken)
+        if streak_evaluate(habit, today) == 0:            # If the habit's streak is evaluated to 0 (meaning it has been broken)
             habit['streak'] = 0                   # Reset the streak to 0
 
+
+
+
+@metrics.instrument('analytics.summarize')
+def summarize(habits, current_date=None, broken=False):
+    """
+    Summary figures of a collection of habits, computed in one pass.
+    Summaries of separate parts (files, shards, ...) can be combined with merge_summaries.
+
+    Arguments:
+        habits: Any iterable of habits (list, registry or a stream from HabitDatabase.iter_habits()).
+        current_date (date): Day the streaks are evaluated on (default today).
+        broken (bool): Also list the names of the habits whose stored streak is broken.
+
+    Returns:
+        dict: {'habits': count, 'longest_streak': longest valid streak, 'by_periodicity': {periodicity: count}},
+              plus 'broken': [names] if asked for.
+    """
+    if current_date is None:
+        current_date = datetime.date.today()
+    count, longest, by_periodicity, names = 0, 0, {}, []
+    for h in habits:
+        count += 1
+        streak = streak_evaluate(h, current_date)
+        longest = max(longest, streak)
+        by_periodicity[h['periodicity']] = by_periodicity.get(h['periodicity'], 0) + 1
+        if broken and streak == 0 and h['streak'] > 0:
+            names.append(h['name'])
+    summary = {'habits': count, 'longest_streak': longest, 'by_periodicity': by_periodicity}
+    if broken:
+        summary['broken'] = names
+    return summary
+
+
+
+@metrics.instrument('analytics.merge_summaries')
+def merge_summaries(summaries):
+    """
+    Combine summaries made by summarize() into the summary of all their habits together.
+    'broken' lists are concatenated when the summaries have them.
+    """
+    total = {'habits': 0, 'longest_streak': 0, 'by_periodicity': {}}
+    for s in summaries:
+        total['habits'] += s['habits']
+        total['longest_streak'] = max(total['longest_streak'], s['longest_streak'])
+        for freq, count in s['by_periodicity'].items():
+            total['by_periodicity'][freq] = total['by_periodicity'].get(freq, 0) + count
+        if 'broken' in s:
+            total.setdefault('broken', []).extend(s['broken'])
+    return total
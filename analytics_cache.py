@@ -0,0 +1,128 @@
+# analytics_cache.py
+
+"""
+Analytics Cache Module
+
+- main.analyze resets broken streaks and re-evaluates every habit on each visit, and longest_streak
+  looks at every habit each time, even when nothing changed since the last question.
+
+- AnalyticsCache remembers the effective streak (analytics.streak_evaluate) of every habit for the day
+  it was computed on, and keeps:
+    * a max-heap of the streaks, so the top streak is read in O(1) (amortized O(log N) after changes),
+    * the habits per periodicity as returned by analytics.same_periodicity_habits,
+    * the names of the habits whose stored streak is broken, so resetting them does not look at the others.
+
+- It listens to the HabitRegistry: an add, check-off or remove only re-evaluates the habit involved.
+  Everything is recomputed once when the evaluation date changes.
+
+- The answers are the same as the functions in analytics.py.
+"""
+
+import datetime
+import heapq
+
+import analytics
+
+
+class AnalyticsCache:
+    """
+    - Incrementally maintained analytics of the habits in a HabitRegistry.
+    - Habits changed in place must be reported with registry.changed(habit), like main.checkoff does.
+    """
+
+    def __init__(self, registry):
+        """
+        Argument:
+            registry (HabitRegistry): The habits to analyze; the cache registers itself as a listener.
+        """
+        self.registry = registry
+        self.day = None             # day number the cached streaks were evaluated on
+        self.version = None         # registry version the cache is up to date with
+        self._streaks = {}          # name -> effective streak on self.day
+        self._heap = []             # (-streak, name); entries that no longer match _streaks are skipped (lazy deletion)
+        self._broken = set()        # names whose stored streak is > 0 but evaluates to 0
+        self._by_periodicity = {}   # periodicity -> list of habits, dropped when a habit with that periodicity changes
+        registry.listeners.append(self._on_change)
+
+    # ----- keeping the cache up to date -----
+
+    def _on_change(self, op, habit):
+        # Registry listener: update only the habit that changed.
+        self._by_periodicity.pop(habit['periodicity'], None)
+        if self.day is not None:
+            if op == 'remove':
+                self._streaks.pop(habit['name'], None)
+                self._broken.discard(habit['name'])
+            else:
+                self._evaluate(habit)
+        self.version = self.registry.version
+
+    def _evaluate(self, habit):
+        # Compute and store the effective streak of one habit on self.day.
+        name = habit['name']
+        streak = analytics.streak_evaluate(habit, datetime.date.fromordinal(self.day))
+        if self._streaks.get(name) != streak:
+            self._streaks[name] = streak
+            heapq.heappush(self._heap, (-streak, name))
+        if streak == 0 and habit['streak'] > 0:
+            self._broken.add(name)
+        else:
+            self._broken.discard(name)
+        if len(self._heap) > 2 * len(self._streaks) + 64:      # too many stale entries: rebuild
+            self._heap = [(-s, n) for n, s in self._streaks.items()]
+            heapq.heapify(self._heap)
+
+    def _sync(self, current_date):
+        # Re-evaluate everything when asked about another day than the cached one.
+        day = (current_date or datetime.date.today()).toordinal()
+        if day == self.day and self.version == self.registry.version:
+            return
+        self.day = day
+        self._streaks = {}
+        self._broken = set()
+        self._heap = []
+        for h in self.registry:
+            self._evaluate(h)
+        self.version = self.registry.version
+
+    # ----- queries -----
+
+    def streak(self, name, current_date=None):
+        """
+        Effective streak of one habit (analytics.streak_evaluate), 0 if there is no such habit.
+        """
+        self._sync(current_date)
+        return self._streaks.get(name, 0)
+
+    def longest_streak(self, current_date=None):
+        """
+        Longest valid streak among all habits, like analytics.longest_streak.
+        """
+        self._sync(current_date)
+        heap = self._heap
+        while heap and self._streaks.get(heap[0][1]) != -heap[0][0]:    # drop entries of removed or changed habits
+            heapq.heappop(heap)
+        return -heap[0][0] if heap else 0
+
+    def same_periodicity_habits(self, freq):
+        """
+        Habits with the given periodicity, like analytics.same_periodicity_habits.
+        """
+        if freq not in self._by_periodicity:
+            self._by_periodicity[freq] = analytics.same_periodicity_habits(self.registry, freq)
+        return self._by_periodicity[freq]
+
+    def reset_broken_streaks(self, current_date=None):
+        """
+        Set the streak of every broken habit to 0, like analytics.reset_broken_streaks,
+        but only the habits known to be broken are touched.
+
+        Returns:
+            list: Names of the habits that were reset.
+        """
+        self._sync(current_date)
+        reset = list(self._broken)
+        for name in reset:
+            self.registry.get(name)['streak'] = 0
+        self._broken.clear()
+        return reset
@@ -0,0 +1,173 @@
+# batch_analytics.py
+
+"""
+Batch Analytics Module
+
+- analytics.py evaluates streaks one habit at a time in Python, which is fine for a few habits
+  but dominates the run time on large exported datasets.
+
+- HabitBatch loads periodicity, last check-off day, the day the streak breaks and streak of all habits
+  into NumPy arrays once: the check-off dates are parsed as one datetime64 array and the break days are
+  computed per periodicity with array arithmetic (no per-habit date parsing or analytics call), so even a
+  single query over all habits is faster than the plain loop. It
+  then answers the same questions as analytics.py (effective streaks, longest streak, broken streaks,
+  per-periodicity figures) with a few vectorized operations.
+
+- The results are exactly the same as the scalar functions in analytics.py.
+
+- NumPy is optional: the rest of the app works without it, only this module needs it.
+
+Can also be run on a habits file:
+    python batch_analytics.py habits.json
+"""
+
+import datetime
+import json
+import sys
+
+try:
+    import numpy as np
+except ImportError:            # NumPy not installed: HabitBatch raises a clear error when used
+    np = None
+
+from habit import EVERY_N_DAYS, Habit, break_day, period_for
+
+NEVER_BREAKS = np.iinfo(np.int64).max if np is not None else None   # break day of habits with an unknown periodicity
+NEVER = -1                                                            # last day value of a habit never checked off
+EPOCH = datetime.date(1970, 1, 1).toordinal()                         # datetime64 day 0 as a day number
+
+
+class HabitBatch:
+    """
+    - Column-oriented copy of a list of habits for vectorized analytics.
+    - Built once (one pass over the habits); every query afterwards is a handful of array operations.
+    """
+
+    def __init__(self, habits):
+        """
+        Argument:
+            habits (iterable): Habit objects or habit dictionaries.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if np is None:
+            raise ImportError("batch analytics needs NumPy: pip install numpy")
+        self.habits = list(habits)
+        n = len(self.habits)
+        self.names = [h['name'] for h in self.habits]
+        self.periodicity = np.array([h['periodicity'] for h in self.habits], dtype=object)
+        if all(isinstance(h, Habit) for h in self.habits):           # day numbers already parsed
+            self.last = np.fromiter((NEVER if h.last is None else h.last for h in self.habits), np.int64, n)
+        else:                                                         # one vectorized parse of all dates (None -> NaT)
+            dates = np.array([h['last_completed'] or None for h in self.habits], dtype='datetime64[D]')
+            self.last = np.where(np.isnat(dates), NEVER, dates.astype(np.int64) + EPOCH)
+        self.breaks = np.full(n, NEVER_BREAKS, dtype=np.int64)
+        checked = self.last != NEVER
+        for freq in dict.fromkeys(self.periodicity.tolist()):
+            mask = checked & (self.periodicity == freq)
+            self.breaks[mask] = _break_days(freq, self.last[mask])
+        self.streak = np.fromiter((h['streak'] for h in self.habits), np.int64, n)
+
+    def __len__(self):
+        return len(self.habits)
+
+    def valid(self, current_date=None):
+        """
+        Boolean mask of habits whose streak is still valid on the given date (default today).
+        """
+        if current_date is None:
+            current_date = datetime.date.today()
+        return (self.last != NEVER) & (current_date.toordinal() < self.breaks)
+
+    def effective_streaks(self, current_date=None):
+        """
+        Streak of every habit as analytics.streak_evaluate would return it.
+        """
+        return np.where(self.valid(current_date), self.streak, 0)
+
+    def longest_streak(self, current_date=None):
+        """
+        Longest valid streak among all habits (0 when there are none), like analytics.longest_streak.
+        """
+        if not len(self):
+            return 0
+        return int(self.effective_streaks(current_date).max())
+
+    def broken(self, current_date=None):
+        """
+        Names of the habits whose streak evaluates to 0, i.e. the ones reset_broken_streaks resets.
+        """
+        return [self.names[i] for i in np.flatnonzero(self.effective_streaks(current_date) == 0)]
+
+    def periodicity_stats(self, current_date=None):
+        """
+        Per-periodicity figures.
+
+        Returns:
+            dict: {periodicity: {'count', 'valid', 'broken', 'longest_streak'}},
+                  where 'broken' counts the habits whose streak evaluates to 0.
+        """
+        effective = self.effective_streaks(current_date)
+        stats = {}
+        for freq in dict.fromkeys(self.periodicity.tolist()):      # periodicities in order of first appearance
+            mask = self.periodicity == freq
+            values = effective[mask]
+            valid = int(np.count_nonzero(values))
+            stats[freq] = {
+                'count': int(mask.sum()),
+                'valid': valid,
+                'broken': int(values.size - valid),
+                'longest_streak': int(values.max()),
+            }
+        return stats
+
+    def reset_broken_streaks(self, current_date=None):
+        """
+        Set the streak of every broken habit to 0, in the habits and in the arrays,
+        like analytics.reset_broken_streaks.
+        """
+        effective = self.effective_streaks(current_date)
+        for i in np.flatnonzero(effective == 0):
+            self.habits[i]['streak'] = 0
+        self.streak = effective
+
+
+def _break_days(freq, last):
+    """
+    Vectorized analytics.streak_break_day for habits of one periodicity.
+
+    Arguments:
+        freq (str): The periodicity.
+        last (ndarray): Day numbers of their last check-offs.
+    """
+    match = EVERY_N_DAYS.fullmatch(freq) if isinstance(freq, str) else None
+    if freq == 'daily':
+        return last + 2
+    if freq == 'weekly' or match and int(match.group(1)) > 0:
+        n = 7 if freq == 'weekly' else int(match.group(1))
+        return ((last - 1) // n + 2) * n + 1                   # start of the period after the next one (see habit.PERIODS)
+    if freq == 'monthly':
+        months = (last - EPOCH).astype('datetime64[D]').astype('datetime64[M]')
+        return (months + 2).astype('datetime64[D]').astype(np.int64) + EPOCH
+    period = period_for(freq)
+    if period is None:
+        return NEVER_BREAKS                                     # unknown periodicity: never breaks
+    return np.fromiter((break_day(period, int(day)) for day in last), np.int64, last.size)   # periodicities added with register_period
+
+
+def main(filename):
+    # Print the batch summary of a habits file as JSON.
+    with open(filename, 'r') as f:
+        batch = HabitBatch(json.load(f))
+    summary = {
+        'habits': len(batch),
+        'longest_streak': batch.longest_streak(),
+        'broken': len(batch.broken()),
+        'by_periodicity': batch.periodicity_stats(),
+    }
+    print(json.dumps(summary, indent=4))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else 'habits.json')
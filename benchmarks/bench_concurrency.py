@@ -0,0 +1,67 @@
+# benchmarks/bench_concurrency.py
+
+"""
+Stress test: check-off throughput of SharedHabitDatabase when several processes write to the same file.
+
+Every worker repeatedly loads the shared file, checks off a random habit and saves (lock, re-read, merge, write).
+At the end the script verifies that no check-off was lost.
+
+Run from the repository root:
+    python benchmarks/bench_concurrency.py [habits] [checkoffs_per_worker]
+"""
+
+import datetime
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # make the app modules importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+from database import HabitDatabase, SharedHabitDatabase
+from habit import Habit
+
+
+def worker(path, seed, rounds):
+    rng = random.Random(seed)
+    start = datetime.date(2000, 1, 1)
+    for i in range(rounds):
+        db = SharedHabitDatabase(path)
+        habits = [Habit.from_dict(d) for d in db.load_habits()]
+        habit = rng.choice(habits)
+        habit.check_off(start + datetime.timedelta(days=seed * rounds + i))    # a day no other worker uses
+        db.log_event('checkoff', habit)
+        db.save_habits([h.to_dict() for h in habits])
+
+
+def run(path, workers, rounds):
+    # Returns check-offs per second with `workers` processes.
+    processes = [multiprocessing.Process(target=worker, args=(path, w, rounds)) for w in range(workers)]
+    start = time.perf_counter()
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    return workers * rounds / (time.perf_counter() - start)
+
+
+def main(n=1000, rounds=50):
+    print(f"{n} habits, {rounds} check-offs per worker")
+    print(f"{'workers':>8}{'check-offs/s':>16}{'lost':>8}")
+    for workers in (1, 2, 4, 8):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'habits.json')
+            habits = datagen.generate(n, seed=workers)
+            HabitDatabase(path).save_habits(habits)
+            before = sum(len(h['completions']) for h in habits)
+            rate = run(path, workers, rounds)
+            after = sum(len(h['completions']) for h in HabitDatabase(path).load_habits())
+            print(f"{workers:>8}{rate:>16.1f}{before + workers * rounds - after:>8}")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,66 @@
+# benchmarks/bench_habit.py
+
+"""
+Benchmark: memory per habit and streak evaluation time for habit dictionaries vs. Habit objects.
+
+Run from the repository root:
+    python benchmarks/bench_habit.py [number_of_habits]
+"""
+
+import datetime
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # make the app modules importable
+
+import analytics
+from habit import Habit
+
+
+def make_dicts(n):
+    # n synthetic habit dictionaries as HabitDatabase.load_habits() returns them.
+    today = datetime.date.today()
+    return [
+        {
+            'name': f"habit {i}",
+            'description': "synthetic",
+            'periodicity': 'daily' if i % 2 else 'weekly',
+            'date_created': "2025-01-01",
+            'last_completed': (today - datetime.timedelta(days=i % 10)).isoformat(),
+            'streak': i % 30,
+        }
+        for i in range(n)
+    ]
+
+
+def measure(build):
+    # Build the habits and return (habits, bytes allocated).
+    tracemalloc.start()
+    habits = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return habits, size
+
+
+def main(n=200_000):
+    dicts, dict_bytes = measure(lambda: make_dicts(n))
+    objects, _ = measure(lambda: [Habit.from_dict(d) for d in dicts])
+    _, object_bytes = measure(lambda: [Habit.from_dict(d) for d in make_dicts(n)])   # Habits only, the dicts are freed
+
+    start = time.perf_counter()
+    analytics.longest_streak(dicts)
+    dict_time = time.perf_counter() - start
+    start = time.perf_counter()
+    analytics.longest_streak(objects)
+    object_time = time.perf_counter() - start
+
+    print(f"{n} habits")
+    print(f"{'':<24}{'dicts':>12}{'Habit':>12}")
+    print(f"{'bytes per habit':<24}{dict_bytes / n:>12.0f}{object_bytes / n:>12.0f}")
+    print(f"{'longest_streak (ms)':<24}{dict_time * 1000:>12.1f}{object_time * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
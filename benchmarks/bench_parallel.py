@@ -0,0 +1,44 @@
+# benchmarks/bench_parallel.py
+
+"""
+Parallel analytics benchmark: summarizes many per-user habit files (parallel_analytics.analyze_files)
+with one worker and with more, and prints the time and speed-up of each.
+
+Run from the repository root:
+    python benchmarks/bench_parallel.py [files] [habits_per_file]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # make the app modules importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+from database import HabitDatabase
+from parallel_analytics import analyze_files, find_files
+
+
+def main(files=200, per_file=2_000):
+    with tempfile.TemporaryDirectory() as folder:
+        dicts = datagen.generate(per_file)
+        for i in range(files):
+            os.makedirs(os.path.join(folder, f"user{i:04d}"))
+            HabitDatabase(os.path.join(folder, f"user{i:04d}", 'habits.json')).save_habits(dicts)
+        paths = find_files([folder])
+
+        print(f"{files} files x {per_file} habits, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8}{'seconds':>10}{'speed-up':>10}")
+        base = None
+        for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            start = time.perf_counter()
+            analyze_files(paths, workers=workers)
+            seconds = time.perf_counter() - start
+            base = base or seconds
+            print(f"{workers:>8}{seconds:>10.2f}{base / seconds:>10.2f}")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:3]))
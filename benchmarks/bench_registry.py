@@ -0,0 +1,73 @@
+# benchmarks/bench_registry.py
+
+"""
+Benchmark: name lookups, deletes and periodicity filtering on a plain list vs. HabitRegistry.
+
+Run from the repository root:
+    python benchmarks/bench_registry.py [number_of_habits]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # make the app modules importable
+
+import analytics
+from registry import HabitRegistry
+
+
+def make_habits(n):
+    # n synthetic habits, alternating daily/weekly.
+    return [
+        {
+            'name': f"habit {i}",
+            'description': "synthetic",
+            'periodicity': 'daily' if i % 2 else 'weekly',
+            'date_created': "2025-01-01",
+            'last_completed': None,
+            'streak': i % 30,
+        }
+        for i in range(n)
+    ]
+
+
+def timed(func, repeat):
+    # Average seconds per call over `repeat` calls.
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) / repeat
+
+
+def main(n=100_000, repeat=50):
+    habits = make_habits(n)
+    registry = HabitRegistry(habits)
+    targets = [f"habit {n - 1 - i}" for i in range(repeat)]     # names near the end: the worst case for a scan
+
+    def list_remove(i):
+        for h in habits:                    # same scan + list.remove as the old main.remove
+            if h['name'] == targets[i]:
+                habits.remove(h)
+                return
+
+    results = [
+        ("lookup (habit_longest_streak)",
+         timed(lambda i: analytics.habit_longest_streak(habits, targets[i]), repeat),
+         timed(lambda i: analytics.habit_longest_streak(registry, targets[i]), repeat)),
+        ("filter (same_periodicity_habits)",
+         timed(lambda i: analytics.same_periodicity_habits(habits, 'daily'), 5),
+         timed(lambda i: analytics.same_periodicity_habits(registry, 'daily'), 5)),
+        ("delete (remove)",
+         timed(list_remove, repeat),
+         timed(lambda i: registry.remove(targets[i]), repeat)),
+    ]
+
+    print(f"{n} habits")
+    print(f"{'operation':<36}{'list (ms)':>12}{'registry (ms)':>16}{'speed-up':>10}")
+    for label, scan, indexed in results:
+        print(f"{label:<36}{scan * 1000:>12.3f}{indexed * 1000:>16.4f}{scan / indexed:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
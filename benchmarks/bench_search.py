@@ -0,0 +1,64 @@
+# benchmarks/bench_search.py
+
+"""
+Search benchmark: prefix completion and misspelled-name suggestions with HabitSearch vs. scanning every name
+(str.startswith for prefixes, difflib.get_close_matches for suggestions), plus the time to build the indexes.
+
+Run from the repository root:
+    python benchmarks/bench_search.py [number_of_habits]
+"""
+
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # make the app modules importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+from registry import HabitRegistry
+from search import HabitSearch
+
+
+def timed(func, items):
+    # Average seconds per call over the items.
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def main(n=100_000, repeat=20):
+    registry = HabitRegistry(datagen.generate(n))
+    names = [h['name'] for h in registry]
+    rng = random.Random(1)
+    targets = rng.sample(names, repeat)
+    prefixes = [name[:-2] for name in targets]
+    typos = [name[1] + name[0] + name[2:] for name in targets]          # first two letters swapped
+
+    start = time.perf_counter()
+    search = HabitSearch(registry)
+    sort_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    search.suggest(typos[0])                                             # builds the trigram index
+    build_seconds = time.perf_counter() - start
+
+    results = [
+        ("prefix completion",
+         timed(lambda p: [m for m in names if m.lower().startswith(p)][:10], prefixes),
+         timed(search.complete, prefixes)),
+        ("suggestion for a typo",
+         timed(lambda t: difflib.get_close_matches(t, names, 5), typos[:3]),     # slow: only a few
+         timed(search.suggest, typos)),
+    ]
+
+    print(f"{n} habits, sorted names built in {sort_seconds * 1000:.0f} ms, trigram index in {build_seconds * 1000:.0f} ms")
+    print(f"{'operation':<24}{'scan (ms)':>12}{'index (ms)':>12}{'speed-up':>10}")
+    for label, scan, index in results:
+        print(f"{label:<24}{scan * 1000:>12.3f}{index * 1000:>12.3f}{scan / index:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:2]))
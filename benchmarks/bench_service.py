@@ -0,0 +1,74 @@
+# benchmarks/bench_service.py
+
+"""
+Load test for the HTTP/JSON service (service.py): many clients check off habits at the same time,
+each over its own kept-open connection. Prints the throughput and the latency percentiles.
+
+Run from the repository root:
+    python benchmarks/bench_service.py [habits] [requests_per_client]
+"""
+
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # make the app modules importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+from database import HabitDatabase
+from service import HabitService, serve
+
+
+async def client(port, names, first_day, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for i, name in enumerate(names):
+        day = (first_day + datetime.timedelta(days=i)).isoformat()
+        body = f'{{"date": "{day}"}}'.encode()
+        start = time.perf_counter()
+        writer.write(f"POST /habits/{name}/checkoff HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        length = 0
+        while (line := await reader.readline()) != b'\r\n':
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run(path, n, clients, rounds):
+    service = HabitService(HabitDatabase(path))
+    await service.start()
+    server = await serve(service, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    names = [h.name for h in service.habits]
+    latencies = []
+    start = time.perf_counter()
+    async with server:
+        await asyncio.gather(*(client(port, [names[(c * rounds + i) % n] for i in range(rounds)],
+                                      datetime.date(2100, 1, 1) + datetime.timedelta(days=c * rounds), latencies)
+                               for c in range(clients)))
+    seconds = time.perf_counter() - start
+    await service.close()
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return len(latencies) / seconds, pick(0.5), pick(0.99)
+
+
+def main(n=10_000, rounds=200):
+    print(f"{n} habits, {rounds} check-offs per client")
+    print(f"{'clients':>8}{'requests/s':>14}{'p50 ms':>10}{'p99 ms':>10}")
+    for clients in (1, 10, 50):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'habits.json')
+            HabitDatabase(path).save_habits(datagen.generate(n))
+            rate, p50, p99 = asyncio.run(run(path, n, clients, rounds))
+            print(f"{clients:>8}{rate:>14.0f}{p50:>10.2f}{p99:>10.2f}")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:3]))
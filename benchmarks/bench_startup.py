@@ -0,0 +1,100 @@
+# benchmarks/bench_startup.py
+
+"""
+Startup benchmark: how long one invocation of the tool takes, as scripts call it thousands of times a day.
+
+For each size it measures, in fresh processes (best of --repeat runs):
+- python -c pass                        the interpreter alone, for reference
+- main.py checkoff <name>               single-habit command (name index, no full load)
+- main.py batch (one checkoff line)     the same change through the full load + save path
+- interactive: time until the menu is shown, and until the first action (a check-off) is done
+  (needs colorama, skipped otherwise)
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--sizes 1000 100000] [--repeat 5]
+"""
+
+import argparse
+import datetime
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)                                            # make the app modules importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+from database import HabitDatabase
+
+MAIN = os.path.join(ROOT, 'main.py')
+
+
+def timed(args, folder, stdin=None):
+    # Wall time of one process run to completion.
+    start = time.perf_counter()
+    subprocess.run(args, cwd=folder, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def interactive(folder, name):
+    """
+    Start the interactive menu, check off one habit and exit.
+
+    Returns:
+        tuple: (seconds until the menu is shown, seconds until the check-off is confirmed)
+    """
+    start = time.perf_counter()
+    p = subprocess.Popen([sys.executable, MAIN], cwd=folder, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    out, menu_shown = b'', None
+    while b'Your choice' not in out:
+        out += os.read(p.stdout.fileno(), 65536)
+    menu_shown = time.perf_counter() - start
+    p.stdin.write(f"2\n{name}\n".encode())
+    p.stdin.flush()
+    while b'COMPLETED' not in out and b'ALREADY' not in out:
+        out += os.read(p.stdout.fileno(), 65536)
+    action_done = time.perf_counter() - start
+    p.communicate(b"5\n")
+    return menu_shown, action_done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Habit tracker startup benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    has_colorama = importlib.util.find_spec('colorama') is not None
+
+    best = lambda run: min(run() for _ in range(args.repeat)) * 1000
+    print(f"{'operation':<36}{'habits':>10}{'ms':>10}")
+    print(f"{'python -c pass':<36}{'-':>10}{best(lambda: timed([sys.executable, '-c', 'pass'], ROOT)):>10.1f}")
+    for n in args.sizes:
+        folder = tempfile.mkdtemp()
+        try:
+            dicts = datagen.generate(n)
+            name = dicts[n // 2]['name']
+            HabitDatabase(os.path.join(folder, 'habits.json'), index=True).save_habits(dicts)
+            days = iter(range(1, 10**6))
+            day = lambda: (datetime.date(2100, 1, 1) + datetime.timedelta(days=next(days))).isoformat()
+
+            single = best(lambda: timed([sys.executable, MAIN, 'checkoff', name, '--date', day()], folder))
+            print(f"{'checkoff (single habit)':<36}{n:>10}{single:>10.1f}")
+            full = best(lambda: timed([sys.executable, MAIN, 'batch', '-'], folder, f'checkoff "{name}" --date {day()}\n'.encode()))
+            print(f"{'checkoff (full load + save)':<36}{n:>10}{full:>10.1f}")
+            if has_colorama:
+                runs = [interactive(folder, name) for _ in range(args.repeat)]
+                print(f"{'interactive: menu shown':<36}{n:>10}{min(r[0] for r in runs) * 1000:>10.1f}")
+                print(f"{'interactive: first check-off done':<36}{n:>10}{min(r[1] for r in runs) * 1000:>10.1f}")
+        finally:
+            shutil.rmtree(folder)
+    if not has_colorama:
+        print("(interactive timings skipped: colorama is not installed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/datagen.py
+
+"""
+Synthetic habit data for the benchmarks.
+
+- A realistic mix of periodicities (mostly daily, some weekly, a few monthly).
+- About a third of the streaks are broken, some habits were never checked off,
+  and each checked-off habit has a short completion history.
+- The same seed always gives the same habits, so runs can be compared.
+
+Write a file from the command line:
+    python benchmarks/datagen.py 100000 big_habits.json
+"""
+
+import datetime
+import os
+import random
+import sys
+
+PERIODICITIES = ['daily'] * 6 + ['weekly'] * 3 + ['monthly']
+PERIOD_DAYS = {'daily': 1, 'weekly': 7, 'monthly': 30}
+
+
+def generate(n, seed=0, today=None):
+    """
+    Return n synthetic habit dictionaries (the format HabitDatabase.load_habits() returns).
+
+    Arguments:
+        n (int): Number of habits.
+        seed (int): Random seed.
+        today (datetime.date): Day the data is generated for, defaults to today.
+    """
+    rng = random.Random(seed)
+    today = (today or datetime.date.today()).toordinal()
+    habits = []
+    for i in range(n):
+        periodicity = rng.choice(PERIODICITIES)
+        step = PERIOD_DAYS[periodicity]
+        created = today - rng.randint(30, 400)
+        streak = 0
+        completions = []
+        if rng.random() < 0.9:                                  # 10% were never checked off
+            streak = rng.randint(1, 12)
+            gap = 0 if rng.random() < 0.65 else rng.randint(3, 10)   # about a third are broken
+            last = today - gap * step
+            completions = [last - k * step for k in reversed(range(streak))]
+        habits.append({
+            'name': f"habit {i:07d}",
+            'description': f"synthetic habit number {i}",
+            'periodicity': periodicity,
+            'date_created': datetime.date.fromordinal(created).isoformat(),
+            'last_completed': datetime.date.fromordinal(completions[-1]).isoformat() if completions else None,
+            'streak': streak,
+            'longest_streak': streak + rng.randint(0, 5) if streak else 0,
+            'completions': [datetime.date.fromordinal(d).isoformat() for d in completions],
+        })
+    return habits
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    target = sys.argv[2] if len(sys.argv) > 2 else 'synthetic_habits.json'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database import HabitDatabase
+    HabitDatabase(target).save_habits(generate(count))
+    print(f"wrote {count} habits to {target}")
@@ -0,0 +1,208 @@
+# benchmarks/run.py
+
+"""
+Benchmark harness for the main operations at scale.
+
+- Generates synthetic habits (datagen.py) for each size, then times every operation
+  and measures its peak memory (tracemalloc, in a separate run so it does not distort the timing).
+- Results are written as JSON so two runs can be compared; --compare reports the ratio to a
+  baseline file and exits with status 1 if an operation got slower than --threshold allows.
+
+Focused comparisons live next to it: bench_registry.py (list scans vs. HabitRegistry)
+and bench_habit.py (habit dictionaries vs. Habit objects).
+
+Run from the repository root:
+    python benchmarks/run.py --sizes 10000 100000 --output results.json
+    python benchmarks/run.py --sizes 10000 100000 --compare results.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # make the app modules importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import analytics
+import datagen
+import reports
+from analytics_cache import AnalyticsCache
+from binary_store import BinaryHabitFile
+from database import HabitDatabase
+from habit import Habit
+from registry import HabitRegistry
+from search import HabitSearch
+from streak_timeline import StreakTimeline
+
+
+def operations(folder, dicts):
+    """
+    Return {name: (setup, run)} for every benchmarked operation.
+    setup() prepares fresh input outside the measurement, run(data) is what gets measured.
+    """
+    filename = os.path.join(folder, 'habits.json')
+    db = HabitDatabase(filename)
+    db.save_habits(dicts)
+    binary = HabitDatabase(os.path.join(folder, 'habits.bin'))
+    binary.save_habits(dicts)
+    habits = [Habit.from_dict(d) for d in dicts]
+    names = [d['name'] for d in dicts[::max(1, len(dicts) // 1000)]]       # up to 1000 habits to check off
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+
+    def checkoff(registry):
+        for name in names:                         # what main.checkoff does for each check-off
+            h = registry.get(name)
+            h.check_off(tomorrow)
+            db.log_event('checkoff', h)
+
+    def cached():
+        registry = HabitRegistry(Habit.from_dict(d) for d in dicts)
+        cache = AnalyticsCache(registry)
+        cache.longest_streak(tomorrow)             # warm: the first query evaluates every habit once
+        return registry, cache
+
+    def checkoff_and_query(data):
+        registry, cache = data
+        for name in names:                         # check-off followed by the top-streak question, as in a session
+            h = registry.get(name)
+            h.check_off(tomorrow)
+            registry.changed(h)
+            cache.longest_streak(tomorrow)
+
+    def delta_save(registry):
+        delta = HabitDatabase(filename, delta=True)
+        for name in names[:10]:                    # a session with ten check-offs, saved as a delta
+            h = registry.get(name)
+            h.check_off(tomorrow)
+            delta.log_event('checkoff', h)
+        delta.save_changes()
+        os.remove(delta.deltafile)
+
+    def indexed():
+        search = HabitSearch(HabitRegistry(habits))
+        search.suggest(names[0])                   # builds the trigram index
+        return search
+
+    def search_names(search):
+        for name in names:                         # a completion and a misspelled lookup per name
+            search.complete(name[:-2])
+            search.suggest(name[1] + name[0] + name[2:])
+
+    def timeline(_):
+        today = datetime.date.today()              # status of every day of the last year, one sweep
+        return StreakTimeline(habits).sweep(today - datetime.timedelta(days=364), today)
+
+    def binary_top_streak(_):
+        with BinaryHabitFile(binary.filename) as f:      # open + scan of the mapped records
+            return f.longest_streak()
+
+    return {
+        'load': (lambda: None, lambda _: db.load_habits()),
+        'load_binary': (lambda: None, lambda _: binary.load_habits()),
+        'stream': (lambda: None, lambda _: sum(1 for _ in db.iter_habits())),
+        'from_dict': (lambda: None, lambda _: [Habit.from_dict(d) for d in dicts]),
+        'save': (lambda: None, lambda _: db.save_habits([h.to_dict() for h in habits])),
+        'save_10_changes': (lambda: HabitRegistry(Habit.from_dict(d) for d in dicts), delta_save),
+        'save_binary': (lambda: None, lambda _: binary.save_habits(habits)),
+        'longest_streak': (lambda: None, lambda _: analytics.longest_streak(habits)),
+        'binary_longest_streak': (lambda: None, binary_top_streak),
+        'streak_timeline_365_days': (lambda: None, timeline),
+        'report': (lambda: None, lambda _: reports.build_report(habits)),
+        'reset_broken_streaks': (lambda: [Habit.from_dict(d) for d in dicts], analytics.reset_broken_streaks),
+        'search_x1000': (indexed, search_names),
+        'checkoff_x1000': (lambda: HabitRegistry(Habit.from_dict(d) for d in dicts), checkoff),
+        'cached_top_streak_x1000': (cached, checkoff_and_query),
+    }
+
+
+def measure(setup, run, repeat):
+    """
+    Return (best wall time in seconds, peak memory in bytes) of run(setup()).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        data = setup()
+        start = time.perf_counter()
+        run(data)
+        best = min(best, time.perf_counter() - start)
+    data = setup()
+    tracemalloc.start()
+    run(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(sizes, repeat, seed):
+    """
+    Run every operation for every size.
+
+    Returns:
+        dict: Machine-readable results.
+    """
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'results': {},
+    }
+    for n in sizes:
+        dicts = datagen.generate(n, seed)
+        with tempfile.TemporaryDirectory() as folder:
+            for name, (setup, run) in operations(folder, dicts).items():
+                seconds, peak = measure(setup, run, repeat)
+                results['results'][f"{name}@{n}"] = {'seconds': seconds, 'peak_bytes': peak}
+                print(f"{name:<24}{n:>10}{seconds * 1000:>12.2f} ms{peak / 2**20:>10.1f} MiB", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the time ratio of every operation to the baseline.
+
+    Returns:
+        list: Operations slower than `threshold` times the baseline.
+    """
+    slower = []
+    print(f"\n{'operation':<34}{'baseline ms':>12}{'now ms':>12}{'ratio':>8}")
+    for key, now in results['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        ratio = now['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        flag = '  SLOWER' if ratio > threshold else ''
+        print(f"{key:<34}{before['seconds'] * 1000:>12.2f}{now['seconds'] * 1000:>12.2f}{ratio:>8.2f}{flag}")
+        if ratio > threshold:
+            slower.append(key)
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Habit tracker benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per operation (best is kept)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="compare with the results in this JSON file")
+    parser.add_argument('--threshold', type=float, default=1.25, help="ratio above which an operation counts as slower")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(results, json.load(f), args.threshold)
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,269 @@
+# binary_store.py
+
+"""
+Binary Store Module
+
+- habits.json is pretty-printed and repeats every key for every habit, so most of the file is whitespace
+  and key names, and reading it means parsing all of it.
+
+- This module defines a compact binary format for the same data:
+
+      header        magic b'HBIN', format version, record size, number of habits, string table size
+      records       one fixed-width record per habit (RECORD below): string table references for name,
+                    description and periodicity, created / last check-off day numbers, streak, longest streak,
+                    position and length of its check-offs in the completion table, other keys as JSON
+      string table  UTF-8 text, every distinct string stored once (e.g. 'daily' only once)
+      completions   all check-off day numbers as 32-bit integers
+
+- BinaryHabitFile reads the file through mmap: opening it only reads the header, a single habit is
+  decoded on request, and scans such as longest_streak() unpack only the record fields they need.
+
+- HabitDatabase stores files ending in '.bin' in this format, so any storage code (and cli import/export)
+  can use it. Conversion to and from JSON is lossless: keys the app does not know are kept in the extra JSON,
+  and so is which standard keys a habit dictionary did not have or had set to null, so that every habit
+  reads back exactly as it was written (check-offs in their stored order, no keys filled in):
+      python binary_store.py habits.json habits.bin
+      python binary_store.py habits.bin habits.json
+"""
+
+import datetime
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from habit import Habit, period_for, to_ordinal, to_text
+
+MAGIC = b'HBIN'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHIII')            # magic, version, record size, habits, string table bytes, completions
+RECORD = struct.Struct('<IIIIIIiiiiIIII')     # name, description, periodicity (offset + length each), created, last,
+                                              # streak, longest, completions (first + count), extra JSON (offset + length)
+NO_DAY = 0                                    # day numbers start at 1, so 0 means "never checked off" (or no date)
+ABSENT = '\x00absent'                         # extra JSON key: standard keys the habit dictionary did not have
+NULL = '\x00null'                             # extra JSON key: standard text keys that were None
+OPTIONAL = ('description', 'periodicity', 'date_created', 'last_completed', 'streak', 'longest_streak', 'completions')
+TEXT_KEYS = ('description', 'periodicity', 'date_created')
+
+
+def write_binary(f, habits):
+    """
+    Write habits to a file opened in binary mode.
+
+    Arguments:
+        f: File opened with 'wb'.
+        habits (iterable): Habit objects or habit dictionaries.
+    """
+    strings = bytearray()
+    offsets = {}                              # string -> (offset, length), so repeated strings are stored once
+    completions = array('l')                  # the type Habit.completions uses; stored as 32-bit below
+    records = bytearray()
+
+    def ref(text):
+        if text not in offsets:
+            data = text.encode('utf-8')
+            offsets[text] = (len(strings), len(data))
+            strings.extend(data)
+        return offsets[text]
+
+    count = 0
+    for h in habits:
+        if isinstance(h, Habit):
+            fields = (h.name, h.description, h.periodicity, h.created, h.last, h.streak, h.longest, h.completions, h.extra)
+        else:
+            fields = _fields(h)
+        name, description, periodicity, created, last, streak, longest, days, extra = fields
+        extra = json.dumps(extra, separators=(',', ':')) if extra else ''
+        records += RECORD.pack(*ref(name), *ref(description), *ref(periodicity),
+                               NO_DAY if created is None else created, NO_DAY if last is None else last, streak, longest,
+                               len(completions), len(days), *(ref(extra) if extra else (0, 0)))
+        completions.extend(days)
+        count += 1
+
+    completions = array('i', completions)
+    if sys.byteorder != 'little':
+        completions.byteswap()                # the file is always little-endian
+    f.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, count, len(strings), len(completions)))
+    f.write(records)
+    f.write(strings)
+    f.write(completions.tobytes())
+
+
+def _fields(d):
+    # RECORD values of a habit dictionary, taken as they are (not normalized like Habit.from_dict would).
+    # Keys it does not have, and text keys set to None, are noted in the extra JSON so they read back the same.
+    extra = {k: v for k, v in d.items() if k not in Habit.FIELDS + ('completions',)}
+    absent = [k for k in OPTIONAL if k not in d]
+    null = [k for k in TEXT_KEYS if k in d and d[k] is None]
+    if absent:
+        extra[ABSENT] = absent
+    if null:
+        extra[NULL] = null
+    return (d['name'], d.get('description') or '', d.get('periodicity') or '',
+            to_ordinal(d.get('date_created')), to_ordinal(d.get('last_completed')),
+            d.get('streak', 0), d.get('longest_streak', 0),
+            array('l', (to_ordinal(day) for day in d.get('completions', ()))), extra)
+
+
+class BinaryHabitFile:
+    """
+    - Read access to a binary habits file through mmap.
+    - Iterating yields habit dictionaries (as Habit.to_dict() writes them); len() is the number of habits.
+    - Use as a context manager, or call close().
+    """
+
+    def __init__(self, filename):
+        """
+        Argument:
+            filename (str): Path of a file written by write_binary.
+
+        Raises:
+            ValueError: If the file is not a habits file in this format.
+        """
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.count, strings, completions = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size:
+            self._map.close()
+            raise ValueError(f"{filename} is not a binary habits file (version {FORMAT_VERSION}).")
+        self._records = HEADER.size
+        self._strings = self._records + self.count * RECORD.size
+        self._completions = self._strings + strings
+        self._names = None                    # name -> record number, built on the first find()
+        self._days = {}                       # day number -> 'YYYY-MM-DD'; the same days recur across habits
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return map(self._decode, self.records())
+
+    def record(self, i):
+        """
+        Return the raw RECORD fields of habit number i.
+        """
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return RECORD.unpack_from(self._map, self._records + i * RECORD.size)
+
+    def records(self):
+        """
+        Iterate over the raw RECORD fields of all habits, without decoding any strings.
+        """
+        return RECORD.iter_unpack(self._map[self._records:self._strings])
+
+    def _text(self, offset, length):
+        start = self._strings + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def name(self, i):
+        """
+        Return the name of habit number i (only that string is decoded).
+        """
+        return self._text(*self.record(i)[0:2])
+
+    def find(self, name):
+        """
+        Return the number of the habit with the given name, or None.
+        """
+        if self._names is None:
+            self._names = {self._text(r[0], r[1]): i for i, r in enumerate(self.records())}
+        return self._names.get(name)
+
+    def habit(self, i):
+        """
+        Decode habit number i into a habit dictionary.
+        """
+        return self._decode(self.record(i))
+
+    def _decode(self, record):
+        # Habit dictionary of one RECORD, keys in Habit.to_dict() order.
+        (name, name_len, desc, desc_len, freq, freq_len, created, last, streak, longest,
+         first, count, extra, extra_len) = record
+        start = self._completions + 4 * first
+        days = struct.unpack_from(f'<{count}i', self._map, start) if count else ()
+        text = self._days
+        for day in days:
+            if day not in text:
+                text[day] = to_text(day)
+        d = {
+            'name': self._text(name, name_len),
+            'description': self._text(desc, desc_len),
+            'periodicity': self._text(freq, freq_len),
+            'date_created': None if created == NO_DAY else text[created] if created in text else to_text(created),
+            'last_completed': None if last == NO_DAY else text[last] if last in text else to_text(last),
+            'streak': streak,
+            'longest_streak': longest,
+            'completions': [text[day] for day in days],
+        }
+        if extra_len:
+            extra = json.loads(self._text(extra, extra_len))
+            for key in extra.pop(NULL, ()):
+                d[key] = None
+            for key in extra.pop(ABSENT, ()):
+                del d[key]
+            d.update(extra)
+        return d
+
+    def get_habit(self, name):
+        """
+        Return the habit dictionary with the given name, or None.
+        """
+        i = self.find(name)
+        return None if i is None else self.habit(i)
+
+    def longest_streak(self, current_date=None):
+        """
+        Longest valid streak among all habits, like analytics.longest_streak,
+        computed from the record fields alone (no habit is decoded).
+        """
+        today = (current_date or datetime.date.today()).toordinal()
+        periods = {}                           # periodicity string offset -> Period, looked up once per periodicity
+        longest = 0
+        for r in self.records():
+            last, streak = r[7], r[8]
+            if last == NO_DAY or streak <= longest:
+                continue
+            if r[4] not in periods:
+                periods[r[4]] = period_for(self._text(r[4], r[5]))
+            period = periods[r[4]]
+            if period is None or period.index(today) - period.index(last) <= 1:   # still valid (see analytics.streak_evaluate)
+                longest = streak
+        return longest
+
+
+def convert(source, target):
+    """
+    Convert a habits file between JSON ('.json' / '.jsonl') and the binary format ('.bin'),
+    in either direction, one habit at a time.
+
+    Returns:
+        int: Number of habits converted.
+    """
+    from database import HabitDatabase         # database.py imports this module
+    count = 0
+
+    def counted(habits):
+        nonlocal count
+        for h in habits:
+            count += 1
+            yield h
+
+    HabitDatabase(target).save_habits(counted(HabitDatabase(source).iter_habits()))
+    return count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit("usage: python binary_store.py SOURCE TARGET   (.json, .jsonl or .bin)")
+    print(f"converted {convert(sys.argv[1], sys.argv[2])} habits")
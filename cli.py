@@ -0,0 +1,319 @@
+# cli.py
+
+"""
+Command-line Module
+
+- main.py is interactive: every action goes through input() prompts. This module offers the same actions
+  as non-interactive subcommands, so the tracker can be driven from scripts.
+
+- All operations of one call run against a single loaded database and the habits are saved once at the end,
+  so thousands of operations cost one load and one save.
+
+- A single add, checkoff or remove does not load the habits at all: it reads and writes only the habit involved
+  (through the name index of the JSON file, or the indexed SQLite table), since scripts call this thousands of times a day.
+
+Usage (python main.py <command> ... works the same):
+    python cli.py add "read" --description "Read a book" --periodicity daily
+    python cli.py checkoff "read" [--date 2025-05-28]
+    python cli.py remove "read"
+    python cli.py report [--json]
+    python cli.py batch operations.txt      (one command per line, e.g. 'checkoff read --date 2025-05-28'; '-' reads stdin)
+    python cli.py import habits.csv         (.csv, .jsonl or .json)
+    python cli.py export habits.csv         (.csv, .jsonl or .json)
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import shlex
+import sys
+
+import analytics
+from database import open_database, HabitDatabase
+from habit import Habit, period_for
+from registry import HabitRegistry
+
+SINGLE_COMMANDS = ('add', 'checkoff', 'remove')    # commands that touch one habit
+SINGLE_STORAGE = ('json', 'sqlite')                # modes that read and write one habit cheaply ('log' replays everything, 'shared' merges)
+CSV_FIELDS = ['name', 'description', 'periodicity', 'date_created', 'last_completed', 'streak', 'longest_streak', 'completions']
+
+
+class CommandError(Exception):
+    # An operation that could not be applied (unknown habit, duplicate name, bad periodicity ...).
+    pass
+
+
+# ------------------------------------------- OPERATIONS -------------------------------------------
+
+def add(habits, db, name, description='', periodicity='daily'):
+    """
+    Add a new habit.
+    """
+    if period_for(periodicity) is None:
+        raise CommandError(f"'{periodicity}' is not a valid periodicity")
+    habit = Habit(name, description, periodicity)
+    try:
+        habits.append(habit)
+    except ValueError as e:
+        raise CommandError(str(e))
+    db.log_event('add', habit.to_dict())
+
+
+def checkoff(habits, db, name, date=None):
+    """
+    Check off a habit, today or on the given "YYYY-MM-DD" date.
+    """
+    habit = habits.get(name)
+    if habit is None:
+        raise CommandError(f"no habit named '{name}'")
+    day = datetime.date.fromisoformat(date) if date else None
+    if habit.check_off(day):
+        habits.changed(habit)
+        db.log_event('checkoff', habit)
+
+
+def remove(habits, db, name):
+    """
+    Remove a habit.
+    """
+    habit = habits.remove(name)
+    if habit is None:
+        raise CommandError(f"no habit named '{name}'")
+    db.log_event('remove', habit)
+
+
+def report(habits, db=None):
+    """
+    Summary of all habits as a dictionary.
+    Broken streaks are reset first; the resets are logged to db (if given) so they are saved.
+    """
+    today = datetime.date.today()
+    for h in habits:
+        if h.streak and analytics.streak_evaluate(h, today) == 0:
+            h['streak'] = 0
+            habits.changed(h)
+            if db is not None:
+                db.log_event('reset', h)
+    by_periodicity = {}
+    for h in habits:
+        by_periodicity[h.periodicity] = by_periodicity.get(h.periodicity, 0) + 1
+    return {
+        'habits': len(habits),
+        'longest_streak': analytics.longest_streak(habits),
+        'by_periodicity': by_periodicity,
+        'broken': [h.name for h in habits if h.streak == 0],
+    }
+
+
+# ------------------------------------------- IMPORT / EXPORT -------------------------------------------
+
+def read_habits(filename):
+    """
+    Yield habit dictionaries from a .csv, .jsonl, .json or .bin file.
+    """
+    if str(filename).endswith('.csv'):
+        with open(filename, newline='') as f:
+            rows = csv.DictReader(f)
+            for row in rows:
+                periodicity = row.get('periodicity') or 'daily'
+                if period_for(periodicity) is None:
+                    raise CommandError(f"{filename}, line {rows.line_num}: '{periodicity}' is not a valid periodicity")
+                yield {
+                    'name': row['name'],
+                    'description': row.get('description') or '',
+                    'periodicity': periodicity,
+                    'date_created': row.get('date_created') or datetime.date.today().isoformat(),
+                    'last_completed': row.get('last_completed') or None,
+                    'streak': int(row.get('streak') or 0),
+                    'longest_streak': int(row.get('longest_streak') or 0),
+                    'completions': (row.get('completions') or '').split(';') if row.get('completions') else [],
+                }
+    else:
+        yield from HabitDatabase(filename).iter_habits()      # JSON array, JSON Lines or binary, streamed
+
+
+def write_habits(filename, habits):
+    """
+    Write habits (Habit objects) to a .csv, .jsonl, .json or .bin file.
+    """
+    if str(filename).endswith('.csv'):
+        with open(filename, 'w', newline='') as f:
+            writer = csv.DictWriter(f, CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for h in habits:
+                row = h.to_dict()
+                row['completions'] = ';'.join(row['completions'])
+                writer.writerow(row)
+    else:
+        HabitDatabase(filename).save_habits(h.to_dict() for h in habits)
+
+
+def import_habits(habits, db, filename):
+    """
+    Add the habits from a file; habits that already exist are replaced.
+
+    Returns:
+        int: Number of habits imported.
+    """
+    count = 0
+    for d in read_habits(filename):
+        habit = Habit.from_dict(d)
+        if habits.remove(habit.name) is not None:
+            db.log_event('remove', habit)
+        habits.append(habit)
+        db.log_event('add', habit.to_dict())
+        count += 1
+    return count
+
+
+# ------------------------------------------- COMMAND LINE -------------------------------------------
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='habits', description="Habit tracker command line")
+    parser.add_argument('--file', help="habits file (default habits.json, or habits.db for sqlite)")
+    parser.add_argument('--storage', default=os.environ.get('HABIT_STORAGE', 'json'), help="json, log, shared or sqlite")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('add', help="add a habit")
+    p.add_argument('name')
+    p.add_argument('--description', default='')
+    p.add_argument('--periodicity', default='daily')
+
+    p = commands.add_parser('checkoff', help="check off a habit")
+    p.add_argument('name')
+    p.add_argument('--date', help="YYYY-MM-DD, default today")
+
+    p = commands.add_parser('remove', help="remove a habit")
+    p.add_argument('name')
+
+    p = commands.add_parser('report', help="print a summary")
+    p.add_argument('--json', action='store_true', help="machine-readable output")
+
+    p = commands.add_parser('batch', help="run many commands from a file, one per line")
+    p.add_argument('source', help="file with commands, or - for stdin")
+
+    p = commands.add_parser('import', help="import habits from .csv/.jsonl/.json")
+    p.add_argument('source')
+
+    p = commands.add_parser('export', help="export habits to .csv/.jsonl/.json")
+    p.add_argument('target')
+    return parser
+
+
+def apply(habits, db, args):
+    """
+    Apply one parsed add/checkoff/remove command.
+    """
+    if args.command == 'add':
+        add(habits, db, args.name, args.description, args.periodicity)
+    elif args.command == 'checkoff':
+        checkoff(habits, db, args.name, args.date)
+    elif args.command == 'remove':
+        remove(habits, db, args.name)
+    else:
+        raise CommandError(f"'{args.command}' cannot be used here")
+
+
+def run_batch(habits, db, lines, parser):
+    """
+    Apply one command per line; blank lines and lines starting with # are skipped.
+
+    Returns:
+        tuple: (number applied, list of error messages)
+    """
+    applied, errors = 0, []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            apply(habits, db, parser.parse_args(shlex.split(line)))
+            applied += 1
+        except (CommandError, ValueError) as e:
+            errors.append(f"line {number}: {e}")
+        except SystemExit:                      # argparse rejected the line
+            errors.append(f"line {number}: invalid command: {line}")
+    return applied, errors
+
+
+def apply_single(db, args):
+    """
+    Apply one parsed add/checkoff/remove command by reading and writing only the habit involved.
+    Same results as apply() on the loaded habits followed by a full save.
+    """
+    if args.command == 'add':
+        if period_for(args.periodicity) is None:
+            raise CommandError(f"'{args.periodicity}' is not a valid periodicity")
+        if db.get_habit(args.name) is not None:
+            raise CommandError(f"A habit named '{args.name}' already exists.")
+        db.update_habit(Habit(args.name, args.description, args.periodicity).to_dict())
+    elif args.command == 'checkoff':
+        found = db.get_habit(args.name)
+        if found is None:
+            raise CommandError(f"no habit named '{args.name}'")
+        habit = Habit.from_dict(found)
+        if habit.check_off(datetime.date.fromisoformat(args.date) if args.date else None):
+            db.update_habit(habit.to_dict())
+    elif not db.delete_habit(args.name):
+        raise CommandError(f"no habit named '{args.name}'")
+
+
+def main(argv=None):
+    """
+    Run one command line. Returns the exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    filename = args.file or ('habits.db' if args.storage == 'sqlite' else 'habits.json')
+    db = open_database(filename, args.storage, index=True)
+
+    if args.command in SINGLE_COMMANDS and args.storage in SINGLE_STORAGE:
+        try:
+            apply_single(db, args)
+        except (CommandError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    habits = HabitRegistry(Habit.from_dict(d) for d in db.load_habits())
+
+    errors = []
+    if args.command == 'report':
+        summary = report(habits, db)
+        if args.json:
+            print(json.dumps(summary, indent=4))
+        else:
+            print(f"{summary['habits']} habits, longest streak {summary['longest_streak']}, {len(summary['broken'])} broken")
+            for freq, count in summary['by_periodicity'].items():
+                print(f"  {freq}: {count}")
+    elif args.command == 'export':
+        write_habits(args.target, habits)
+        print(f"exported {len(habits)} habits to {args.target}")
+    elif args.command == 'import':
+        try:
+            print(f"imported {import_habits(habits, db, args.source)} habits")
+        except CommandError as e:
+            errors.append(str(e))
+    elif args.command == 'batch':
+        if args.source == '-':
+            applied, errors = run_batch(habits, db, sys.stdin, parser)
+        else:
+            with open(args.source) as f:
+                applied, errors = run_batch(habits, db, f, parser)
+        print(f"applied {applied} operations")
+    else:
+        try:
+            apply(habits, db, args)
+        except (CommandError, ValueError) as e:
+            errors.append(str(e))
+
+    for message in errors:
+        print(f"error: {message}", file=sys.stderr)
+    db.save_if_dirty([h.to_dict() for h in habits])          # one save for the whole run
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
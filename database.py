@@ -14,23 +14,274 @@ Database Module
 
 - this file handles Loading/Saving of a habit data to/from a JSON file.
 
+- HabitLogDatabase is an append-only mode: every change is written as one line to a log file
+  and replayed on load, with the log periodically compacted into the JSON snapshot.
+
+- SQLiteHabitDatabase keeps habits in an indexed SQLite table, so single habits can be read,
+  updated or deleted without touching the rest.
+
+- Very large habit files can be streamed: iter_habits() yields one habit at a time and save_habits()
+  writes habits one at a time, so neither needs the whole file in memory. Files ending in '.jsonl'
+  are stored as JSON Lines (one habit per line) instead of a JSON array.
+
+- Saves are crash-safe: the file is written to a temporary file first and then renamed over the old one,
+  so a crash mid-save never leaves a half-written habits.json. Unchanged data is never rewritten,
+  and AutoSaver saves in a background thread after every N changes or every T seconds.
+
+- With index=True a JSON habits file gets a small sidecar index '<filename>.idx' (habit name -> position in the file),
+  so reading, changing or deleting one habit only parses that habit instead of the whole file. Such changes are
+  written in place: a habit is overwritten in its own slot (left with some spare room for the next check-offs),
+  a new habit is appended before the closing ']', a deleted one is blanked out with spaces, and the index file
+  only gets one line appended. Only a habit that outgrew its slot makes the rest of the file move.
+
+- With delta=True a save after a few changes only appends the changed habits to '<filename>.delta'
+  (one JSON line each) instead of rewriting every habit; loads merge the delta file into the habits,
+  and once it holds `delta_limit` records the next save rewrites the file and drops it.
+
+- Files ending in '.bin' use the compact binary format of binary_store.py (fixed-width records, read through mmap).
+
+- SharedHabitDatabase lets several processes use the same habits file: saves take an exclusive file lock,
+  re-read the file and merge this process's changes with everyone else's instead of overwriting them.
+
+- Loads, saves and single-habit operations are instrumented (metrics.py): 'database.*' for the JSON file,
+  'log.*', 'sqlite.*' and 'shared.*' for the other backends.
+
 """
 
 import json   # to save/load habits in a .json file.
 import os     # used to check if the file (habits.json) exists before trying to read it.
+import sqlite3  # stdlib SQL engine used by SQLiteHabitDatabase.
+import threading  # AutoSaver runs in a background thread.
+import datetime
+from bisect import bisect_left
+from contextlib import contextmanager
+
+try:
+    import fcntl  # advisory file locks (POSIX only)
+except ImportError:
+    fcntl = None
+
+import binary_store
+import metrics
+from habit import Habit
+
+CHUNK_SIZE = 64 * 1024     # characters read at a time when streaming a JSON array
+
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of a JSON array from an open file one at a time.
+    Only a chunk of the file plus the element being parsed are kept in memory.
+
+    Arguments:
+        f: File opened in text mode, positioned at the start of the array.
+        chunk_size (int): Number of characters read per step.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof, started = '', 0, False, False
+    while True:
+        while pos < len(buf) and buf[pos] in ' \t\r\n,':          # skip whitespace and separators
+            pos += 1
+        value = end = None
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError("Expected a JSON array of habits.")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            if end is not None and (end < len(buf) or eof):      # a value ending at the buffer edge may be cut off
+                pos = end
+                yield value
+                continue
+        elif eof:
+            if started:
+                raise ValueError("Unexpected end of file: the JSON array is not closed.")
+            return                                              # empty file: no habits
+        chunk = f.read(chunk_size)                              # refill, keeping only the unparsed rest of the buffer
+        buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+
+
+SEPARATOR = ',\n    '        # written between two habits of a JSON array
+
+
+def habit_text(habit):
+    # One habit as it appears inside the JSON array (nested one level deeper). Always ASCII.
+    return json.dumps(habit, indent=4).replace('\n', '\n    ')
+
+
+def write_json_array(f, habits, index=None):
+    """
+    Write habits to an open file as a JSON array, one habit at a time.
+    The output is identical to json.dump(habits, f, indent=4), but habits can be any iterable (e.g. a generator).
+
+    Arguments:
+        f: File opened in text mode.
+        habits (iterable): Habit dictionaries.
+        index (NameIndex): If given, the position of every habit written is added to it.
+    """
+    f.write('[')
+    pos, empty = 1, True
+    for h in habits:
+        text = habit_text(h)
+        pos += f.write('\n    ' if empty else SEPARATOR)
+        if index is not None:
+            index.add(h['name'], pos, len(text))      # json.dumps output is ASCII, so characters == bytes
+        pos += f.write(text)
+        empty = False
+    f.write(']' if empty else '\n]')
+
+
+ROOM = 128                   # spare characters left after a habit written in place, for its next check-offs
+INDEX_JOURNAL = 1000         # changes appended to an index file before it is written again as a whole
+
+
+class NameIndex:
+    """
+    Names of the habits of a JSON array file in file order, with where each habit's slot starts and how long it is
+    (the habit's text, plus any spaces left after it). A deleted habit keeps its entry, with None as name,
+    until the next full save.
+    Kept as two flat lists because they load and save several times faster than one entry per habit;
+    the name -> number dictionary is built from them on the first lookup.
+    """
+
+    def __init__(self, names=None, positions=None):
+        self.names = names if names is not None else []
+        self.positions = positions if positions is not None else []     # start, length, start, length, ...
+        self.removed = self.names.count(None)      # entries of deleted habits
+        self.journal = 0                           # changes appended to the index file since it was written whole
+        self._numbers = None                       # name -> number, built on the first find()
+
+    def __len__(self):
+        return len(self.names) - self.removed      # habits in the file
+
+    def add(self, name, start, length):
+        if self._numbers is not None:
+            self._numbers[name] = len(self.names)
+        self.names.append(name)
+        self.positions += (start, length)
+
+    def find(self, name):
+        """
+        Return the number of the habit with the given name, or None.
+        """
+        if self._numbers is None:
+            self._numbers = {n: i for i, n in enumerate(self.names) if n is not None}
+        return self._numbers.get(name)
+
+    def span(self, i):
+        """
+        Return (start, length) of habit number i.
+        """
+        return self.positions[2 * i], self.positions[2 * i + 1]
+
+    def set(self, i, start, length):
+        self.positions[2 * i:2 * i + 2] = (start, length)
+
+    def remove(self, i):
+        if self._numbers is not None:
+            del self._numbers[self.names[i]]
+        self.names[i] = None
+        self.removed += 1
+
+    def previous(self, i):
+        """
+        Return the number of the last habit before habit number i that was not deleted, or None.
+        """
+        return next((k for k in range(i - 1, -1, -1) if self.names[k] is not None), None)
+
+    def next(self, i):
+        """
+        Return the number of the first habit after habit number i that was not deleted, or None.
+        """
+        return next((k for k in range(i + 1, len(self.names)) if self.names[k] is not None), None)
+
+    def shift(self, first, delta):
+        """
+        Move the start of habit number `first` and of all habits after it by delta characters.
+        """
+        positions = self.positions
+        for k in range(2 * first, len(positions), 2):
+            positions[k] += delta
+
 
 class HabitDatabase:
     # Class dedicated to handle all habit data storage applications like loading and saving habits to a JSON file.
     # Encapsulates the logic for reading and writing habit data to a file so main.py can focus on user interaction.
 
-    def __init__(self, filename):
+    concurrent_events = True   # log_event may run while save_habits runs in another thread (changes are handed over under a lock)
+    delta_limit = 1000         # records in the delta file after which the next save rewrites the whole file
+
+    def __init__(self, filename, fsync=False, index=False, delta=False):
         """
         Initialize with a given filename.
 
         Argument:
-            filename (str): Path to the JSON file used for storing habits.
+            filename (str): Path to the JSON file used for storing habits ('.jsonl' for JSON Lines, '.bin' for binary).
+            fsync (bool): Force every save to disk before returning (slower, survives power loss).
+            index (bool): Keep the name -> position index '<filename>.idx' for single-habit operations (JSON arrays only).
+            delta (bool): Track the changed habits so save_changes() can append only those to '<filename>.delta'.
         """
         self.filename = filename
+        self.jsonl = str(filename).endswith('.jsonl')
+        self.binary = str(filename).endswith('.bin')
+        self.fsync = fsync
+        self.index = index and not (self.jsonl or self.binary)
+        self.indexfile = f"{filename}.idx"
+        self._loaded_index = (None, None, None)     # (file size, file mtime, NameIndex) last read or written
+        self.delta = delta
+        self.deltafile = f"{filename}.delta"
+        self.changes = {}          # name -> (version, copy of the changed habit or None if removed) not saved yet, kept when delta=True
+        self._changes_lock = threading.Lock()      # log_event (main thread) and the saves (AutoSaver thread) both swap `changes`
+        self.delta_records = 0     # records in the delta file
+        self._delta_base = None    # [size, mtime] of the habits file the delta file belongs to
+        self.version = 0           # increased on every change reported through mark_dirty()
+        self.saved_version = 0     # version that was last written to disk
+        self.on_change = None      # optional callback run after every change (used by AutoSaver)
+
+    @property
+    def dirty(self):
+        """
+        True if changes were made since the last save.
+        """
+        return self.version != self.saved_version
+
+    def mark_dirty(self):
+        """
+        Remember that the habits changed and have to be saved.
+        """
+        self.version += 1
+        if self.on_change is not None:
+            self.on_change()
+
+    def save_if_dirty(self, habits, version=None):
+        """
+        Save the habits only if something changed since the last save.
+
+        Arguments:
+            habits (list): A list of habit dictionaries.
+            version (int): Value of `version` when the habits were copied (see save_habits).
+
+        Returns:
+            bool: True if the habits were saved.
+        """
+        if not self.dirty:
+            return False
+        self.save_habits(habits, version)
+        return True
+
+    def _sync(self, f):
+        # Push a written file to disk when fsync is enabled.
+        if self.fsync:
+            f.flush()
+            os.fsync(f.fileno())
 
     def load_habits(self):
         """
@@ -39,17 +290,981 @@ class HabitDatabase:
         Returns:
             list: A list of habit dictionaries.
         """
-        if not os.path.exists(self.filename):   # Check if the file exists
-            return []                           # If the file doesn’t exist yet (first run), return an empty list so the program doesn’t crash.
-        with open(self.filename, 'r') as f:     # Opens the file in read mode and loads the contents
-            return json.load(f)  # Load the habits from the JSON file and return them as a list of dictionaries.
+        with metrics.timed('database.load') as t:
+            if not os.path.exists(self.filename):   # Check if the file exists
+                return []                           # If the file doesn’t exist yet (first run), return an empty list so the program doesn’t crash.
+            if self.jsonl or self.binary:
+                return list(self.iter_habits())
+            with open(self.filename, 'r') as f:     # Opens the file in read mode and loads the contents
+                habits = json.load(f)  # Load the habits from the JSON file and return them as a list of dictionaries.
+                t.bytes = f.tell()
+            changes = self._read_delta()
+            return habits if changes is None else list(merge_changes(habits, changes))
+
+    @metrics.instrument('database.iter')
+    def iter_habits(self):
+        """
+        Yield the habits one at a time without loading the whole file.
+
+        Returns:
+            generator: Habit dictionaries, in file order.
+        """
+        if not os.path.exists(self.filename):
+            return
+        changes = self._read_delta()
+        if changes is not None:
+            yield from merge_changes(self._iter_file(), changes)
+        else:
+            yield from self._iter_file()
 
-    def save_habits(self, habits):
+    def _iter_file(self):
+        # Yield the habits stored in the file itself (without the delta file).
+        if self.binary:
+            with binary_store.BinaryHabitFile(self.filename) as f:
+                yield from f
+            return
+        with open(self.filename, 'r') as f:
+            if self.jsonl:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield from iter_json_array(f)
+
+    def save_habits(self, habits, version=None):
         """
         Save the habits to the JSON file [habits.JSON].
+        Habits are written one at a time, so any iterable works (e.g. iter_habits() of another database).
+        The data goes to a temporary file that replaces the old file only once it is complete.
+
+        Arguments:
+            habits (list): A list of habit dictionaries.
+            version (int): Value of `version` read before the habits were copied; only that version is marked saved,
+                           so a change made in another thread while the copy was made stays unsaved (default: now).
+        """
+        version = self.version if version is None else version
+        with self._changes_lock:                   # the changes the habits contain are in the new file; later ones stay pending
+            saved = {name: c for name, c in self.changes.items() if c[0] <= version}
+            self.changes = {name: c for name, c in self.changes.items() if c[0] > version}
+        index = NameIndex() if self.index else None
+
+        def write(f):
+            if self.binary:
+                binary_store.write_binary(f, habits)
+            elif self.jsonl:
+                for h in habits:
+                    f.write(json.dumps(h, separators=(',', ':')) + '\n')
+            else:
+                write_json_array(f, habits, index)     # serializes the habits into a properly formatted JSON string
+
+        with metrics.timed('database.save') as t:
+            try:
+                t.bytes = self._write_file(write, binary=self.binary)
+            except BaseException:
+                with self._changes_lock:
+                    self.changes = {**saved, **self.changes}      # keep them for the next attempt
+                raise
+            if index is not None:
+                self._save_index(index)
+            if os.path.exists(self.deltafile):
+                os.remove(self.deltafile)              # merged into the new file (a leftover would not match it anyway)
+            self._delta_base, self.delta_records = None, 0
+        self.saved_version = version
+
+    def _write_file(self, write, binary=False):
+        # Call write(f) on a temporary file, then rename it over the habits file. Returns the size written.
+        temp = f"{self.filename}.tmp"
+        try:
+            with open(temp, 'wb') if binary else open(temp, 'w', newline='' if self.index else None) as f:   # the index counts '\n' as one character
+                write(f)
+                self._sync(f)
+                size = f.tell()
+        except BaseException:
+            os.remove(temp)                     # the old file is still intact; drop the partial copy
+            raise
+        os.replace(temp, self.filename)         # atomic: readers see either the old or the new file, never half of one
+        if self.fsync and os.name == 'posix':   # make the rename itself durable
+            folder = os.open(os.path.dirname(os.path.abspath(self.filename)), os.O_RDONLY)
+            try:
+                os.fsync(folder)
+            finally:
+                os.close(folder)
+        return size
+
+    def log_event(self, op, habit):
+        """
+        Record a single change (add / checkoff / remove / reset of a broken streak) made to a habit.
+
+        - The plain JSON file is rewritten as a whole by save_habits, so the change is only marked as unsaved here
+          (with delta=True the habit is also remembered for save_changes).
+        - HabitLogDatabase overrides this to append the change to its log file.
+        """
+        if self.delta:
+            copy = None if op == 'remove' else habit.to_dict() if isinstance(habit, Habit) else dict(habit)   # the saver thread never reads a habit being changed
+            with self._changes_lock:
+                self.changes[habit['name']] = (self.version + 1, copy)        # the version mark_dirty() is about to set
+        self.mark_dirty()
+
+    # ----- differential saves (delta=True) -----
+
+    def save_changes(self):
+        """
+        Append the habits changed since the last save to the delta file, instead of rewriting every habit.
+
+        Returns:
+            bool: False if this is not possible and save_habits has to be used: delta is off, nothing changed,
+                  the habits file does not exist yet or the delta file is full (delta_limit).
+        """
+        if not self.delta or not self.dirty or self.delta_records >= self.delta_limit or not os.path.exists(self.filename):
+            return False
+        version = self.version
+        with self._changes_lock:
+            changes, self.changes = self.changes, {}   # changes logged from now on go to the next save
+        stat = os.stat(self.filename)
+        base = [stat.st_size, stat.st_mtime_ns]
+        fresh = self._delta_base != base or not os.path.exists(self.deltafile)
+        try:
+            with metrics.timed('database.save_changes') as t, open(self.deltafile, 'wb' if fresh else 'ab') as f:
+                if fresh:
+                    f.write(json.dumps({'base': base}).encode() + b'\n')      # the habits file this delta applies to
+                    self._delta_base, self.delta_records = base, 0
+                for name, (_, habit) in changes.items():
+                    record = {'name': name, 'habit': habit}
+                    f.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+                self._sync(f)
+                t.bytes = f.tell()
+        except BaseException:
+            with self._changes_lock:
+                self.changes = {**changes, **self.changes}     # keep them for the next attempt
+            raise
+        self.delta_records += len(changes)
+        self.saved_version = version
+        return True
+
+    def _read_delta(self):
+        """
+        Read the delta file.
+
+        Returns:
+            dict: name -> habit (None if removed), or None if there is no delta file for the current habits file.
+        """
+        if not os.path.exists(self.deltafile):
+            return None
+        stat = os.stat(self.filename)
+        changes, count = {}, 0
+        with open(self.deltafile, 'r') as f:
+            try:
+                base = json.loads(f.readline())['base']
+            except (ValueError, KeyError):
+                return None
+            if base != [stat.st_size, stat.st_mtime_ns]:
+                return None                         # left behind by a crash before it was merged: the file is newer
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:        # a torn last line left behind by a crash mid-append
+                    continue
+                changes.pop(record['name'], None)   # a removed and re-added habit goes to the end
+                changes[record['name']] = record['habit']
+                count += 1
+        self._delta_base, self.delta_records = base, count
+        return changes
+
+    # ----- name -> position index (index=True) -----
+
+    def _save_index(self, index):
+        # Write the whole index together with the size and modification time of the habits file it describes.
+        stat = os.stat(self.filename)
+        temp = f"{self.indexfile}.tmp"
+        with open(temp, 'w') as f:
+            f.write(json.dumps({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                'names': index.names, 'positions': index.positions}, separators=(',', ':')) + '\n')
+        os.replace(temp, self.indexfile)
+        index.journal = 0
+        self._loaded_index = (stat.st_size, stat.st_mtime_ns, index)
+
+    def _log_index(self, index, i):
+        # Append the new entry of habit number i (written in place) to the index file, with the new size and
+        # modification time of the habits file; the index file is only rewritten once INDEX_JOURNAL entries piled up.
+        if index.journal >= INDEX_JOURNAL:
+            self._save_index(index)
+            return
+        stat = os.stat(self.filename)
+        with open(self.indexfile, 'a') as f:
+            f.write(json.dumps([i, index.names[i], *index.span(i), stat.st_size, stat.st_mtime_ns]) + '\n')
+        index.journal += 1
+        self._loaded_index = (stat.st_size, stat.st_mtime_ns, index)
+
+    def _read_index(self):
+        # The saved index with its appended entries applied, and the (size, mtime) of the habits file it describes.
+        with open(self.indexfile, 'r') as f:
+            saved = json.loads(f.readline())
+            index = NameIndex(saved['names'], saved['positions'])
+            stamp = (saved['size'], saved['mtime_ns'])
+            for line in f:
+                try:
+                    i, name, start, length, size, mtime_ns = json.loads(line)
+                except ValueError:              # a torn last line: the stamp before it no longer matches the file
+                    break
+                if i == len(index.names):
+                    index.add(name, start, length)
+                elif name is None:
+                    index.remove(i)
+                else:
+                    index.set(i, start, length)
+                index.journal += 1
+                stamp = (size, mtime_ns)
+        return index, stamp
+
+    def _scan_index(self):
+        # Build the index by reading the habits file (which is not rewritten), or None if positions cannot be
+        # used for it (non-ASCII text, where characters and bytes differ).
+        with open(self.filename, 'r', newline='') as f:
+            text = f.read()
+        if not text.isascii():
+            return None
+        index, decoder, pos = NameIndex(), json.JSONDecoder(), text.index('[') + 1
+        while True:
+            while text[pos] in ' \t\r\n,':
+                pos += 1
+            if text[pos] == ']':
+                break
+            habit, end = decoder.raw_decode(text, pos)
+            index.add(habit['name'], pos, end - pos)
+            pos = end
+        self._save_index(index)
+        return index
+
+    def _name_index(self, fold=True):
+        """
+        Return the NameIndex of the habits file, or None when the index is not used.
+        An index that does not match the file (written by something else) is rebuilt by reading the file.
 
         Argument:
+            fold (bool): Merge a delta file into the habits file first (needed before the file is changed in place).
+        """
+        if not self.index or not os.path.exists(self.filename):
+            return None
+        if fold and self._read_delta() is not None:
+            self.save_habits(self.load_habits())      # merge the delta file first; writes a fresh index
+            return self._loaded_index[2]
+        stat = os.stat(self.filename)
+        if self._loaded_index[:2] == (stat.st_size, stat.st_mtime_ns):
+            return self._loaded_index[2]
+        try:
+            index, stamp = self._read_index()
+            if stamp == (stat.st_size, stat.st_mtime_ns):
+                self._loaded_index = (stat.st_size, stat.st_mtime_ns, index)
+                return index
+        except (OSError, ValueError, KeyError):
+            pass                                  # missing or damaged index
+        return self._scan_index()
+
+    def _write_at(self, start, text):
+        # Overwrite characters of the habits file in place, starting at `start`.
+        with open(self.filename, 'r+b') as f:
+            f.seek(start)
+            f.write(text.encode('ascii'))
+            self._sync(f)
+
+    def _splice(self, start, end, text):
+        # Replace characters start..end of the habits file with text, copying the rest as raw bytes.
+        with open(self.filename, 'rb') as f:
+            data = memoryview(f.read())
+
+        def write(f):
+            f.write(data[:start])
+            f.write(text.encode('ascii'))
+            f.write(data[end:])
+
+        self._write_file(write, binary=True)
+
+    # The targeted methods below are generic versions working on the whole file;
+    # with index=True they only parse and write the one habit involved.
+    # SQLiteHabitDatabase overrides them with indexed single-row queries.
+
+    @metrics.instrument('database.get_habit')
+    def get_habit(self, name):
+        """
+        Return the habit with the given name, or None if there is none.
+        """
+        index = self._name_index(fold=False)
+        if index is not None:
+            changes = self._read_delta()
+            if changes is not None and name in changes:
+                return changes[name]                  # changed since the last full save
+            i = index.find(name)
+            if i is None:
+                return None
+            start, length = index.span(i)
+            with open(self.filename, 'rb') as f:
+                f.seek(start)
+                return json.loads(f.read(length))     # the spaces after the habit are ignored
+        for h in self.load_habits():
+            if h['name'] == name:
+                return h
+        return None
+
+    @metrics.instrument('database.update_habit')
+    def update_habit(self, habit):
+        """
+        Replace the stored habit that has the same name (or add it if it is new).
+        """
+        index = self._name_index()
+        if index is not None:
+            text = habit_text(habit)
+            i = index.find(habit['name'])
+            if i is None:
+                self._append(index, habit['name'], text + ' ' * ROOM)
+                return
+            start, length = index.span(i)
+            if len(text) <= length:                                        # fits in its slot: overwrite it there
+                self._write_at(start, text.ljust(length))
+                self._log_index(index, i)
+                return
+            text += ' ' * max(ROOM, len(text) // 2)                        # outgrew it: move the rest of the file once
+            self._splice(start, start + length, text)
+            index.set(i, start, len(text))
+            index.shift(i + 1, len(text) - length)
+            self._save_index(index)
+            return
+        habits = self.load_habits()
+        for i, h in enumerate(habits):
+            if h['name'] == habit['name']:
+                habits[i] = habit
+                break
+        else:
+            habits.append(habit)
+        self.save_habits(habits)
+
+    def _append(self, index, name, text):
+        # Write a new habit slot after the last one, in place; only the closing ']' and what follows it move.
+        last = index.previous(len(index.names))
+        with open(self.filename, 'r+b') as f:
+            if last is not None:
+                at, prefix = sum(index.span(last)), SEPARATOR
+            else:
+                at, prefix = f.read().index(b'[') + 1, '\n    '
+            f.seek(at)
+            rest = f.read()
+            f.seek(at)
+            f.write(f"{prefix}{text}\n".encode('ascii') + rest[rest.index(b']'):])
+            f.truncate()
+            self._sync(f)
+        index.add(name, at + len(prefix), len(text))
+        self._log_index(index, len(index.names) - 1)
+
+    @metrics.instrument('database.delete_habit')
+    def delete_habit(self, name):
+        """
+        Delete the habit with the given name.
+
+        Returns:
+            bool: True if a habit was deleted.
+        """
+        index = self._name_index()
+        if index is not None:
+            i = index.find(name)
+            if i is None:
+                return False
+            start, length = index.span(i)
+            before, after = index.previous(i), index.next(i)
+            if before is not None:                                 # blank it and the separator before it
+                first, last = sum(index.span(before)), start + length
+            else:                                                  # first habit: blank it and the separator after it
+                first, last = start, index.span(after)[0] if after is not None else start + length
+            self._write_at(first, ' ' * (last - first))
+            index.remove(i)
+            self._log_index(index, i)
+            if index.removed > max(len(index), INDEX_JOURNAL):      # mostly blanks: write the file again without them
+                self.save_habits(self.load_habits())
+            return True
+        habits = self.load_habits()
+        kept = [h for h in habits if h['name'] != name]
+        self.save_habits(kept)
+        return len(kept) != len(habits)
+
+    def habits_by_periodicity(self, freq):
+        """
+        Return the stored habits with the given periodicity ('daily' or 'weekly').
+        """
+        return [h for h in self.load_habits() if h['periodicity'] == freq]
+
+
+def merge_changes(habits, changes):
+    """
+    Yield the habits with the changes of a delta file applied: changed habits replace the stored ones
+    in place, removed ones are skipped and new ones follow at the end.
+
+    Arguments:
+        habits (iterable): Habit dictionaries as stored.
+        changes (dict): name -> habit dictionary, or None for a removed habit.
+    """
+    changes = dict(changes)
+    for h in habits:
+        if h['name'] in changes:
+            h = changes.pop(h['name'])
+            if h is None:
+                continue
+        yield h
+    yield from (h for h in changes.values() if h is not None)
+
+
+def apply_event(index, event):
+    """
+    Apply one logged event to a {name: habit} dictionary.
+
+    - Replaying is idempotent: applying an event that is already part of the snapshot leaves the habit unchanged.
+    - Check-offs carry the whole habit (history and longest streak included), so a backfilled day is kept.
+      Logs written before that only have the date and streak: the date is inserted into 'completions' in order.
+
+    Arguments:
+        index (dict): Habits keyed by name, updated in place.
+        event (dict): One record read from the log file.
+    """
+    op, name = event['op'], event['name']
+    if op in ('add', 'update'):
+        index[name] = dict(event['habit'])
+    elif op == 'remove':
+        index.pop(name, None)
+    elif op == 'reset' and name in index:
+        index[name]['streak'] = 0
+    elif op == 'checkoff' and 'habit' in event:
+        index[name] = dict(event['habit'])
+    elif op == 'checkoff' and name in index:
+        h = index[name]
+        completions = h.setdefault('completions', [])
+        i = bisect_left(completions, event['date'])
+        if i == len(completions) or completions[i] != event['date']:    # skip dates already replayed into the snapshot
+            completions.insert(i, event['date'])
+        h['last_completed'] = completions[-1]
+        h['streak'] = event['streak']
+        h['longest_streak'] = max(h.get('longest_streak', 0), event['streak'])
+
+
+class HabitLogDatabase(HabitDatabase):
+    """
+    Append-only storage mode.
+
+    - Each add, check-off and delete is appended as one compact JSON line to '<filename>.log',
+      so a change only writes the habit involved instead of rewriting every habit.
+    - The normal habits.json file acts as the snapshot; load_habits reads it and replays the log on top.
+    - save_habits only compacts (writes a new snapshot and drops the events it contains from the log)
+      once `compact_every` events piled up.
+    """
+
+    concurrent_events = True    # events logged during a compaction stay in the log (see compact)
+
+    def __init__(self, filename, compact_every=1000, fsync=False):
+        """
+        Argument:
+            filename (str): Path to the JSON snapshot file. The log lives next to it.
+            compact_every (int): Number of logged events after which save_habits writes a new snapshot.
+            fsync (bool): Force every logged event and snapshot to disk.
+        """
+        super().__init__(filename, fsync)
+        self.logfile = f"{filename}.log"
+        self.compact_every = compact_every
+        self.pending = 0         # events written to the log since the last snapshot
+        self._marks = [(0, os.path.getsize(self.logfile))] if os.path.exists(self.logfile) else []   # (version, log size after the event)
+        self._log_lock = threading.Lock()     # log_event and compact (AutoSaver thread) both change the log
+
+    @metrics.instrument('log.load')
+    def load_habits(self):
+        """
+        Load the snapshot and replay the log on top of it.
+
+        Returns:
+            list: A list of habit dictionaries.
+        """
+        index = {h['name']: h for h in super().load_habits()}
+        self.pending = 0
+        if os.path.exists(self.logfile):
+            with open(self.logfile, 'r') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:      # a torn last line left behind by a crash mid-append
+                        break
+                    apply_event(index, event)
+                    self.pending += 1
+        return list(index.values())
+
+    def iter_habits(self):
+        """
+        Yield the habits one at a time. The log has to be replayed first, so this is not streamed.
+        """
+        return iter(self.load_habits())
+
+    @metrics.instrument('log.log_event')
+    def log_event(self, op, habit):
+        """
+        Append one event to the log file.
+
+        Arguments:
+            op (str): 'add', 'update', 'checkoff', 'reset' (broken streak set to 0) or 'remove'.
+            habit (dict): The habit after the change was applied.
+        """
+        event = {'op': op, 'name': habit['name']}
+        if op in ('add', 'update', 'checkoff'):       # a check-off may be backfilled: the whole history is logged
+            event['habit'] = habit.to_dict() if isinstance(habit, Habit) else habit
+        with self._log_lock:
+            with open(self.logfile, 'a') as f:
+                f.write(json.dumps(event, separators=(',', ':')) + '\n')      # compact: one event per line
+                self._sync(f)
+                self._marks.append((self.version + 1, f.tell()))    # the version mark_dirty() is about to set
+            self.pending += 1
+        self.mark_dirty()
+
+    @metrics.instrument('log.save')
+    def save_habits(self, habits, version=None):
+        """
+        Compact the log into a new snapshot once enough events have piled up.
+        Every change is already on disk in the log, so nothing is lost when this skips.
+
+        Arguments:
+            habits (list): A list of habit dictionaries.
+            version (int): Ignored: every logged change is saved, whatever the habits contain.
+        """
+        version = self.version if version is None else version
+        saved = self.version                      # the log already holds every change
+        if self.pending >= self.compact_every:
+            self.compact(habits, version)
+        self.saved_version = saved
+
+    @metrics.instrument('log.compact')
+    def compact(self, habits, version=None):
+        """
+        Write the habits as a new snapshot and drop the events it contains from the log.
+        Events logged after `version` (e.g. by the main thread while AutoSaver copied the habits) are kept:
+        the rest of the log is copied to a new log file that replaces the old one.
+
+        Arguments:
             habits (list): A list of habit dictionaries.
+            version (int): Value of `version` read before the habits were copied (default: now).
+        """
+        version = self.version if version is None else version
+        super().save_habits(habits, version)      # snapshot written first, so a crash here only causes a harmless replay
+        with self._log_lock:
+            covered = [size for v, size in self._marks if v <= version]
+            start = covered[-1] if covered else 0
+            kept = [(v, size - start) for v, size in self._marks if v > version]
+            with open(self.logfile, 'rb') as f:
+                f.seek(start)
+                rest = f.read()
+            temp = f"{self.logfile}.tmp"
+            with open(temp, 'wb') as f:
+                f.write(rest)
+                self._sync(f)
+            os.replace(temp, self.logfile)
+            self._marks, self.pending = kept, len(kept)
+
+    @metrics.instrument('log.update_habit')
+    def update_habit(self, habit):
+        """
+        Log a full replacement of one habit.
+        """
+        self.log_event('update', habit)
+
+    @metrics.instrument('log.delete_habit')
+    def delete_habit(self, name):
+        """
+        Log the deletion of one habit.
+
+        Returns:
+            bool: True if the habit existed.
+        """
+        found = self.get_habit(name) is not None
+        if found:
+            self.log_event('remove', {'name': name})
+        return found
+
+
+class SQLiteHabitDatabase(HabitDatabase):
+    """
+    Storage backend using an SQLite database file.
+
+    - Habits live in one table with a unique index on name and an index on periodicity,
+      so get/update/delete/filter touch only the rows they need.
+    - WAL journaling lets readers keep going while a write is in progress.
+    - Every write runs in its own transaction, so a crash never leaves a half-written habit.
+    - Changes reported through log_event are saved by save_changes as single-row updates and deletes,
+      so AutoSaver does not rewrite the whole table after a few check-offs.
+    - Keys other than the six standard habit fields are kept as JSON in the 'extra' column.
+    """
+
+    COLUMNS = ('name', 'description', 'periodicity', 'date_created', 'last_completed', 'streak')
+    UPSERT = ("INSERT INTO habits (name, description, periodicity, date_created, last_completed, streak, extra) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?) "
+              "ON CONFLICT (name) DO UPDATE SET description = excluded.description, "
+              "periodicity = excluded.periodicity, date_created = excluded.date_created, "
+              "last_completed = excluded.last_completed, streak = excluded.streak, extra = excluded.extra")
+
+    def __init__(self, filename, fsync=False):
         """
-        with open(self.filename, 'w') as f:    
-            json.dump(habits, f, indent=4)     # serializes the list of dictionaries into a properly formatted JSON string
+        Argument:
+            filename (str): Path to the SQLite database file (created if missing).
+            fsync (bool): Sync every transaction to disk (synchronous=FULL).
+        """
+        super().__init__(filename, fsync)
+        self.delta = True          # track the changed habits: save_changes writes only their rows (no delta file)
+        self.conn = sqlite3.connect(filename, check_same_thread=False)     # AutoSaver may save from its own thread
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")   # NORMAL is safe with WAL and avoids an fsync per transaction
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS habits ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "         # keeps habits in insertion order
+                "name TEXT NOT NULL UNIQUE, description TEXT, periodicity TEXT, "
+                "date_created TEXT, last_completed TEXT, streak INTEGER NOT NULL DEFAULT 0, extra TEXT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS habits_periodicity ON habits (periodicity)")
+
+    def _row(self, habit):
+        # Split a habit dictionary into the column values plus the JSON-encoded extra keys.
+        extra = {k: v for k, v in habit.items() if k not in self.COLUMNS}
+        return tuple(habit.get(c) for c in self.COLUMNS) + (json.dumps(extra) if extra else None,)
+
+    def _habit(self, row):
+        # Turn a table row back into a habit dictionary.
+        habit = {c: row[c] for c in self.COLUMNS}
+        if row['extra']:
+            habit.update(json.loads(row['extra']))
+        return habit
+
+    @metrics.instrument('sqlite.load')
+    def load_habits(self):
+        """
+        Load all habits from the table.
+
+        Returns:
+            list: A list of habit dictionaries.
+        """
+        return list(self.iter_habits())
+
+    @metrics.instrument('sqlite.iter')
+    def iter_habits(self):
+        """
+        Yield the habits one at a time straight from the query cursor.
+        """
+        for row in self.conn.execute("SELECT * FROM habits ORDER BY id"):
+            yield self._habit(row)
+
+    @metrics.instrument('sqlite.save')
+    def save_habits(self, habits, version=None):
+        """
+        Replace the table contents with the given habits in one transaction.
+
+        Arguments:
+            habits (list): A list of habit dictionaries.
+            version (int): Value of `version` when the habits were copied (see HabitDatabase.save_habits).
+        """
+        version = self.version if version is None else version
+        with self._changes_lock:                   # the changes the habits contain are written now; later ones stay pending
+            saved = {name: c for name, c in self.changes.items() if c[0] <= version}
+            self.changes = {name: c for name, c in self.changes.items() if c[0] > version}
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM habits")
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO habits (name, description, periodicity, date_created, last_completed, streak, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self._row(h) for h in habits),
+                )
+        except BaseException:
+            with self._changes_lock:
+                self.changes = {**saved, **self.changes}      # keep them for the next attempt
+            raise
+        self.saved_version = version
+
+    @metrics.instrument('sqlite.save_changes')
+    def save_changes(self):
+        """
+        Write only the habits changed since the last save, one row each, in one transaction.
+
+        Returns:
+            bool: False if no changed habits were recorded (save_habits has to be used).
+        """
+        version = self.version
+        with self._changes_lock:
+            changes, self.changes = self.changes, {}   # changes logged from now on go to the next save
+        if not changes:
+            return False
+        try:
+            with self.conn:
+                for name, (_, habit) in changes.items():
+                    if habit is None:
+                        self.conn.execute("DELETE FROM habits WHERE name = ?", (name,))
+                    else:
+                        self.conn.execute(self.UPSERT, self._row(habit))
+        except BaseException:
+            with self._changes_lock:
+                self.changes = {**changes, **self.changes}     # keep them for the next attempt
+            raise
+        self.saved_version = version
+        return True
+
+    @metrics.instrument('sqlite.get_habit')
+    def get_habit(self, name):
+        """
+        Return the habit with the given name, or None if there is none.
+        """
+        row = self.conn.execute("SELECT * FROM habits WHERE name = ?", (name,)).fetchone()
+        return self._habit(row) if row else None
+
+    @metrics.instrument('sqlite.update_habit')
+    def update_habit(self, habit):
+        """
+        Update one habit (or insert it if it is new) in a single transaction.
+        """
+        with self.conn:
+            self.conn.execute(self.UPSERT, self._row(habit))
+
+    @metrics.instrument('sqlite.delete_habit')
+    def delete_habit(self, name):
+        """
+        Delete the habit with the given name.
+
+        Returns:
+            bool: True if a habit was deleted.
+        """
+        with self.conn:
+            return self.conn.execute("DELETE FROM habits WHERE name = ?", (name,)).rowcount > 0
+
+    def habits_by_periodicity(self, freq):
+        """
+        Return the habits with the given periodicity, using the periodicity index.
+        """
+        rows = self.conn.execute("SELECT * FROM habits WHERE periodicity = ? ORDER BY id", (freq,))
+        return [self._habit(r) for r in rows]
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        self.conn.close()
+
+
+class SharedHabitDatabase(HabitDatabase):
+    """
+    JSON storage that many processes can use at the same time.
+
+    - Every habit carries a 'version' number that goes up each time a process saves a change to it.
+    - Changes reported through log_event are remembered; on save the file is locked, re-read and merged:
+        * habits this process did not touch are taken from the file (other processes' changes win),
+        * a changed habit whose version on disk is still the one loaded is simply replaced,
+        * a changed habit that another process changed in the meantime gets both completion histories combined,
+        * habits added by other processes are kept, habits removed here are dropped,
+        * unchanged habits that another process removed stay removed.
+    - Locks are fcntl advisory locks on '<filename>.lock'; on systems without fcntl no lock is taken.
+    """
+
+    concurrent_events = True    # the record of changed habits is handed over under a lock, like `changes`
+
+    def __init__(self, filename, fsync=False):
+        """
+        Argument:
+            filename (str): Path to the shared JSON file.
+            fsync (bool): Force every save to disk.
+        """
+        super().__init__(filename, fsync)
+        self.lockfile = f"{filename}.lock"
+        self.base = {}          # name -> version of every habit when it was loaded
+        self.changed = {}       # name -> (version, 'update' or 'remove'), changes not saved yet
+
+    @contextmanager
+    def locked(self):
+        """
+        Hold the exclusive lock on the habits file for the duration of a with-block.
+        """
+        with open(self.lockfile, 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)         # blocks until no other process holds the lock
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    @metrics.instrument('shared.load')
+    def load_habits(self):
+        """
+        Load the habits and remember the version of each one.
+
+        Returns:
+            list: A list of habit dictionaries.
+        """
+        habits = super().load_habits()
+        self.base = {h['name']: h.get('version', 0) for h in habits}
+        self.changed = {}
+        return habits
+
+    def log_event(self, op, habit):
+        """
+        Remember which habit changed, so save_habits knows what to merge.
+        """
+        with self._changes_lock:
+            self.changed[habit['name']] = (self.version + 1, 'remove' if op == 'remove' else 'update')
+        self.mark_dirty()
+
+    @metrics.instrument('shared.save')
+    def save_habits(self, habits, version=None):
+        """
+        Merge this process's changes into the file (see merge_save).
+
+        Arguments:
+            habits (list): A list of habit dictionaries.
+            version (int): Value of `version` when the habits were copied (see HabitDatabase.save_habits).
+        """
+        self.merge_save(habits, version)
+
+    @metrics.instrument('shared.merge_save')
+    def merge_save(self, habits, version=None):
+        """
+        Lock the file, re-read it, merge the changed habits into it and write the result.
+
+        Arguments:
+            habits (iterable): This process's habit dictionaries.
+            version (int): Value of `version` when the habits were copied (see HabitDatabase.save_habits).
+
+        Returns:
+            list: The merged habits now on disk.
+        """
+        version = self.version if version is None else version
+        local = {h['name']: h for h in habits}
+        with self._changes_lock:
+            changed = {name: op for name, (_, op) in self.changed.items()}
+        with self.locked():
+            merged = []
+            for theirs in HabitDatabase.load_habits(self):
+                name = theirs['name']
+                op = changed.get(name)
+                if op == 'remove':
+                    continue
+                mine = local.pop(name, None)
+                merged.append(self._merge(mine, theirs) if op == 'update' and mine is not None else theirs)
+            for name, mine in local.items():            # new habits, and habits changed here that another process removed
+                if changed.get(name) == 'update' or name not in self.base:
+                    merged.append(dict(mine, version=self.base.get(name, 0) + 1))
+            HabitDatabase.save_habits(self, merged)
+        self.base = {h['name']: h.get('version', 0) for h in merged}
+        with self._changes_lock:                   # changes logged after the habits were copied are merged next time
+            self.changed = {name: c for name, c in self.changed.items() if c[0] > version}
+        self.saved_version = version
+        return merged
+
+    def _merge(self, mine, theirs):
+        # Combine one habit changed here with its current state on disk.
+        disk_version = theirs.get('version', 0)
+        if disk_version == self.base.get(mine['name']):
+            return dict(mine, version=disk_version + 1)       # nobody else changed it
+        habit = Habit.from_dict(theirs)
+        for day in mine.get('completions', []):              # add our check-offs to theirs (out-of-order safe)
+            habit.check_off(datetime.date.fromisoformat(day))
+        return dict(habit.to_dict(), version=disk_version + 1)
+
+
+class AutoSaver:
+    """
+    Saves a database in a background thread so a killed session loses at most a few changes.
+
+    - A save happens once `every` changes piled up, and/or every `interval` seconds if anything changed.
+    - Nothing is written while the data is unchanged.
+    """
+
+    def __init__(self, db, get_habits, every=None, interval=None):
+        """
+        Arguments:
+            db (HabitDatabase): The database to save; changes are reported through db.mark_dirty().
+            get_habits (callable): Returns the habit dictionaries to save.
+            every (int): Save after this many changes (None to disable).
+            interval (float): Save this many seconds after the last save if anything changed (None to disable).
+        """
+        self.db = db
+        self.get_habits = get_habits
+        self.every = every
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopping = False
+        self._lock = threading.Lock()            # one save at a time
+        self._thread = None
+
+    def start(self):
+        """
+        Start the background thread.
+        """
+        self.db.on_change = self._changed
+        self._thread = threading.Thread(target=self._run, name="habit-autosave", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and save any remaining changes.
+        """
+        self.db.on_change = None
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def flush(self):
+        """
+        Save now if anything changed, until nothing is left unsaved.
+
+        Returns:
+            bool: True if the habits were saved.
+        """
+        with self._lock:
+            saved = False
+            while self.db.dirty:                    # a change made during a save is saved by the next round
+                if not self.db.save_changes():      # only the changed habits, when the database tracks them (delta=True)
+                    version = self.db.version       # read before the copy: a change made while it is built stays unsaved
+                    self.db.save_if_dirty(self.get_habits(), version)
+                saved = True
+            return saved
+
+    def _changed(self):
+        # Called by the database after every change.
+        if self.every and self.db.version - self.db.saved_version >= self.every:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopping:
+                self.flush()
+
+
+# Storage modes that can be chosen when opening the database.
+BACKENDS = {
+    'json': HabitDatabase,
+    'log': HabitLogDatabase,
+    'sqlite': SQLiteHabitDatabase,
+    'shared': SharedHabitDatabase,
+}
+
+
+def open_database(filename, backend='json', index=False, delta=False, **options):
+    """
+    Create the database object for the chosen storage mode.
+
+    Arguments:
+        filename (str): Path to the habits file.
+        backend (str): One of the keys of BACKENDS ('json', 'log', 'sqlite' or 'shared').
+        index (bool): Keep a name -> position index next to the file ('json' only, ignored by the other modes).
+        delta (bool): Save changes to a delta file when possible ('json' only, ignored by the other modes).
+        options: Extra keyword arguments passed to the backend class.
+
+    Returns:
+        HabitDatabase: The storage object.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    if index and backend == 'json':
+        options['index'] = True
+    if delta and backend == 'json':
+        options['delta'] = True
+    return BACKENDS[backend](filename, **options)
@@ -11,48 +11,330 @@ HABIT MODULE
 - Each habit includes a name, description, periodicity (daily/weekly),
   date created, last completed date, and a streak count.
 
+- Habit objects are the runtime representation used by main.py and analytics.py;
+  they are converted to dictionaries only for saving (to_dict / from_dict).
+
+- Periodicities are calendar periods (days, ISO weeks, months, blocks of N days). A period function maps
+  each day number to a period number once, so streak checks are plain integer comparisons.
+  New periodicities can be added with register_period().
+
+- Every habit keeps its full completion history (sorted day numbers), and the current streak,
+  longest-ever streak and number of completions are updated on each check-off instead of being recomputed.
+
 """
 
 import datetime #Required for capturing when a habit is created or completed
+from array import array   # compact storage for the completion history (8 bytes per day)
+from bisect import bisect_left, insort
+from collections import namedtuple
+import re
+
+# A periodicity is described by two functions:
+#   index(day) -> number of the period that contains the day (day numbers as from date.toordinal())
+#   start(number) -> first day of that period
+# A streak continues while every period has at least one check-off, i.e. while the period
+# numbers of two check-offs in a row differ by at most 1.
+Period = namedtuple('Period', 'index start')
+
+
+def _month_index(day):
+    d = datetime.date.fromordinal(day)
+    return d.year * 12 + d.month - 1
+
+
+def _month_start(number):
+    return datetime.date(number // 12, number % 12 + 1, 1).toordinal()
+
+
+PERIODS = {
+    'daily': Period(lambda day: day, lambda number: number),
+    'weekly': Period(lambda day: (day - 1) // 7, lambda number: number * 7 + 1),   # ISO weeks: day 1 (0001-01-01) is a Monday
+    'monthly': Period(_month_index, _month_start),
+}
+
+EVERY_N_DAYS = re.compile(r'every-(\d+)-days')     # e.g. 'every-3-days'
+
+
+def register_period(name, index, start):
+    """
+    Add a new periodicity.
+
+    Arguments:
+        name (str): Name used as the habit's periodicity.
+        index (callable): Maps a day number to its period number.
+        start (callable): Maps a period number to the day number of its first day.
+    """
+    PERIODS[name] = Period(index, start)
+
+
+def period_for(periodicity):
+    """
+    Return the Period for a periodicity name, or None if the name is unknown.
+    'every-N-days' periods are created on first use; the blocks of N days are counted from day 1.
+    """
+    period = PERIODS.get(periodicity)
+    if period is None and periodicity:
+        match = EVERY_N_DAYS.fullmatch(periodicity)
+        if match and int(match.group(1)) > 0:
+            n = int(match.group(1))
+            period = PERIODS[periodicity] = Period(lambda day: (day - 1) // n, lambda number: number * n + 1)
+    return period
+
+
+def break_day(period, last):
+    """
+    First day on which a streak last checked off on day `last` counts as broken.
+
+    Arguments:
+        period (Period): The habit's period, as returned by period_for().
+        last (int): Day number of the last check-off.
+
+    Returns:
+        int: A day number, or None if the habit was never checked off or its periodicity is unknown (never breaks).
+    """
+    if last is None or period is None:
+        return None
+    return period.start(period.index(last) + 2)        # the whole next period passed without a check-off
+
 
 class Habit:
     """
     - Class representing a habit with attributes and utility methods.
     - A blueprint for each habit to be created.
     - This class will hold all the data and logic related to a single habit.   
-    
+    - Habit objects are what the app works with at runtime. Dates are kept as day numbers
+      (date.toordinal()), so they are parsed once when loading instead of on every streak check.
+    - __slots__ keeps every habit small when many of them are loaded at once.
+    - habit['name'] style access still works, so code written for habit dictionaries can use Habit objects too.
     """
 
-    def __init__(self, name, description, periodicity):
+    __slots__ = ('name', 'description', '_periodicity', 'period', 'created', 'last', 'streak', 'completions', 'longest', 'extra')
+
+    FIELDS = ('name', 'description', 'periodicity', 'date_created', 'last_completed', 'streak', 'longest_streak')  # keys usable as habit['key']
+
+    def __init__(self, name, description, periodicity, created=None, last=None, streak=0):
         """
         Initialize a new Habit object.
 
         Argument: Parameters used with their datatype
             name (str): Name of the habit.
             description (str): Description of the habit.
-            periodicity (str): Frequency of the habit ('daily' or 'weekly').
-            date_created : stores the date
-            last_completed : stores the latest date when a habit is checked off 
+            periodicity (str): Frequency of the habit ('daily', 'weekly', 'monthly', 'every-N-days').
+            created (int): Day number of the creation date, defaults to today.
+            last (int): Day number of the latest check-off, None if never checked off.
+            streak (int): Current streak count.
         """
         self.name = name
         self.description = description
         self.periodicity = periodicity
-        self.date_created = datetime.date.today().strftime("%Y-%m-%d") # Automatically sets the creation date when the habit is made.
-        #                                                                strftime formats the date as a string like "2025-05-28".
-        self.last_completed = None # starts as none because habit hasn't been checked-off yet
-        self.streak = 0  #starts at 0 and gradually increases as habit is checked-off
+        self.created = datetime.date.today().toordinal() if created is None else created # Automatically sets the creation date when the habit is made.
+        self.last = last # starts as none because habit hasn't been checked-off yet
+        self.streak = streak  #starts at 0 and gradually increases as habit is checked-off
+        self.completions = array('l', () if last is None else (last,))  # sorted day numbers of every check-off
+        self.longest = streak  # longest streak ever reached
+        self.extra = None  # any other keys found in the stored dictionary, kept so saving loses nothing
+
+    @property
+    def periodicity(self):
+        return self._periodicity
+
+    @periodicity.setter
+    def periodicity(self, value):
+        self._periodicity = value
+        self.period = period_for(value)      # looked up once, not on every check
+
+    # date_created / last_completed give the dates as "2025-05-28" strings, like the stored dictionaries.
+
+    @property
+    def date_created(self):
+        return to_text(self.created)
+
+    @date_created.setter
+    def date_created(self, value):
+        self.created = to_ordinal(value)
+
+    @property
+    def last_completed(self):
+        return to_text(self.last)
+
+    @last_completed.setter
+    def last_completed(self, value):
+        self.last = to_ordinal(value)
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            if self.extra and key in self.extra:
+                return self.extra[key]
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"Habit({self.name!r}, {self.periodicity!r}, last_completed={self.last_completed!r}, streak={self.streak})"
+
+    @property
+    def longest_streak(self):
+        return self.longest
+
+    @longest_streak.setter
+    def longest_streak(self, value):
+        self.longest = value
+
+    @property
+    def total_completions(self):
+        return len(self.completions)
+
+    @property
+    def breaks_on(self):
+        """
+        Day number on which the current streak counts as broken (None if it cannot break).
+        """
+        return break_day(self.period, self.last)
+
+    def _advance(self, streak, previous, day):
+        # Streak after a check-off on `day` when the one before was on `previous`.
+        if self.period is None:
+            return streak + 1                           # unknown periodicity: never breaks
+        gap = self.period.index(day) - self.period.index(previous)
+        if gap == 0:
+            return max(streak, 1)                       # same period: already counted
+        return streak + 1 if gap == 1 else 1            # next period continues the streak, a skipped period restarts it
+
+    def check_off(self, day=None):
+        """
+        Mark the habit as completed and update the streak based on periodicity.
+
+        - A check-off after the latest one (the usual case) updates the streaks in O(1).
+        - A backfilled (earlier) check-off is inserted into the history and the streaks are recounted.
+        - Checking off a day that is already recorded changes nothing.
+
+        Argument:
+            day (datetime.date): Day of the check-off, defaults to today.
+
+        Returns:
+            bool: False if the day was already recorded.
+        """
+        today = (day or datetime.date.today()).toordinal()
+        c = self.completions
+        if not c or today > c[-1]:
+            streak = self.streak
+            if not streak and c and self.period is not None:
+                streak = self._history_run()        # reset by an expiry: the history may still be unbroken (a gap filled late)
+            # Reset streak if a whole period (day, week, ...) was missed
+            self.streak = self._advance(streak, c[-1], today) if c else 1
+            c.append(today)
+            self.last = today
+            self.longest = max(self.longest, self.streak)
+            return True
+        i = bisect_left(c, today)
+        if c[i] == today:
+            return False
+        insort(c, today)
+        self._recount()
+        return True
+
+    def _history_run(self):
+        # Periods in the unbroken run of check-offs that ends with the latest one, counted from the history alone.
+        c, index = self.completions, self.period.index
+        run, k = 1, len(c) - 1
+        while k:
+            gap = index(c[k]) - index(c[k - 1])
+            if gap > 1:
+                break
+            run, k = run + gap, k - 1
+        return run
+
+    def _recount(self):
+        # Recount the streaks after a backfilled check-off (the latest check-off stays the latest).
+        # The stored streak is kept for the run ending at the latest check-off: it may count check-offs made before
+        # the history was kept (older habits). A streak reset to 0 only comes back if the history's run
+        # has not expired by today (the reset came from a gap the history no longer has).
+        # The backfilled day can only lengthen it by filling the period just before that run.
+        c = self.completions
+        run = 0
+        for i, day in enumerate(c):
+            run = self._advance(run, c[i - 1], day) if i else 1
+            self.longest = max(self.longest, run)
+        if self.period is None:
+            self.streak += 1                            # unknown periodicity: never breaks
+        elif not self.streak:
+            if break_day(self.period, self.last) > datetime.date.today().toordinal():
+                self.streak = self._history_run()
+        else:
+            index = self.period.index
+            done = {index(day) for day in c}
+            first = index(self.last) - self.streak + 1   # first period of the stored streak
+            while first - 1 in done:
+                first -= 1
+            self.streak = index(self.last) - first + 1
+        self.longest = max(self.longest, self.streak)
 
     def to_dict(self):
         #Returns the habit attributes.
         #converts the object into dictionary
         # For saving data to JSON file or displaying it
-        return {
+        d = {
             'name': self.name,
             'description': self.description,
             'periodicity': self.periodicity,
             'date_created': self.date_created,
             'last_completed': self.last_completed,
-            'streak': self.streak
+            'streak': self.streak,
+            'longest_streak': self.longest,
+            'completions': [to_text(day) for day in self.completions],
         }
-    
-    # Now that a habit is created, the next logical step is to save it into a file and retrieve it later. So I will start building database.py next.
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Create a Habit from a stored habit dictionary (the opposite of to_dict).
+        Dates are parsed here, once.
+
+        Argument:
+            d (dict): A habit dictionary as loaded by HabitDatabase.
+        """
+        habit = cls(d['name'], d['description'], d['periodicity'],
+                    to_ordinal(d.get('date_created')), to_ordinal(d.get('last_completed')), d.get('streak', 0))
+        if d.get('completions'):
+            days = {to_ordinal(day) for day in d['completions']}
+            days.update(habit.completions)                    # make sure last_completed is part of the history
+            habit.completions = array('l', sorted(days))
+            habit.last = habit.completions[-1]
+        habit.longest = max(d.get('longest_streak', 0), habit.streak)
+        extra = {k: v for k, v in d.items() if k not in cls.FIELDS + ('completions',)}
+        if extra:
+            habit.extra = extra
+        return habit
+
+
+def to_ordinal(text):
+    """
+    Convert a "2025-05-28" date string into a day number (None stays None).
+    """
+    return datetime.date.fromisoformat(text).toordinal() if text else None
+
+
+def to_text(ordinal):
+    """
+    Convert a day number back into a "2025-05-28" date string (None stays None).
+    """
+    return datetime.date.fromordinal(ordinal).isoformat() if ordinal is not None else None
+
+
+# Now that a habit is created, the next logical step is to save it into a file and retrieve it later. So I will start building database.py next.
@@ -10,14 +10,49 @@ Habit data is stored and retrieved from a JSON file using the HabitDatabase clas
 Module files:
 - habit: Has the Habit class for creating habit objects.
 - database: Oversees the loading and saving of habits to a JSON file.
+  Set the HABIT_STORAGE environment variable to 'log' (append-only log), 'shared' (several processes, merged saves)
+  or 'sqlite' (habits.db) to change the storage mode.
 - analytics: Provides analytics functions for evaluating habit performance.
+- registry: HabitRegistry keeps the loaded habits indexed by name and periodicity.
+- analytics_cache: AnalyticsCache keeps the analysis results up to date as habits change.
+- scheduler: ExpiryScheduler resets broken streaks when the day they break comes, instead of on every read.
+- reports: Completion rates, weekday heatmap, rankings and trends, computed in one pass.
+- search: HabitSearch completes habit names from a prefix (Tab key, where readline is available) and
+  suggests close names when a typed name is not found.
+- metrics: Counts and times the menu actions, loads, saves and analytics. Set HABIT_METRICS to a file name
+  to write them there on exit (.prom for Prometheus text, JSON otherwise), and HABIT_PROFILE to a file name
+  to save a cProfile of the session.
+- cli: Non-interactive commands (python main.py add/checkoff/remove/report/batch/import/export ...).
+
+Changes are saved in the background every AUTOSAVE_EVERY changes or AUTOSAVE_SECONDS seconds, and on exit.
+With the default storage only the changed habits are written (habits.json.delta, merged when loading);
+with sqlite only their rows are updated.
+The habits are read in the background while the menu is shown, so the menu appears right away.
 """
 
-import datetime
-from habit import Habit
-from database import HabitDatabase
-import analytics
-from colorama import Fore            # Used for colored terminal output to enhance user experience.
+import os
+import sys
+
+# With arguments (e.g. "python main.py checkoff read") the non-interactive command line in cli.py is used instead.
+# This is done before the interactive modules below are imported, so scripted calls start faster.
+if __name__ == '__main__' and len(sys.argv) > 1:
+    import cli
+    sys.exit(cli.main(sys.argv[1:]))
+
+from concurrent.futures import ThreadPoolExecutor
+from database import open_database, AutoSaver
+import metrics
+from colorama import Fore            # Used for colored terminal output to enhance user experience (needed for the first menu).
+# The other modules (habit, registry, analytics, reports ...) are imported where they are used: the loader thread
+# imports most of them while the menu is already on screen.
+try:
+    import readline                  # Tab completion of habit names (not available on every platform)
+except ImportError:
+    readline = None
+
+AUTOSAVE_EVERY = 10          # save after this many changes ...
+AUTOSAVE_SECONDS = 60        # ... or this many seconds after a change, whichever comes first
+SUGGESTIONS = 5              # close names shown when a habit is not found
 
 #------------------------------------------- TO DISPLAY CREATED HABIT ---------------------------------------
 
@@ -29,11 +64,13 @@ def s(h):
     print(f"\t\t\t\t\t\t\t\tperiodicity: {h['periodicity']}")
     print(f"\t\t\t\t\t\t\t\tdate created: {h['date_created']}")
     print(f"\t\t\t\t\t\t\t\tlast completed: {h.get('last_completed', 'N/A')}")
-    print(f"\t\t\t\t\t\t\t\tstreak: {h['streak']}\n")
+    print(f"\t\t\t\t\t\t\t\tstreak: {h['streak']}")
+    print(f"\t\t\t\t\t\t\t\tlongest streak: {h['longest_streak']}")
+    print(f"\t\t\t\t\t\t\t\ttimes completed: {h.total_completions}\n")
 
 
     # Logic To Display a warning if the habit's streak is broken
-    if analytics.streak_evaluate(h) == 0 and h['streak'] == 0:                   # If the habit's streak is broken and the streak is zero
+    if h['streak'] == 0:                   # Broken streaks were already reset to zero by the scheduler's roll-over, so no re-evaluation is needed
 
         print(f"{Fore.RED}\t\t\t\t\t\t\t\tCAUTION: Streak of habit '{h['name']}' is broken and was reset to 0 due to not checking-off on time.\n")
     else:
@@ -44,78 +81,118 @@ def s(h):
 #------------------------------------------- TO CREATE A NEW HABIT ---------------------------------------
 
 # TO get input from user to create a new habit and append it to the list of habits.
-def add(list):                                           # list = list of habits
+@metrics.instrument('menu.add')                          # menu actions are timed including the time spent typing
+def add(list, db=None):                                  # list = list of habits, db = database used to log the change
     """
     User is prompted to enter details for a new habit,
     create a Habit object, and add it to the list.
     """
+    from habit import Habit, period_for
     print(Fore.CYAN + "\t\t\t\t\t\t\t\t--- CREATE A NEW HABIT ---")
     name = input("\t\t\t\t\t\t\t\tEnter the name of your habit: ")
     info = input("\t\t\t\t\t\t\t\tWrite a short description: ")
-    freq = input("\t\t\t\t\t\t\t\tHow often will you do this Habit? (daily/weekly): ")
+    freq = input("\t\t\t\t\t\t\t\tHow often will you do this Habit? (daily/weekly/monthly/every-N-days): ")
+    if period_for(freq) is None:                          # e.g. a typo like 'dialy'
+        print(f"{Fore.RED}\t\t\t\t\t\t\t\t'{freq}' IS NOT A VALID PERIODICITY.\n")
+        return
     habit_obj = Habit(name, info, freq)
-    list.append(habit_obj.to_dict())
+    try:
+        list.append(habit_obj)
+    except ValueError:                                    # The registry rejects duplicate names
+        print(f"{Fore.RED}\t\t\t\t\t\t\t\tA HABIT NAMED '{name}' ALREADY EXISTS.\n")
+        return
+    if db is not None:
+        db.log_event('add', habit_obj.to_dict())          # append-only storage records the new habit right away
     print("\n")
     print(f"{Fore.GREEN}\t\t\t\t\t\t\t\tHABIT '{name}' ADDED!\n")
 
 
+#------------------------------------------- TO SUGGEST HABIT NAMES ---------------------------------------
+
+# Shows the names closest to a name that was not found
+def suggest(search, target):
+    if search is None:
+        return
+    names = search.find(target, SUGGESTIONS)                 # names starting with it, else the closest spellings
+    if names:
+        print(f"{Fore.YELLOW}\t\t\t\t\t\t\t\tDid you mean: " + ", ".join(f"'{n}'" for n in names) + "?\n")
+
+
+# Tab completion of habit names while typing (readline completer)
+def complete_name(session, text, state):
+    if not session.done():                                   # the habits are still being read
+        return None
+    names = session.result()[3].complete(text)
+    return names[state] if state < len(names) else None
+
+
 #------------------------------------------- TO CHECK-OFF A HABIT ---------------------------------------
 
 # Marks a habit as completed and updates the streak based on time.
 # To Display check-off of a habit
-def checkoff(list):
+@metrics.instrument('menu.checkoff')
+def checkoff(list, db=None, search=None):
     """
     Mark a habit as completed by updating its streak
     based on periodicity (daily/weekly).
+
+    search: HabitSearch of the list, used to suggest names when the habit is not found.
     """
     print(Fore.CYAN + "\t\t\t\t\t\t\t\t--- MARK A HABIT AS COMPLETED ---")
     target = input("\t\t\t\t\t\t\t\tWhich habit did you complete? :  ")
-    for h in list:
-        if h['name'] == target:              # If the habit with the given name is found
-            today = datetime.date.today()        # Get today's date
-            last_completed = h.get('last_completed')         # If the habit has been completed before, get the last completed date
-
-            if last_completed:
-                # Parse the last completed date
-                last_completed = datetime.datetime.strptime(last_completed, "%Y-%m-%d").date()        # Convert the string date to a datetime.date object
-                # Calculate the difference in days between today and last completed date
-                diff = (today - last_completed).days
-
-                # Reset streak if missed more than 1 day (daily) or 7 days (weekly)
-                if h['periodicity'] == 'daily':
-                    h['streak'] = 1 if diff > 1 else h['streak'] + 1         # If the habit is daily and more than 1 day has passed since last completion, reset streak to 1, otherwise increment by 1
-                elif h['periodicity'] == 'weekly':
-                    h['streak'] = 1 if diff > 7 else h['streak'] + 1        # If the habit is weekly and more than 7 days have passed since last completion, reset streak to 1, otherwise increment by 1
-            else:
-                # First time marking as completed
-                h['streak'] = 1
-
-            h['last_completed'] = today.strftime("%Y-%m-%d")# Update the last completed date to today
-            print("\n")
-            print(f"{Fore.GREEN}\t\t\t\t\t\t\t\tWELL DONE! '{target}' COMPLETED.\n")
+    h = list.get(target)                     # Look the habit up by name
+    if h is not None:                        # If the habit with the given name is found
+        if not h.check_off():                # Updates the streak and records today in the habit's history
+            print(f"{Fore.YELLOW}\t\t\t\t\t\t\t\t'{target}' IS ALREADY CHECKED OFF TODAY.\n")
             return
+        list.changed(h)                              # lets the analytics cache update this habit only
+        if db is not None:
+            db.log_event('checkoff', h)                  # append-only storage records the check-off right away
+        print("\n")
+        print(f"{Fore.GREEN}\t\t\t\t\t\t\t\tWELL DONE! '{target}' COMPLETED.\n")
+        return
     print("\nCOULDN'T FIND THAT HABIT.\n")
+    suggest(search, target)
 
 
 #------------------------------------------- HABIT ANALYSIS ---------------------------------------
 
 #To display analytics of habits 
 #offfers the user different options to analyze their habits.
-def analyze(list):
+@metrics.instrument('menu.analyze')
+def analyze(list, cache=None, scheduler=None, db=None, search=None):
     """
     Display the needed analytics options to the user :
     - all habits
     - habits by frequency
     - longest streak of all
     - longest streak for a specific habit
+    - report: completion rates, best/worst habits, weekday heatmap, longest streaks ever and trend (optionally saved as JSON)
+
+    cache: AnalyticsCache of the list, kept between visits so unchanged habits are not evaluated again.
+    scheduler: ExpiryScheduler of the list; its roll-over resets only the streaks that broke since the last one.
+    db: Database the streak resets are reported to, so they are saved like any other change.
+    search: HabitSearch of the list, used to suggest names when a habit is not found.
     """
-    analytics.reset_broken_streaks(list)  # Ensure outdated streaks are zeroed out, i.e reset back to 0
+    import analytics
+    import reports
+    if cache is None:
+        from analytics_cache import AnalyticsCache
+        cache = AnalyticsCache(list)
+    if scheduler is not None:
+        reset = scheduler.roll_over()             # Ensure outdated streaks are zeroed out, i.e reset back to 0 (only the ones due are visited)
+    else:
+        reset = cache.reset_broken_streaks()
+    if db is not None:
+        for name in reset:
+            db.log_event('reset', list.get(name))     # only these habits changed, so only they need saving
 
     print(Fore.CYAN + "\t\t\t\t\t\t\t\t--- HABIT ANALYSIS ---")
     print("\t\t\t\t\t\t\t\t1. Show all habits")
     print("\t\t\t\t\t\t\t\t2. Show habits by periodicity")
     print("\t\t\t\t\t\t\t\t3. Show habit with the longest streak")
     print("\t\t\t\t\t\t\t\t4. Show longest streak for a specific habit")
+    print("\t\t\t\t\t\t\t\t5. Show report (last 4 weeks)")
 
     option = input("\n\t\t\t\t\t\t\t\tChoose one: ")
     print()
@@ -125,61 +202,134 @@ def analyze(list):
             s(h)                                                                    # Display each habit
 
     elif option == '2':
-        freq = input(Fore.CYAN + "\t\t\t\t\t\t\t\tEnter frequency (daily/weekly): ")         # Get frequency from user
-        matching = analytics.same_periodicity_habits(list, freq)                          # Filter habits by frequency
+        freq = input(Fore.CYAN + "\t\t\t\t\t\t\t\tEnter frequency (daily/weekly/monthly/every-N-days): ")         # Get frequency from user
+        matching = cache.same_periodicity_habits(freq)                                    # Filter habits by frequency
         for h in matching:
             s(h)                                                                        # Display each habit that matches the frequency
 
     elif option == '3':
-        top_streak = analytics.longest_streak(list)                                    # Get the longest streak of all habits
+        top_streak = cache.longest_streak()                                            # Get the longest streak of all habits (top of the cached heap)
         print(f"\t\t\t\t\t\t\t\tTop streak is: {top_streak}\n")                        # Display the longest streak
 
     elif option == '4':
         name = input("\t\t\t\t\t\t\t\tHabit name: ")                           # Get the name of the habit from the user 
         streak = analytics.habit_longest_streak(list, name)                    # Get the streak for the specified habit
         print(f"\t\t\t\t\t\t\t\t'{name}' streak: {streak}\n")                 # Display the streak for the specified habit
+        if name not in list:
+            suggest(search, name)                                              # a streak of 0 may just be a typo
+
+    elif option == '5':
+        report = reports.build_report(list)                                    # every figure below comes from one pass over the habits
+        show_report(report)
+        target = input(Fore.CYAN + "\t\t\t\t\t\t\t\tSave the full report as JSON? (file name, empty to skip): ")
+        if target:
+            reports.export_report(report, target)                              # machine-readable copy, including the rate of every habit
+            print(f"{Fore.GREEN}\t\t\t\t\t\t\t\tREPORT SAVED TO '{target}'.\n")
 
     # If the user enters an invalid option
     else:
         print(Fore.RED + "\t\t\t\t\t\t\t\tNOT A VALID CHOICE!")
 
 
+# To display a report made by reports.build_report
+def show_report(report):
+    rate = lambda r: f"{r * 100:.0f}%"
+    print(f"{Fore.YELLOW}\t\t\t\t\t\t\t\t{report['habits']} habits, last {report['window_days']} days up to {report['date']}\n")
+    print("\t\t\t\t\t\t\t\tBest:  " + ", ".join(f"{name} ({rate(r)})" for name, r in report['best']))
+    print("\t\t\t\t\t\t\t\tWorst: " + ", ".join(f"{name} ({rate(r)})" for name, r in report['worst']))
+    print("\t\t\t\t\t\t\t\tLongest streaks ever: " + ", ".join(f"{name} ({n})" for name, n in report['longest_ever']))
+    print("\n\t\t\t\t\t\t\t\tCheck-offs per weekday:")
+    for day, n in zip(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"), report['weekday_heatmap']['all']):
+        print(f"\t\t\t\t\t\t\t\t  {day} {n:>6}")
+    print("\n\t\t\t\t\t\t\t\tLast 7 days (check-offs / 7-day average):")
+    for t in report['trend'][-7:]:
+        print(f"\t\t\t\t\t\t\t\t  {t['date']} {t['completions']:>6} {t['rolling_average']:>9.1f}")
+    print()
+
+
 #------------------------------------------- TO REMOVE A NEW HABIT ---------------------------------------
 
 
 #To display habit removal
-def remove(list):                                                                   #let the user remove a habit by name
+@metrics.instrument('menu.remove')
+def remove(list, db=None, search=None):                                             #let the user remove a habit by name
     """
     Prompt the user to remove a habit by name,
     and delete it from the list if found.
+
+    search: HabitSearch of the list, used to suggest names when the habit is not found.
     """
     print(Fore.CYAN + "\t\t\t\t\t\t\t\t--- REMOVE A HABIT ---")
     target = input("\t\t\t\t\t\t\t\tEnter name of the habit to delete: ")
 
-    for h in list:                                                             # Iterate through the list of habits
-
-        if h['name'] == target:                                                # If the habit with the given name is found
+    h = list.remove(target)                                                    # Remove the habit from the registry by name
+    if h is not None:                                                          # If the habit with the given name was found
+        if db is not None:
+            db.log_event('remove', h)
 
-            list.remove(h)                                                     # Remove the habit from the list
+        print(f"{Fore.GREEN}\t\t\t\t\t\t\t\t'{target}' HAS BEEN REMOVED.\n")
 
-            print(f"{Fore.GREEN}\t\t\t\t\t\t\t\t'{target}' HAS BEEN REMOVED.\n")
-
-            return 
+        return 
     print(f"Habit '{target}' was not found.\n")                                # If the habit is not found, print a message indicating that it was not found.
+    suggest(search, target)
 
 
 
 #----------------------------------------------------------------- MAIN FUNCTION --------------------------------------------------------------
 
+# Loads the habits of a database into the registry
+@metrics.instrument('menu.load')
+def load(db):
+    """
+    Load the habits into a HabitRegistry, with the AnalyticsCache, ExpiryScheduler and HabitSearch that follow its changes.
+
+    Returns:
+        tuple: (registry, cache, scheduler, search)
+    """
+    from habit import Habit
+    from registry import HabitRegistry
+    from analytics_cache import AnalyticsCache
+    from scheduler import ExpiryScheduler
+    from search import HabitSearch
+    list = HabitRegistry(Habit.from_dict(d) for d in db.load_habits())           # Load existing habits from the JSON file into the registry
+    return list, AnalyticsCache(list), ExpiryScheduler(list), HabitSearch(list)
+
+
 # Main function to run the Habit Tracker application
 def main():
     """
     Main loop for running the Habit Tracker application.
     Loads data, presents menu options, and processes user commands.
     """
-    db = HabitDatabase('habits.json')                                             # Initialize the HabitDatabase with the filename 'habits.json'
-    list = db.load_habits()                                                      # Load existing habits from the JSON file
+    if os.environ.get('HABIT_PROFILE'):
+        metrics.enable(profile=True)                                             # cProfile the whole session (metrics are recorded too)
+    backend = os.environ.get('HABIT_STORAGE', 'json')                            # Storage mode chosen by the user (json, log, shared or sqlite)
+    db = open_database('habits.db' if backend == 'sqlite' else 'habits.json', backend, index=True, delta=True)   # Initialize the HabitDatabase with the filename 'habits.json'; saves append only the changed habits
+    loader = ThreadPoolExecutor(max_workers=1)
+    session = loader.submit(load, db)                                            # Read the habits in the background while the menu is on screen
+    loader.shutdown(wait=False)
+    saver = AutoSaver(db, lambda: [h.to_dict() for h in session.result()[0].to_list()], AUTOSAVE_EVERY, AUTOSAVE_SECONDS)
+    saver.start()                                                                # Saves changes in the background so a killed session loses little
+    if readline is not None:
+        readline.set_completer_delims('')                                        # habit names may contain spaces
+        readline.set_completer(lambda text, state: complete_name(session, text, state))
+        readline.parse_and_bind('tab: complete')
+    try:
+        menu(session, db)
+    finally:
+        saver.stop()                                                             # Save the remaining changes (if any) to the JSON file
+        if os.environ.get('HABIT_PROFILE'):
+            metrics.dump_profile(os.environ['HABIT_PROFILE'])                    # read with: python -m pstats <file>
+        if os.environ.get('HABIT_METRICS'):
+            metrics.REGISTRY.dump(os.environ['HABIT_METRICS'])
+
+
+def menu(session, db):
+    """
+    Present the menu options and process user commands until the user exits.
 
+    session: Future of load(db); the first option that needs the habits waits for it.
+    """
     while True:
         print(Fore.RED + "\n\n\t\t\t\t\t\t\t\t========== HABIT TRACKER ==========")
         print(Fore.BLUE + "\n\t\t\t\t\t\t\t\tWelcome! What would you like to do?")
@@ -191,23 +341,24 @@ def main():
 
         option = input("\n\t\t\t\t\t\t\t\tYour choice: ")
         print()
+        if option in ('1', '2', '3', '4'):
+            list, cache, scheduler, search = session.result()                    # usually loaded long before the user has chosen
 
         if option == '1':
-            add(list)
+            add(list, db)
         elif option == '2':
-            checkoff(list)
+            checkoff(list, db, search)
         elif option == '3':
-            analyze(list)
+            analyze(list, cache, scheduler, db, search)
         elif option == '4':
-            remove(list)
+            remove(list, db, search)
         elif option == '5':
-            db.save_habits(list)                                                       # Save the updated habits list to the JSON file
             print(Fore.RED + "\t\t\t\t\t\t\t\tThanks for using the Habit Tracker!")
             break
         else:
             print(Fore.RED + "\t\t\t\t\t\t\t\tInvalid choice, try again.")
 
 
-# Program entry point
+# Program entry point (command line arguments were handled at the top of the file)
 if __name__ == '__main__':
     main()
@@ -0,0 +1,247 @@
+# metrics.py
+
+"""
+Metrics Module
+
+- Shows where the time of a session goes: every instrumented operation (database loads and saves,
+  analytics functions, menu actions) records its number of calls, total wall time and bytes read or written
+  in an in-process registry (REGISTRY).
+
+- Instrumenting code:
+      @metrics.instrument('analytics.longest_streak')        # a function (generators are timed until exhausted)
+      def longest_streak(...): ...
+
+      with metrics.timed('database.save') as t:              # a block; t.bytes can be set inside
+          ...
+          t.bytes = size
+
+- Recording is off unless enabled (HABIT_METRICS environment variable or enable()). While it is off an
+  instrumented function costs one flag check per call (well under a microsecond) and timed() returns a shared
+  do-nothing object. Only whole operations are instrumented, never per-habit helpers.
+
+- The registry is dumped as JSON (to_json) or Prometheus text format (to_prometheus).
+  enable(profile=True) also runs cProfile until dump_profile() is called, for a function-level breakdown
+  (cProfile follows the thread that enabled it; work in other threads still shows up in the metrics).
+
+- In the interactive app, HABIT_METRICS=<file> writes the metrics on exit ('.prom' for Prometheus text,
+  JSON otherwise) and HABIT_PROFILE=<file> saves the cProfile statistics, e.g.:
+      set HABIT_METRICS=metrics.json
+      set HABIT_PROFILE=session.prof
+      python main.py
+      python -m pstats session.prof
+"""
+
+import cProfile
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+ENABLED = bool(os.environ.get('HABIT_METRICS'))   # checked on every instrumented call; change with enable() / disable()
+_profiler = None                                   # cProfile.Profile while profiling
+
+
+class Metric:
+    """
+    Totals of one operation.
+    """
+
+    __slots__ = ('calls', 'seconds', 'bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+
+
+class MetricsRegistry:
+    """
+    - Operation name -> Metric, shared by all threads of the process (AutoSaver saves in its own thread).
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, nbytes=0):
+        """
+        Add one call of an operation.
+
+        Arguments:
+            name (str): Operation name, e.g. 'database.save'.
+            seconds (float): Wall time of the call.
+            nbytes (int): Bytes read or written by the call.
+        """
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = Metric()
+            metric.calls += 1
+            metric.seconds += seconds
+            metric.bytes += nbytes
+
+    def reset(self):
+        with self._lock:
+            self.metrics = {}
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {operation: {'calls', 'seconds', 'bytes'}}, operations sorted by name.
+        """
+        with self._lock:
+            return {name: {'calls': m.calls, 'seconds': m.seconds, 'bytes': m.bytes}
+                    for name, m in sorted(self.metrics.items())}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=4)
+
+    def to_prometheus(self, prefix='habits'):
+        """
+        The metrics in the Prometheus text exposition format, one counter family per figure
+        with the operation as a label.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for field, unit, help in (('calls', 'calls', "Number of calls"),
+                                  ('seconds', 'seconds', "Wall time spent"),
+                                  ('bytes', 'bytes', "Bytes read or written")):
+            family = f"{prefix}_operation_{unit}_total"
+            lines.append(f"# HELP {family} {help} per operation.")
+            lines.append(f"# TYPE {family} counter")
+            for name, values in snapshot.items():
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{family}{{operation="{label}"}} {values[field]}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, filename):
+        """
+        Write the metrics to a file: Prometheus text for '.prom', JSON otherwise.
+        """
+        with open(filename, 'w') as f:
+            f.write(self.to_prometheus() if str(filename).endswith('.prom') else self.to_json())
+
+
+REGISTRY = MetricsRegistry()
+
+
+# ------ switching recording on and off ------
+
+def enable(profile=False):
+    """
+    Start recording metrics.
+
+    Argument:
+        profile (bool): Also run cProfile (in the calling thread) until dump_profile() or disable().
+    """
+    global ENABLED, _profiler
+    ENABLED = True
+    if profile and _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def disable():
+    """
+    Stop recording metrics (and profiling). Recorded values stay in REGISTRY.
+    """
+    global ENABLED, _profiler
+    ENABLED = False
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler = None
+
+
+def dump_profile(filename):
+    """
+    Stop profiling and save the cProfile statistics (read them with python -m pstats <filename>).
+
+    Returns:
+        bool: False if profiling was not running.
+    """
+    global _profiler
+    if _profiler is None:
+        return False
+    _profiler.disable()
+    _profiler.dump_stats(filename)
+    _profiler = None
+    return True
+
+
+# ------ instrumentation ------
+
+class _Timer:
+    # Context manager returned by timed() while recording is on.
+    __slots__ = ('name', 'bytes', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.bytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        REGISTRY.record(self.name, time.perf_counter() - self.start, self.bytes)
+
+
+class _NullTimer:
+    # Shared do-nothing context manager returned by timed() while recording is off.
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    @property
+    def bytes(self):
+        return 0
+
+    @bytes.setter
+    def bytes(self, value):
+        pass
+
+
+_NULL = _NullTimer()
+
+
+def timed(name):
+    """
+    Context manager recording one call of `name` for the block it wraps.
+    Set `.bytes` on the returned object to record bytes read or written.
+    """
+    return _Timer(name) if ENABLED else _NULL
+
+
+def _timed_items(name, items):
+    # Pass the items of a generator through, timing it until it is exhausted.
+    with _Timer(name):
+        return (yield from items)
+
+
+def instrument(name):
+    """
+    Decorator recording every call of a function as operation `name`.
+    Generator functions are timed from the first item to exhaustion.
+    """
+    def decorate(func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not ENABLED:
+                    return func(*args, **kwargs)          # the generator itself: no cost per item
+                return _timed_items(name, func(*args, **kwargs))
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not ENABLED:
+                    return func(*args, **kwargs)
+                with _Timer(name):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorate
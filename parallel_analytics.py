@@ -0,0 +1,167 @@
+# parallel_analytics.py
+
+"""
+Parallel Analytics Module
+
+- An analytics job over many habit files (e.g. one habits.json per user) that loads and reduces them
+  one after another only uses one core, and one damaged file stops the whole run.
+
+- analyze_files() is a map-reduce over any number of habit files:
+    * map: worker processes (concurrent.futures) each take a chunk of files and summarize every file with
+      sharding.shard_summary (analytics.summarize: longest valid streak, habits per periodicity,
+      broken streaks), merging the chunk into one partial result;
+    * reduce: the partials are merged with analytics.merge_summaries, in file order.
+  Chunks keep the number of tasks (and of results sent between processes) small when there are
+  thousands of small files, while still giving every worker several chunks to balance the load.
+
+- Files that cannot be read are listed under 'errors' instead of stopping the job, and a progress
+  callback is told how many files are done.
+
+Run on a folder (every .json / .jsonl / .bin habits file below it; other JSON files such as saved reports are
+skipped) or on glob patterns:
+    python parallel_analytics.py users/ [--workers 8] [--chunk-size 16]
+    python parallel_analytics.py "users/*/habits.json"
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import analytics
+from sharding import META_FILE, shard_summary
+
+EXTENSIONS = ('.json', '.jsonl', '.bin')     # habit files picked up when a folder is given
+CHUNKS_PER_WORKER = 4                         # default chunk size aims at this many chunks per worker
+
+
+def is_habit_file(filename):
+    """
+    Tell whether a file found by find_files holds habits.
+    A .json habits file is a JSON array; other JSON files (exported reports, store.json of a sharded store)
+    are objects and are left out. Files with other extensions are taken as they are.
+    """
+    if not filename.endswith('.json'):
+        return True
+    with open(filename, 'rb') as f:
+        start = f.read(64).lstrip()
+    return start[:1] in (b'[', b'')              # an empty file is an empty habits file
+
+
+def find_files(sources):
+    """
+    Expand folders (searched recursively) and glob patterns into a sorted list of habit files.
+
+    Argument:
+        sources (list): Folders, files or glob patterns ('**' matches nested folders).
+    """
+    files = set()
+    for source in sources:
+        if os.path.isdir(source):
+            for folder, _, names in os.walk(source):
+                files.update(os.path.join(folder, n) for n in names if n.endswith(EXTENSIONS) and n != META_FILE)
+        else:
+            files.update(f for f in glob.glob(source, recursive=True) if os.path.isfile(f))
+    return sorted(f for f in files if is_habit_file(f))
+
+
+def summarize_files(files, backend='json', current_date=None):
+    """
+    Summarize a chunk of files into one partial result (runs in a worker process).
+
+    Returns:
+        dict: Merged summary with 'files', 'broken' as [file, habit name] pairs and 'errors' as [file, message] pairs.
+    """
+    parts, errors = [], []
+    for filename in files:
+        try:
+            part = shard_summary(filename, backend, current_date, broken=True)
+        except (OSError, ValueError, sqlite3.DatabaseError) as e:      # unreadable file, invalid JSON or binary data
+            errors.append([filename, str(e)])
+            continue
+        except (KeyError, TypeError) as e:                             # JSON that is not a list of habit records
+            errors.append([filename, f"not a habit record: {type(e).__name__} {e}"])
+            continue
+        part['broken'] = [[filename, name] for name in part['broken']]     # names are only unique within a file
+        parts.append(part)
+    total = merge(parts)
+    total['files'] = len(files)
+    total['errors'] = errors
+    return total
+
+
+def merge(partials):
+    """
+    Merge partial results of summarize_files (or summaries of analytics.summarize).
+    """
+    partials = list(partials)
+    total = analytics.merge_summaries(partials)
+    total.setdefault('broken', [])
+    total['files'] = sum(p.get('files', 1) for p in partials)
+    total['errors'] = [e for p in partials for e in p.get('errors', ())]
+    return total
+
+
+def analyze_files(files, backend='json', current_date=None, workers=None, chunk_size=None, progress=None):
+    """
+    Summarize many habit files in parallel.
+
+    Arguments:
+        files (list): Habit files (see find_files).
+        backend (str): Storage mode of the files (see database.BACKENDS).
+        current_date (date): Day the streaks are evaluated on (default today).
+        workers (int): Number of worker processes (default: one per CPU; 1 runs everything in this process).
+        chunk_size (int): Files per task (default: spread over CHUNKS_PER_WORKER chunks per worker).
+        progress (callable): Called as progress(files done, total files) after every chunk.
+
+    Returns:
+        dict: {'files', 'habits', 'longest_streak', 'by_periodicity', 'broken': [[file, name], ...],
+               'errors': [[file, message], ...]}, 'broken' and 'errors' in file order.
+    """
+    files = list(files)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(files) // (workers * CHUNKS_PER_WORKER)))     # ceiling division
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    results = [None] * len(chunks)
+    done = 0
+
+    def collect(i, result):
+        nonlocal done
+        results[i] = result
+        done += len(chunks[i])
+        if progress is not None:
+            progress(done, len(files))
+
+    if workers == 1 or len(chunks) <= 1:
+        for i, chunk in enumerate(chunks):
+            collect(i, summarize_files(chunk, backend, current_date))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(summarize_files, chunk, backend, current_date): i for i, chunk in enumerate(chunks)}
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+    return merge(results)                          # chunk order, so the lists come out in file order
+
+
+def main(argv=None):
+    # Summarize the habit files given on the command line and print the result as JSON.
+    parser = argparse.ArgumentParser(description="Parallel analytics over many habit files")
+    parser.add_argument('sources', nargs='+', help="folders, files or glob patterns")
+    parser.add_argument('--storage', default='json', help="storage mode of the files (json, log, shared or sqlite)")
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--chunk-size', type=int)
+    args = parser.parse_args(argv)
+
+    files = find_files(args.sources)
+    report = lambda done, total: print(f"\r{done}/{total} files", end='', file=sys.stderr, flush=True)
+    result = analyze_files(files, args.storage, workers=args.workers, chunk_size=args.chunk_size, progress=report)
+    print(file=sys.stderr)
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# registry.py
+
+"""
+Registry Module
+
+- A plain list of habits has to be scanned from the start every time a habit is looked up by name,
+  and filtering by periodicity looks at every habit.
+
+- HabitRegistry is the collection the app keeps its habits in. It keeps a dictionary index by name
+  and one bucket per periodicity, both updated on add/remove, so lookup, delete and filtering
+  do not depend on how many habits exist.
+
+- Habit names are unique: adding a second habit with an existing name is rejected.
+
+- Every add, remove or change increases `version` and is reported to the registered listeners,
+  so derived data (e.g. AnalyticsCache) can be updated for just the habit that changed.
+  Habits changed in place (checked off) are reported through changed().
+"""
+
+
+class HabitRegistry:
+    """
+    - Collection of habits indexed by name and grouped by periodicity.
+    - Iterating over it yields the habits in the order they were added, like the old list.
+    """
+
+    def __init__(self, habits=()):
+        """
+        Build the registry from existing habits.
+
+        Argument:
+            habits (iterable): Habit objects (habit dictionaries work too).
+        """
+        self._by_name = {}           # name -> habit, insertion ordered
+        self._by_periodicity = {}    # periodicity -> {name: habit}, so deleting from a bucket is O(1) too
+        self.version = 0             # increased on every add, remove or change
+        self.listeners = []          # callables run as listener(op, habit) after every change, op = 'add', 'change' or 'remove'
+        for h in habits:
+            self.append(h)
+
+    def __iter__(self):
+        return iter(self._by_name.values())
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def append(self, habit):
+        """
+        Add a habit.
+
+        Argument:
+            habit (Habit): The habit to add.
+
+        Raises:
+            ValueError: If a habit with the same name already exists.
+        """
+        name = habit['name']
+        if name in self._by_name:
+            raise ValueError(f"A habit named '{name}' already exists.")
+        self._by_name[name] = habit
+        self._by_periodicity.setdefault(habit['periodicity'], {})[name] = habit
+        self._notify('add', habit)
+
+    def get(self, name):
+        """
+        Return the habit with the given name, or None if there is none.
+        """
+        return self._by_name.get(name)
+
+    def remove(self, name):
+        """
+        Remove the habit with the given name.
+
+        Returns:
+            The removed habit, or None if there was no habit with that name.
+        """
+        habit = self._by_name.pop(name, None)
+        if habit is not None:
+            del self._by_periodicity[habit['periodicity']][name]
+            self._notify('remove', habit)
+        return habit
+
+    def changed(self, habit):
+        """
+        Report that a habit was changed in place (e.g. checked off).
+        """
+        self._notify('change', habit)
+
+    def _notify(self, op, habit):
+        self.version += 1
+        for listener in self.listeners:
+            listener(op, habit)
+
+    def by_periodicity(self, freq):
+        """
+        Return the habits with the given periodicity ('daily' or 'weekly').
+        """
+        return list(self._by_periodicity.get(freq, {}).values())
+
+    def to_list(self):
+        """
+        Return the habits as a plain list.
+        """
+        return list(self._by_name.values())
@@ -0,0 +1,135 @@
+# reports.py
+
+"""
+Reports Module
+
+- analytics.py answers one question per call (all habits, by periodicity, longest streak), and each call
+  looks at every habit again.
+
+- build_report() produces the whole dashboard in one pass over the habits, visiting each habit's
+  check-offs inside the report window only once (the history is sorted, so the window is found by bisection):
+    * completion rate of every habit over the window: periods with a check-off / periods in the window
+      (counted from the creation day for newer habits),
+    * best and worst habits by that rate,
+    * weekday heatmap: check-offs per weekday (Monday first), for all habits and per periodicity,
+    * ranking of the longest streaks ever reached,
+    * trend: check-offs per day over the window with a rolling average.
+
+- The report is a plain dictionary, so it can be written out as JSON:
+      python reports.py habits.json [--window 28] [--output report.json]
+"""
+
+import argparse
+import datetime
+import heapq
+import json
+from bisect import bisect_left
+
+import analytics
+import metrics
+from database import HabitDatabase
+from habit import Habit
+
+WINDOW = 28          # days covered by completion rates, heatmaps and the trend
+TREND_WINDOW = 7     # days averaged by the rolling trend
+TOP = 5              # habits listed in the best / worst / longest-ever rankings
+
+
+@metrics.instrument('reports.build_report')
+def build_report(habits, current_date=None, window=WINDOW, trend_window=TREND_WINDOW, top=TOP):
+    """
+    Compute all reports in one pass over the habits.
+
+    Arguments:
+        habits: Any iterable of habits (Habit objects or habit dictionaries, e.g. a stream from HabitDatabase.iter_habits()).
+        current_date (date): Last day of the window (default today).
+        window (int): Number of days covered, ending with current_date.
+        trend_window (int): Number of days averaged by the rolling trend.
+        top (int): Length of the rankings.
+
+    Returns:
+        dict: The report, see the module docstring. Rates are between 0 and 1 (None for an unknown periodicity).
+    """
+    if current_date is None:
+        current_date = datetime.date.today()
+    today = current_date.toordinal()
+    start = today - window + 1                     # first day of the window
+    rates = {}                                     # name -> completion rate
+    heatmap = {}                                   # periodicity -> check-offs per weekday
+    daily = [0] * window                           # check-offs per day of the window
+    longest = []                                   # (longest-ever streak, name)
+    count = 0
+
+    for h in habits:
+        if not isinstance(h, Habit):
+            h = Habit.from_dict(h)                 # dates parsed once
+        count += 1
+        longest.append((analytics.longest_ever_streak(h), h.name))
+        days = h.completions
+        first = max(start, h.created)              # a habit created inside the window is rated from its creation day
+        week = heatmap.setdefault(h.periodicity, [0] * 7)
+        done, previous = 0, None                   # periods with a check-off, period of the last check-off seen
+        period = h.period
+        for day in days[bisect_left(days, start):]:
+            if day > today:
+                break
+            daily[day - start] += 1
+            week[(day - 1) % 7] += 1               # day 1 (0001-01-01) is a Monday
+            if period is not None and day >= first:
+                number = period.index(day)
+                if number != previous:
+                    done += 1
+                    previous = number
+        if period is None:
+            rates[h.name] = None
+        else:
+            expected = period.index(today) - period.index(min(first, today)) + 1
+            rates[h.name] = min(1.0, done / expected)
+
+    rated = [(rate, name) for name, rate in rates.items() if rate is not None]
+    trend, total = [], 0
+    for i, n in enumerate(daily):
+        total += n - (daily[i - trend_window] if i >= trend_window else 0)     # running sum over the last trend_window days
+        trend.append({
+            'date': datetime.date.fromordinal(start + i).isoformat(),
+            'completions': n,
+            'rolling_average': round(total / min(i + 1, trend_window), 3),
+        })
+
+    return {
+        'date': current_date.isoformat(),
+        'window_days': window,
+        'habits': count,
+        'completion_rate': rates,
+        'best': [[name, rate] for rate, name in heapq.nsmallest(top, rated, key=lambda r: (-r[0], r[1]))],
+        'worst': [[name, rate] for rate, name in heapq.nsmallest(top, rated)],
+        'weekday_heatmap': {'all': [sum(counts) for counts in zip(*heatmap.values())] or [0] * 7, **heatmap},
+        'longest_ever': [[name, streak] for streak, name in heapq.nsmallest(top, longest, key=lambda r: (-r[0], r[1]))],
+        'trend': trend,
+    }
+
+
+def export_report(report, filename):
+    """
+    Write a report made by build_report() to a JSON file.
+    """
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=4)
+
+
+def main(argv=None):
+    # Print (or write) the report of a habits file as JSON.
+    parser = argparse.ArgumentParser(description="Habit reports")
+    parser.add_argument('filename', nargs='?', default='habits.json')
+    parser.add_argument('--window', type=int, default=WINDOW)
+    parser.add_argument('--output', help="JSON file to write instead of printing")
+    args = parser.parse_args(argv)
+    report = build_report(HabitDatabase(args.filename).iter_habits(), window=args.window)
+    if args.output:
+        export_report(report, args.output)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# scheduler.py
+
+"""
+Scheduler Module
+
+- Broken streaks used to be found by evaluating every habit (analytics.reset_broken_streaks) each time the
+  analysis menu was opened, and again for every habit displayed.
+
+- A streak can only break on one known day: the start of the second period after the last check-off
+  (habit.breaks_on / analytics.streak_break_day). ExpiryScheduler keeps the habits with a running streak
+  in a priority queue ordered by that day. roll_over(today) pops only the habits whose day has come and
+  sets their streak to 0, so the daily cost depends on the number of streaks that actually break.
+
+- After a roll-over every stored streak is valid, so reads can use habit['streak'] as it is.
+
+- The scheduler listens to the HabitRegistry: a check-off queues the habit's new break day,
+  and the outdated entry is skipped when it comes up (lazy deletion).
+"""
+
+import datetime
+import heapq
+
+import analytics
+
+
+class ExpiryScheduler:
+    """
+    - Priority queue of (break day, habit name) for every habit with a streak.
+    - roll_over() expires the streaks whose break day has been reached.
+    """
+
+    def __init__(self, registry):
+        """
+        Argument:
+            registry (HabitRegistry): The habits to watch; the scheduler registers itself as a listener.
+        """
+        self.registry = registry
+        self._queue = []                         # heap of (break day number, name)
+        for h in registry:
+            self._schedule(h)
+        registry.listeners.append(self._on_change)
+
+    def _break_day(self, habit):
+        # Day number the habit's streak breaks on; None if it never breaks (unknown periodicity).
+        if analytics.last_ordinal(habit) is None:
+            return 1                             # a streak without any check-off is already broken (first day number)
+        return analytics.streak_break_day(habit)
+
+    def _schedule(self, habit):
+        # Queue the day the habit's current streak breaks (nothing to queue without a streak).
+        if habit['streak'] > 0:
+            day = self._break_day(habit)
+            if day is not None:
+                heapq.heappush(self._queue, (day, habit['name']))
+
+    def _on_change(self, op, habit):
+        # Registry listener: removed habits are dropped lazily, the others get their new break day.
+        if op != 'remove':
+            self._schedule(habit)
+        if len(self._queue) > 2 * len(self.registry) + 64:       # too many outdated entries: rebuild
+            self._queue = []
+            for h in self.registry:
+                self._schedule(h)
+
+    def _due(self, habit, day):
+        # True if this queue entry still describes the habit's current streak.
+        return habit is not None and habit['streak'] > 0 and self._break_day(habit) == day
+
+    @property
+    def next_expiry(self):
+        """
+        Date on which the next streak breaks, or None if no streak can break.
+        """
+        while self._queue and not self._due(self.registry.get(self._queue[0][1]), self._queue[0][0]):
+            heapq.heappop(self._queue)            # outdated entry (habit checked off again or removed)
+        return datetime.date.fromordinal(self._queue[0][0]) if self._queue else None
+
+    def roll_over(self, today=None):
+        """
+        Set the streak of every habit whose break day has been reached to 0.
+        Cheap to call often: when nothing is due only the head of the queue is looked at.
+
+        Argument:
+            today (date): The current day (default today).
+
+        Returns:
+            list: Names of the habits whose streak was reset.
+        """
+        day = (today or datetime.date.today()).toordinal()
+        expired = []
+        while self._queue and self._queue[0][0] <= day:
+            due, name = heapq.heappop(self._queue)
+            habit = self.registry.get(name)
+            if self._due(habit, due):
+                habit['streak'] = 0
+                expired.append(name)
+                self.registry.changed(habit)      # keeps other listeners (AnalyticsCache) in step
+        return expired
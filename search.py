@@ -0,0 +1,195 @@
+# search.py
+
+"""
+Search Module
+
+- Check-off, delete and "longest streak for a specific habit" need the exact habit name; a typo or a
+  half-remembered name just gives "COULDN'T FIND THAT HABIT", which is painful with thousands of
+  similarly named habits.
+
+- HabitSearch keeps two indexes over the habits of a HabitRegistry:
+    * the names sorted case-insensitively, so every name starting with a prefix is found with one
+      binary search: O(log N + matches) -> complete(),
+    * a trigram index (every 3-letter piece of a name or description -> the habits containing it),
+      so names that share most pieces with a misspelled query are found without comparing the query
+      to every name -> suggest().
+
+- It listens to the registry: an added habit is inserted into both indexes, a removed one is taken out
+  of the sorted names and marked deleted in the trigram index (cleaned up once deleted entries outnumber
+  the live ones). The trigram index is only built the first time suggest() is called.
+
+- Suggestions are ranked by how many trigrams the query shares with the name (Dice coefficient), or with
+  the description (share of the query's trigrams found in it, counted a little lower), so
+  "exersise" finds "exercise" and "book" finds the habit described as "read a book".
+
+- Only the habits sharing the most (not too common) trigrams with the query are scored. The trigrams of
+  every name and description are kept as numbers too, so scoring one is a set intersection instead of
+  splitting its texts again.
+
+Can also be run on a habits file:
+    python search.py habits.json <text>
+"""
+
+import sys
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+from database import HabitDatabase
+from registry import HabitRegistry
+
+MIN_SCORE = 0.4            # weaker matches are not suggested
+DESCRIPTION_WEIGHT = 0.9   # a match in the description ranks just below an equally good match in the name
+CANDIDATES = 50            # habits sharing the most trigrams with the query that are scored exactly
+COMMON = 0.01              # trigrams in more than this share of the habits only count when no rarer trigram matched ...
+MIN_COMMON = 100           # ... and in more than this many
+
+
+def trigrams(text):
+    """
+    Return the set of 3-letter pieces of a text, lowercased and padded so short words and word starts count too.
+    """
+    text = f"  {text.lower()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class HabitSearch:
+    """
+    - Prefix completion and typo-tolerant suggestions over the names and descriptions of a HabitRegistry.
+    """
+
+    def __init__(self, registry):
+        """
+        Argument:
+            registry (HabitRegistry): The habits to search; the index registers itself as a listener.
+        """
+        self.registry = registry
+        self._sorted = sorted((h['name'].lower(), h['name']) for h in registry)   # (lowercased name, name)
+        self._grams = None          # trigram -> number, built by the first suggest()
+        self._postings = []         # trigram number -> array of the ids of the habits containing it
+        self._trigrams = array('I')  # trigram numbers of every habit: those of its name, then those of its description
+        self._spans = array('I')    # habit id -> start in _trigrams, trigrams in the name, trigrams in the description
+        self._ids = {}              # name -> habit id in the trigram index
+        self._names = []            # habit id -> name, None once the habit is removed
+        self._removed = 0           # ids in _names that are None
+        registry.listeners.append(self._on_change)
+
+    # ----- keeping the indexes up to date -----
+
+    def _on_change(self, op, habit):
+        # Registry listener. Check-offs ('change') leave the name and description as they are.
+        key = (habit['name'].lower(), habit['name'])
+        if op == 'add':
+            insort(self._sorted, key)
+            if self._grams is not None:
+                self._index(habit)
+        elif op == 'remove':
+            i = bisect_left(self._sorted, key)
+            if i < len(self._sorted) and self._sorted[i] == key:
+                del self._sorted[i]
+            if self._grams is not None:
+                self._names[self._ids.pop(habit['name'])] = None
+                self._removed += 1
+                if self._removed > max(len(self._ids), 1000):     # mostly deleted entries: rebuild when next needed
+                    self._grams = None
+
+    def _build(self):
+        # Build the trigram index from the whole registry.
+        self._grams, self._postings, self._trigrams, self._spans = {}, [], array('I'), array('I')
+        self._ids, self._names, self._removed = {}, [], 0
+        for h in self.registry:
+            self._index(h)
+
+    def _index(self, habit):
+        # Add one habit to the trigram index.
+        i = len(self._names)
+        self._names.append(habit['name'])
+        self._ids[habit['name']] = i
+        name, description = trigrams(habit['name']), trigrams(habit['description'] or '')
+        self._spans.extend((len(self._trigrams), len(name), len(description)))
+        for gram in name | description:
+            number = self._grams.get(gram)
+            if number is None:
+                number = self._grams[gram] = len(self._postings)
+                self._postings.append(array('i'))      # 4 bytes per habit and trigram
+            self._postings[number].append(i)
+        self._trigrams.extend(map(self._grams.__getitem__, name))
+        self._trigrams.extend(map(self._grams.__getitem__, description))
+
+    # ----- searching -----
+
+    def complete(self, prefix, limit=10):
+        """
+        Names starting with a prefix (case-insensitive), in alphabetical order.
+
+        Arguments:
+            prefix (str): Start of the name.
+            limit (int): Most names returned.
+        """
+        prefix = prefix.lower()
+        i = bisect_left(self._sorted, (prefix,))
+        names = []
+        while i < len(self._sorted) and len(names) < limit and self._sorted[i][0].startswith(prefix):
+            names.append(self._sorted[i][1])
+            i += 1
+        return names
+
+    def suggest(self, text, limit=5):
+        """
+        Names of the habits whose name or description best matches a (possibly misspelled) text.
+
+        Arguments:
+            text (str): What the user typed.
+            limit (int): Most names returned.
+
+        Returns:
+            list: Names, best match first (an exact name comes first); empty if nothing is close enough.
+        """
+        if not text.strip():
+            return []
+        query = trigrams(text)
+        if self._grams is None:
+            self._build()
+        size = len(query)
+        query = {self._grams[g] for g in query if g in self._grams}     # as trigram numbers
+        counts, common = Counter(), max(COMMON * len(self._ids), MIN_COMMON)
+        for ids in sorted((self._postings[g] for g in query), key=len):     # rarest trigrams first
+            if len(ids) > common and counts:
+                break                   # every remaining trigram is in most habits: it cannot narrow the search
+            counts.update(ids)
+        # Only the CANDIDATES habits sharing the most trigrams are scored: the cut-off is found from how many
+        # habits share each number of trigrams, instead of sorting them all.
+        least, room = 1, CANDIDATES + self._removed         # room: habits sharing exactly `least` trigrams still scored
+        for least, n in sorted(Counter(counts.values()).items(), reverse=True):
+            if n >= room:
+                break
+            room -= n
+        scored = []
+        for i, k in counts.items():
+            if k <= least:
+                if k < least or not room:
+                    continue
+                room -= 1
+            if self._names[i] is None:
+                continue
+            start, name, description = self._spans[3 * i:3 * i + 3]
+            end = start + name + description
+            score = max(2 * len(query.intersection(self._trigrams[start:start + name])) / (size + name),   # Dice coefficient
+                        DESCRIPTION_WEIGHT * len(query.intersection(self._trigrams[start + name:end])) / size)
+            if score >= MIN_SCORE:
+                scored.append((-score, self._names[i]))
+        scored.sort()
+        return [name for _, name in scored[:limit]]
+
+    def find(self, text, limit=5):
+        """
+        Names for what the user typed: the completions of it as a prefix, or else suggestions.
+        """
+        return self.complete(text, limit) or self.suggest(text, limit)
+
+
+if __name__ == '__main__':
+    # Print the names matching a text in a habits file.
+    search = HabitSearch(HabitRegistry(HabitDatabase(sys.argv[1]).load_habits()))
+    for name in search.find(' '.join(sys.argv[2:])):
+        print(name)
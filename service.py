@@ -0,0 +1,345 @@
+# service.py
+
+"""
+Service Module
+
+- main.py is a blocking terminal loop for one person, and cli.py starts a new process per command.
+  This module serves many clients from one long-running process instead.
+
+- HabitService keeps the habits in memory (HabitRegistry) and offers add, checkoff, remove and the four
+  queries of main.analyze as asyncio coroutines. Changes are applied right away in the event loop;
+  saving runs in a worker thread, and all changes made within SAVE_DELAY seconds are written by one save,
+  so clients never wait for the disk.
+
+- serve() puts a small HTTP/JSON endpoint (stdlib asyncio only) in front of the service:
+
+    GET    /habits[?periodicity=daily]        all habits, or the ones with that periodicity
+    GET    /habits/<name>/longest-streak      longest streak of one habit
+    GET    /longest-streak                    longest streak of all habits
+    POST   /habits                            {"name": ..., "description": ..., "periodicity": ...}
+    POST   /habits/<name>/checkoff            optional {"date": "YYYY-MM-DD"}
+    DELETE /habits/<name>
+    GET    /metrics[?format=prometheus]       operation counts, times and bytes (metrics.py), JSON or Prometheus text
+
+Run it with:
+    python service.py [--host 127.0.0.1] [--port 8080] [--file habits.json] [--storage json] [--metrics]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import analytics
+import cli
+import metrics
+from analytics_cache import AnalyticsCache
+from scheduler import ExpiryScheduler
+from cli import CommandError
+from database import open_database
+from habit import Habit
+from registry import HabitRegistry
+
+SAVE_DELAY = 0.05              # seconds changes are collected before they are saved together
+MAX_BODY = 64 * 1024           # largest request body accepted, in bytes
+
+
+class NotFound(CommandError):
+    # The request names a habit that does not exist.
+    pass
+
+
+class HabitService:
+    """
+    - In-memory habits behind async operations, with batched background saves.
+    - All methods must be called from the same event loop. The habits are only touched there,
+      the worker thread only gets copies to save.
+    """
+
+    def __init__(self, db, save_delay=SAVE_DELAY):
+        """
+        Arguments:
+            db (HabitDatabase): Database the habits are loaded from and saved to (any storage mode).
+            save_delay (float): Seconds to wait after a change so later changes are saved with it.
+        """
+        self.db = db
+        self.save_delay = save_delay
+        self.habits = HabitRegistry()
+        self.cache = AnalyticsCache(self.habits)
+        self.scheduler = ExpiryScheduler(self.habits)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="habit-save")   # one save at a time
+        self._saving = None            # task of the pending save, if any
+        self._save_lock = asyncio.Lock()    # held while a save runs in the worker thread
+
+    async def start(self):
+        """
+        Load the habits (in the worker thread).
+        """
+        loop = asyncio.get_running_loop()
+        dicts = await loop.run_in_executor(self._executor, self.db.load_habits)
+        self.habits = HabitRegistry(Habit.from_dict(d) for d in dicts)
+        self.cache = AnalyticsCache(self.habits)              # answers the queries without re-evaluating unchanged habits
+        self.scheduler = ExpiryScheduler(self.habits)         # expires broken streaks when their day comes
+
+    # ----- changes -----
+
+    async def add(self, name, description='', periodicity='daily'):
+        """
+        Add a new habit.
+
+        Returns:
+            dict: The new habit.
+
+        Raises:
+            CommandError: If the periodicity is invalid or the name is taken.
+        """
+        async with self._guard():
+            cli.add(self.habits, self.db, name, description, periodicity)
+            habit = self.habits.get(name).to_dict()
+        self._changed()
+        return habit
+
+    async def checkoff(self, name, date=None):
+        """
+        Check off a habit, today or on the given "YYYY-MM-DD" date.
+
+        Returns:
+            dict: The updated habit.
+
+        Raises:
+            NotFound: If there is no habit with that name.
+        """
+        async with self._guard():
+            if name not in self.habits:
+                raise NotFound(f"no habit named '{name}'")
+            cli.checkoff(self.habits, self.db, name, date)
+            habit = self.habits.get(name).to_dict()
+        self._changed()
+        return habit
+
+    async def remove(self, name):
+        """
+        Remove a habit.
+
+        Raises:
+            NotFound: If there is no habit with that name.
+        """
+        async with self._guard():
+            if name not in self.habits:
+                raise NotFound(f"no habit named '{name}'")
+            cli.remove(self.habits, self.db, name)
+        self._changed()
+
+    # ----- the queries of main.analyze -----
+
+    async def all_habits(self):
+        """
+        All habits (option 1), with broken streaks reset first like main.analyze does.
+        """
+        await self._roll_over()
+        return [h.to_dict() for h in analytics.habits_list(self.habits)]
+
+    async def habits_by_periodicity(self, freq):
+        """
+        Habits with the given periodicity (option 2).
+        """
+        await self._roll_over()
+        return [h.to_dict() for h in self.cache.same_periodicity_habits(freq)]
+
+    async def _roll_over(self):
+        # Reset the streaks that broke since the last roll-over, and save the resets like any other change.
+        async with self._guard():
+            reset = self.scheduler.roll_over()
+            for name in reset:
+                self.db.log_event('reset', self.habits.get(name))
+        if reset:
+            self._changed()
+
+    async def longest_streak(self):
+        """
+        Longest streak of all habits (option 3).
+        """
+        return self.cache.longest_streak()
+
+    async def habit_longest_streak(self, name):
+        """
+        Longest streak of one habit (option 4), 0 if there is no such habit.
+        """
+        return analytics.habit_longest_streak(self.habits, name)
+
+    # ----- saving -----
+
+    def _guard(self):
+        # Changes wait for a running save only if the storage cannot record them during one
+        # (see HabitDatabase.concurrent_events); with the JSON and SQLite modes they never wait.
+        return nullcontext() if self.db.concurrent_events else self._save_lock
+
+    def _changed(self):
+        # Start a delayed save unless one is already waiting; it will pick this change up too.
+        if self._saving is None or self._saving.done():
+            self._saving = asyncio.get_running_loop().create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        await self.flush()
+
+    async def flush(self):
+        """
+        Save now (in the worker thread) if anything changed.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._save_lock:
+            while self.db.dirty:
+                version = self.db.version                             # the snapshot below contains exactly this version
+                snapshot = [h.to_dict() for h in self.habits]
+                await loop.run_in_executor(self._executor, self.db.save_habits, snapshot, version)   # changes made during the save stay unsaved
+
+    async def close(self):
+        """
+        Save the remaining changes and stop the worker thread.
+        """
+        if self._saving is not None and not self._saving.done():
+            self._saving.cancel()
+        await self.flush()
+        self._executor.shutdown()
+
+
+# ------------------------------------------- HTTP ENDPOINT -------------------------------------------
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+
+async def route(service, method, target, body):
+    """
+    Run one request against the service.
+
+    Returns:
+        tuple: (HTTP status, JSON-serializable result, or a str sent as plain text)
+    """
+    url = urlsplit(target)
+    parts = [unquote(p) for p in url.path.strip('/').split('/')]
+    data = json.loads(body) if body else {}
+    if not isinstance(data, dict):
+        raise CommandError("the request body must be a JSON object")
+
+    if parts == ['habits']:
+        if method == 'GET':
+            freq = parse_qs(url.query).get('periodicity')
+            return 200, await (service.habits_by_periodicity(freq[0]) if freq else service.all_habits())
+        if method == 'POST':
+            if 'name' not in data:
+                raise CommandError("'name' is required")
+            return 201, await service.add(data['name'], data.get('description', ''), data.get('periodicity', 'daily'))
+    elif parts == ['metrics'] and method == 'GET':
+        if parse_qs(url.query).get('format') == ['prometheus']:
+            return 200, metrics.REGISTRY.to_prometheus()
+        return 200, metrics.REGISTRY.snapshot()
+    elif parts == ['longest-streak'] and method == 'GET':
+        return 200, {'longest_streak': await service.longest_streak()}
+    elif len(parts) == 2 and parts[0] == 'habits' and method == 'DELETE':
+        await service.remove(parts[1])
+        return 200, {'removed': parts[1]}
+    elif len(parts) == 3 and parts[0] == 'habits':
+        if parts[2] == 'checkoff' and method == 'POST':
+            return 200, await service.checkoff(parts[1], data.get('date'))
+        if parts[2] == 'longest-streak' and method == 'GET':
+            return 200, {'name': parts[1], 'longest_streak': await service.habit_longest_streak(parts[1])}
+    else:
+        return 404, {'error': f"unknown path {url.path}"}
+    return 405, {'error': f"{method} is not supported on {url.path}"}
+
+
+async def handle(service, reader, writer):
+    """
+    Serve the requests of one connection (kept open between requests unless the client asks to close it).
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break                                           # client closed the connection
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                headers[key.strip().lower()] = value.strip()
+
+            length = int(headers.get('content-length', 0))
+            if length > MAX_BODY:
+                status, result = 413, {'error': "request body too large"}
+                body = None
+            else:
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, result = await route(service, method.upper(), target, body)
+                except NotFound as e:
+                    status, result = 404, {'error': str(e)}
+                except (CommandError, ValueError) as e:          # bad periodicity, duplicate name, bad date or JSON ...
+                    status, result = 400, {'error': str(e)}
+
+            if isinstance(result, str):
+                payload, content_type = result.encode('utf-8'), 'text/plain; version=0.0.4'     # Prometheus text format
+            else:
+                payload, content_type = json.dumps(result).encode('utf-8'), 'application/json'
+            keep_alive = body is not None and headers.get('connection', '').lower() != 'close'
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass                                                    # broken or malformed request: drop the connection
+    finally:
+        writer.close()
+
+
+async def serve(service, host='127.0.0.1', port=8080):
+    """
+    Start the HTTP endpoint for a started service.
+
+    Returns:
+        asyncio.Server: The listening server (port 0 picks a free port, see server.sockets).
+    """
+    return await asyncio.start_server(lambda r, w: handle(service, r, w), host, port)
+
+
+async def run(filename, backend, host, port):
+    service = HabitService(open_database(filename, backend))
+    await service.start()
+    server = await serve(service, host, port)
+    print(f"serving {len(service.habits)} habits on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Habit tracker HTTP/JSON service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--file', help="habits file (default habits.json, or habits.db for sqlite)")
+    parser.add_argument('--storage', default=os.environ.get('HABIT_STORAGE', 'json'), help="json, log, shared or sqlite")
+    parser.add_argument('--metrics', action='store_true', help="record operation metrics (served on /metrics)")
+    args = parser.parse_args(argv)
+    filename = args.file or ('habits.db' if args.storage == 'sqlite' else 'habits.json')
+    if args.metrics:
+        metrics.enable()
+    try:
+        asyncio.run(run(filename, args.storage, args.host, args.port))
+    except KeyboardInterrupt:
+        pass                                                    # the changes were saved while shutting down
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+# sharding.py
+
+"""
+Sharding Module
+
+- HabitDatabase keeps all habits in one file. With one tracker per user on the same host that means either
+  one huge file for everybody or thousands of loose files nobody keeps track of.
+
+- ShardedHabitStore keeps everything under one root folder: one folder per user, and inside it the user's
+  habits spread over a fixed number of shard files by a hash of the habit name:
+
+      root/store.json            number of shards and storage mode, fixed when the store is created
+      root/<user>/shard_00.json
+      root/<user>/shard_01.json
+      ...
+
+- Each shard is an ordinary database from database.py (any storage mode), so a request about one habit
+  only loads the one shard that can contain it.
+
+- Aggregate analytics over all users (global longest streak, habits per periodicity) summarize every shard
+  in a separate process and merge the results.
+
+Can also be run on a store:
+    python sharding.py habits_root
+"""
+
+import json
+import os
+import sys
+import zlib                                          # crc32: a name hash that is the same in every process
+from concurrent.futures import ProcessPoolExecutor
+
+import analytics
+from database import open_database
+
+META_FILE = 'store.json'
+
+
+def shard_summary(filename, backend='json', current_date=None, broken=False):
+    """
+    Summarize the habits of one shard file (analytics.summarize).
+    Module level so it can be sent to a worker process.
+    """
+    db = open_database(filename, backend)
+    try:
+        return analytics.summarize(db.iter_habits(), current_date, broken)
+    finally:
+        if hasattr(db, 'close'):
+            db.close()
+
+
+class ShardedHabitStore:
+    """
+    - Habits of many users under one root folder, one folder per user, split over `shards` files per user.
+    - Habits are passed in and returned as dictionaries, like the databases in database.py.
+    """
+
+    def __init__(self, root, shards=None, backend=None, **options):
+        """
+        Open (or create) a store.
+
+        Arguments:
+            root (str): Folder holding the store.
+            shards (int): Number of shard files per user. Only needed when the store is created;
+                          an existing store keeps the number it was created with.
+            backend (str): Storage mode of the shard files (see database.BACKENDS, default 'json').
+                           Like `shards`, an existing store keeps the mode it was created with.
+            options: Extra keyword arguments passed to every shard database (e.g. fsync=True).
+
+        Raises:
+            ValueError: If `shards` or `backend` do not match an existing store.
+        """
+        self.root = str(root)
+        meta_file = os.path.join(self.root, META_FILE)
+        if os.path.exists(meta_file):
+            with open(meta_file, 'r') as f:
+                meta = json.load(f)
+            if shards is not None and shards != meta['shards']:
+                raise ValueError(f"This store was created with {meta['shards']} shards, not {shards}.")
+            if backend is not None and backend != meta['backend']:
+                raise ValueError(f"This store uses the '{meta['backend']}' storage mode, not '{backend}'.")
+        else:
+            meta = {'shards': shards or 1, 'backend': backend or 'json'}
+            if meta['shards'] < 1:
+                raise ValueError("A store needs at least one shard.")
+            os.makedirs(self.root, exist_ok=True)
+            with open(meta_file, 'w') as f:
+                json.dump(meta, f, indent=4)
+        self.shards = meta['shards']
+        self.backend = meta['backend']
+        self.options = options
+        self._open = {}              # (user, shard) -> database, opened on first use
+
+    # ----- layout -----
+
+    def shard_of(self, name):
+        """
+        Return the number of the shard a habit name belongs to.
+        """
+        return zlib.crc32(name.encode('utf-8')) % self.shards
+
+    def shard_path(self, user, shard):
+        """
+        Return the path of one shard file of a user.
+        """
+        extension = 'db' if self.backend == 'sqlite' else 'json'
+        return os.path.join(self._user_dir(user), f"shard_{shard:02d}.{extension}")
+
+    def _user_dir(self, user):
+        # User names become folder names, so anything that could leave the root is refused.
+        if not user or user in ('.', '..') or '/' in user or '\\' in user or user == META_FILE:
+            raise ValueError(f"'{user}' cannot be used as a user name.")
+        return os.path.join(self.root, user)
+
+    def users(self):
+        """
+        Return the names of all users with a folder in the store, sorted.
+        """
+        return sorted(e.name for e in os.scandir(self.root) if e.is_dir())
+
+    def shard_files(self, user=None):
+        """
+        Return the existing shard files of one user, or of every user.
+        """
+        users = [user] if user is not None else self.users()
+        return [self.shard_path(u, i) for u in users for i in range(self.shards) if os.path.exists(self.shard_path(u, i))]
+
+    def database(self, user, shard):
+        """
+        Return the database of one shard of a user (opened once, then reused).
+        """
+        key = (user, shard)
+        if key not in self._open:
+            os.makedirs(self._user_dir(user), exist_ok=True)
+            self._open[key] = open_database(self.shard_path(user, shard), self.backend, **self.options)
+        return self._open[key]
+
+    # ----- habits of one user -----
+
+    def load_habits(self, user):
+        """
+        Load all habits of a user.
+
+        Returns:
+            list: Habit dictionaries, shard by shard.
+        """
+        if not os.path.isdir(self._user_dir(user)):
+            return []
+        return [h for i in range(self.shards) for h in self.database(user, i).load_habits()]
+
+    def save_habits(self, user, habits):
+        """
+        Save all habits of a user; every habit goes to the shard of its name.
+
+        Argument:
+            habits (iterable): Habit dictionaries.
+        """
+        parts = [[] for _ in range(self.shards)]
+        for h in habits:
+            parts[self.shard_of(h['name'])].append(h)
+        for i, part in enumerate(parts):
+            if part or os.path.exists(self.shard_path(user, i)):        # do not create empty shard files
+                self.database(user, i).save_habits(part)
+
+    def get_habit(self, user, name):
+        """
+        Return a user's habit with the given name, or None. Only its shard is read.
+        """
+        if not os.path.exists(self.shard_path(user, self.shard_of(name))):
+            return None
+        return self.database(user, self.shard_of(name)).get_habit(name)
+
+    def update_habit(self, user, habit):
+        """
+        Replace (or add) one habit of a user. Only its shard is rewritten.
+        """
+        self.database(user, self.shard_of(habit['name'])).update_habit(habit)
+
+    def delete_habit(self, user, name):
+        """
+        Delete one habit of a user. Only its shard is rewritten.
+
+        Returns:
+            bool: True if a habit was deleted.
+        """
+        if not os.path.exists(self.shard_path(user, self.shard_of(name))):
+            return False
+        return self.database(user, self.shard_of(name)).delete_habit(name)
+
+    # ----- analytics over the whole store -----
+
+    def summary(self, user=None, current_date=None, workers=None):
+        """
+        Global figures over all shards (of one user, or of every user), computed in parallel.
+
+        Arguments:
+            user (str): Only summarize this user (default: everybody).
+            current_date (date): Day the streaks are evaluated on (default today).
+            workers (int): Number of worker processes (default: one per CPU; 1 runs everything in this process).
+
+        Returns:
+            dict: {'habits', 'longest_streak', 'by_periodicity'} like analytics.summarize.
+        """
+        files = self.shard_files(user)
+        if workers == 1 or len(files) <= 1:
+            return analytics.merge_summaries(shard_summary(f, self.backend, current_date) for f in files)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            n = len(files)
+            return analytics.merge_summaries(pool.map(shard_summary, files, [self.backend] * n, [current_date] * n))
+
+    def longest_streak(self, user=None, current_date=None, workers=None):
+        """
+        Longest valid streak over all shards, like analytics.longest_streak.
+        """
+        return self.summary(user, current_date, workers)['longest_streak']
+
+    def periodicity_counts(self, user=None, workers=None):
+        """
+        Number of habits per periodicity over all shards.
+        """
+        return self.summary(user, workers=workers)['by_periodicity']
+
+    def close(self):
+        """
+        Close the shard databases that hold a connection (SQLite).
+        """
+        for db in self._open.values():
+            if hasattr(db, 'close'):
+                db.close()
+        self._open.clear()
+
+
+if __name__ == '__main__':
+    # Print the summary of a whole store as JSON.
+    store = ShardedHabitStore(sys.argv[1] if len(sys.argv) > 1 else 'habits_root')
+    print(json.dumps(store.summary(), indent=4))
@@ -0,0 +1,132 @@
+# streak_timeline.py
+
+"""
+Streak Timeline Module
+
+- analytics.streak_evaluate answers "is this streak still valid on day D?" for one habit and one day,
+  so a dashboard showing the streak status for every day of the last year needs 365 passes over all habits.
+
+- A stored streak stays valid up to the day before its break day (analytics.streak_break_day) and is broken
+  from that day on; habits with an unknown periodicity never break, habits never checked off are always 0.
+  StreakTimeline looks at every habit once, sorts the breakable streaks by break day and keeps, for every
+  position in that order, the longest streak breaking at or after it (suffix maxima). Then:
+    * any single day is answered with one binary search: O(log N),
+    * a range of days is swept with a cursor moving forward through the sorted break days:
+      O(N log N) to build plus O(days + N) for the sweep, instead of O(days x N).
+
+- Every figure equals what analytics.streak_evaluate gives for that day:
+      longest_streak(day)   like analytics.longest_streak evaluated on that day
+      broken(day)           number of habits analytics.reset_broken_streaks would reset on that day
+      valid(day)            number of habits with a streak > 0 on that day
+
+Can also be run on a habits file (status of each of the last N days, as JSON):
+    python streak_timeline.py habits.json [days]
+"""
+
+import datetime
+import json
+import sys
+from bisect import bisect_right
+
+import analytics
+from database import HabitDatabase
+
+
+class StreakTimeline:
+    """
+    - Streak status of a collection of habits on any day, built in one pass over the habits.
+    - The habits are read once; later changes to them are not seen (build a new timeline).
+    """
+
+    def __init__(self, habits):
+        """
+        Argument:
+            habits: Any iterable of habits (Habit objects or habit dictionaries, e.g. HabitDatabase.iter_habits()).
+        """
+        self._habits = {}              # name -> (break day or None, streak), for streak(name, day)
+        breakable = []                 # (break day, streak) of the habits whose streak can break
+        self.always = 0                # longest streak that never breaks (unknown periodicity)
+        self.always_valid = 0          # habits with a streak > 0 that never breaks
+        self.never_valid = 0           # habits with a streak > 0 but no check-off: broken on every day
+        for h in habits:
+            streak = h['streak']
+            if analytics.last_ordinal(h) is None:
+                self._habits[h['name']] = (0, streak)            # broken from the first day on
+                self.never_valid += streak > 0
+                continue
+            day = analytics.streak_break_day(h)
+            self._habits[h['name']] = (day, streak)
+            if day is None:
+                self.always = max(self.always, streak)
+                self.always_valid += streak > 0
+            elif streak > 0:                                      # a streak of 0 changes none of the figures
+                breakable.append((day, streak))
+        breakable.sort()
+        self.breaks = [day for day, _ in breakable]               # sorted break days
+        self._suffix = [0] * (len(breakable) + 1)                 # _suffix[i]: longest streak among breakable[i:]
+        for i in range(len(breakable) - 1, -1, -1):
+            self._suffix[i] = max(self._suffix[i + 1], breakable[i][1])
+
+    # ----- one day -----
+
+    def _position(self, day):
+        # Number of breakable streaks broken on `day` (their break day is on or before it).
+        return bisect_right(self.breaks, day.toordinal())
+
+    def longest_streak(self, day):
+        """
+        Longest valid streak on the given day.
+        """
+        return max(self.always, self._suffix[self._position(day)])
+
+    def valid(self, day):
+        """
+        Number of habits whose streak is valid (> 0) on the given day.
+        """
+        return self.always_valid + len(self.breaks) - self._position(day)
+
+    def broken(self, day):
+        """
+        Number of habits with a stored streak that counts as broken on the given day.
+        """
+        return self.never_valid + self._position(day)
+
+    def streak(self, name, day):
+        """
+        Effective streak of one habit on the given day (analytics.streak_evaluate), 0 if there is no such habit.
+        """
+        day_breaks, streak = self._habits.get(name, (0, 0))
+        return streak if day_breaks is None or day.toordinal() < day_breaks else 0
+
+    # ----- a range of days -----
+
+    def sweep(self, start, end):
+        """
+        Status of every day from start to end (both included), in one forward sweep.
+
+        Returns:
+            list: {'date', 'longest_streak', 'valid', 'broken'} per day.
+        """
+        rows = []
+        position, n = 0, len(self.breaks)
+        for day in range(start.toordinal(), end.toordinal() + 1):
+            while position < n and self.breaks[position] <= day:      # streaks that broke by this day
+                position += 1
+            rows.append({
+                'date': datetime.date.fromordinal(day).isoformat(),
+                'longest_streak': max(self.always, self._suffix[position]),
+                'valid': self.always_valid + n - position,
+                'broken': self.never_valid + position,
+            })
+        return rows
+
+
+def main(filename, days=365):
+    # Print the status of the last `days` days as JSON.
+    timeline = StreakTimeline(HabitDatabase(filename).iter_habits())
+    today = datetime.date.today()
+    print(json.dumps(timeline.sweep(today - datetime.timedelta(days=days - 1), today), indent=4))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else 'habits.json', *(int(a) for a in sys.argv[2:3]))
@@ -2,10 +2,26 @@ import os
 import json
 import pytest
 import datetime
+import time
+import asyncio
+import threading
 
 from habit import Habit
-from database import HabitDatabase
+from database import HabitDatabase, HabitLogDatabase, SharedHabitDatabase, SQLiteHabitDatabase, AutoSaver, open_database, iter_json_array
+from database import fcntl
 import analytics
+import cli
+from registry import HabitRegistry
+from analytics_cache import AnalyticsCache
+from scheduler import ExpiryScheduler
+from streak_timeline import StreakTimeline
+from search import HabitSearch
+from sharding import ShardedHabitStore
+import parallel_analytics
+from service import HabitService, NotFound, serve
+from binary_store import BinaryHabitFile, convert
+import reports
+import metrics
 
 # test_habit_tracker.py
 
@@ -64,6 +80,19 @@ def tempfile(tmp_path):
     return tmp_path / "test_habits.json"
 
 
+@pytest.fixture(params=["json", "sqlite"])
+def database(request, tempfile):
+    """
+    Fixture that returns an empty HabitDatabase for every storage backend,
+    so the database tests run against both the JSON file and SQLite.
+    The SQLite connection is closed after the test.
+    """
+    db = open_database(tempfile, request.param)
+    yield db
+    if request.param == "sqlite":
+        db.close()
+
+
 # ---------- HABIT CLASS TEST ----------
 
 # Testing the Habit class to ensure individual habit attributes work correctly.
@@ -86,12 +115,141 @@ def test_addhabit():
     assert isinstance(h.to_dict(), dict) # Ensure to_dict() returns a dictionary representation of the habit.
 
 
+def test_habit_roundtrip(example):
+    """
+    Tests converting habit dictionaries to Habit objects and back.
+
+    - Dates are stored as day numbers but still read as "YYYY-MM-DD" strings.
+    - Unknown keys survive the round trip.
+    - Dictionary-style access keeps working.
+    """
+    d = dict(example[2], colour="red", longest_streak=8, completions=["2025-05-01", example[2]["last_completed"]])
+    h = Habit.from_dict(d)
+    assert h.last == datetime.date.today().toordinal() - 3
+    assert h.last_completed == d["last_completed"]
+    assert h["streak"] == 5 and h.get("colour") == "red" and h["longest_streak"] == 8
+    assert h.total_completions == 2
+    assert h.to_dict() == d
+
+    h["streak"] = 0
+    assert h.streak == 0
+    with pytest.raises(AttributeError):
+        h.colour = "red"              # __slots__: no per-object __dict__
+
+
+def test_habit_check_off():
+    """
+    Tests that check_off continues a streak on time and restarts it after a gap.
+    """
+    day = datetime.date(2025, 5, 1)
+    h = Habit("read", "Read a book", "daily")
+    h.check_off(day)
+    h.check_off(day + datetime.timedelta(days=1))
+    assert h.streak == 2 and h.last_completed == "2025-05-02"
+    h.check_off(day + datetime.timedelta(days=5))
+    assert h.streak == 1
+
+    assert h.longest == 2 and h.total_completions == 3
+    assert not h.check_off(day)                            # already recorded: nothing changes
+    assert h.streak == 1
+
+    w = Habit("clean", "Clean the flat", "weekly")
+    w.check_off(day)
+    w.check_off(day + datetime.timedelta(days=7))
+    assert w.streak == 2
+
+
+def test_calendar_periods():
+    """
+    Tests that streaks follow calendar periods instead of day gaps.
+
+    - Weekly: Monday and the Sunday of the next week (13 days apart) continue the streak,
+      Sunday to the Monday two weeks later breaks it.
+    - Monthly: 31 January to 1 February continues, 1 January to 1 March breaks.
+    """
+    monday = datetime.date(2025, 5, 5)
+    w = Habit("clean", "Clean the flat", "weekly")
+    w.check_off(monday)
+    w.check_off(monday + datetime.timedelta(days=13))
+    assert w.streak == 2
+    w.check_off(monday + datetime.timedelta(days=14 + 7))
+    assert w.streak == 1
+    assert w.breaks_on == datetime.date(2025, 6, 9).toordinal()      # Monday after the next full week
+
+    m = Habit("budget", "Check the budget", "monthly")
+    m.check_off(datetime.date(2025, 1, 31))
+    m.check_off(datetime.date(2025, 2, 1))
+    assert m.streak == 2
+    m.check_off(datetime.date(2025, 4, 1))
+    assert m.streak == 1
+
+    d = Habit("run", "Go running", "every-3-days")
+    for day in (1, 3, 6, 10):                             # same block, next block, then one block skipped
+        d.check_off(datetime.date(2025, 3, 1) + datetime.timedelta(days=day))
+    assert (d.streak, d.longest) == (1, 2)
+
+
+def test_streak_evaluate_weekly():
+    """
+    Tests that a weekly habit stays valid through the whole following ISO week.
+    """
+    habit = {"name": "journal", "periodicity": "weekly", "last_completed": "2025-05-05", "streak": 4}   # a Monday
+    assert analytics.streak_evaluate(habit, datetime.date(2025, 5, 18)) == 4      # Sunday of the next week
+    assert analytics.streak_evaluate(habit, datetime.date(2025, 5, 19)) == 0      # a whole week was skipped
+    assert analytics.streak_evaluate(Habit.from_dict(dict(habit, description="", date_created="2025-05-01")),
+                                     datetime.date(2025, 5, 18)) == 4
+
+
+def test_habit_backfill():
+    """
+    Tests that a check-off added out of order is inserted into the history
+    and that current and longest streak are recounted.
+    """
+    day = datetime.date(2025, 5, 1)
+    h = Habit("read", "Read a book", "daily")
+    for offset in (0, 2, 3, 4):
+        h.check_off(day + datetime.timedelta(days=offset))
+    assert (h.streak, h.longest) == (3, 3)
+
+    h.check_off(day + datetime.timedelta(days=1))           # the missing day, entered late
+    assert (h.streak, h.longest) == (5, 5)
+    assert h.last_completed == "2025-05-05"
+
+    h.check_off(day - datetime.timedelta(days=10))
+    assert (h.streak, h.longest, h.total_completions) == (5, 5, 6)
+
+    h['streak'] = 0                                          # broken and reset by an expiry
+    h.check_off(day - datetime.timedelta(days=1))
+    assert (h.streak, h.longest) == (0, 6)                   # the history has a longer run, the current streak stays reset
+
+    gap = Habit("walk", "", "daily")
+    for offset in (0, 1, 2):
+        gap.check_off(datetime.date(2025, 1, 1) + datetime.timedelta(days=offset))
+    gap['streak'] = 0                                        # reset while Jan 4 was still missing
+    gap.check_off(datetime.date(2025, 1, 4))                 # the missing day, entered late
+    assert (gap.streak, gap.longest) == (4, 4)
+    today = datetime.date.today()
+    alive = Habit("stretch", "", "daily")
+    for offset in (0, 1, 3):
+        alive.check_off(today - datetime.timedelta(days=3 - offset))
+    alive['streak'] = 0                                      # reset by the gap two days ago
+    alive.check_off(today - datetime.timedelta(days=1))      # the gap, filled late
+    assert (alive.streak, alive.longest) == (4, 4)
+
+    legacy = Habit.from_dict({"name": "run", "description": "", "periodicity": "daily", "date_created": "2025-01-01",
+                              "last_completed": "2025-05-10", "streak": 40, "longest_streak": 40})
+    legacy.check_off(datetime.date(2025, 5, 1))                # within the stored streak, which the history does not cover
+    assert (legacy.streak, legacy.longest) == (40, 40)
+    legacy.check_off(datetime.date(2025, 3, 31))               # the day just before it
+    assert (legacy.streak, legacy.longest) == (41, 41)
+
+
 # ---------- DATABASE MODULE TEST ----------
 
 # Tests saving and loading operations within the HabitDatabase.
 
 
-def test_saveload(example, tempfile):
+def test_saveload(example, database):
     """
     Tests saving and loading habits in the HabitDatabase.
 
@@ -99,24 +257,766 @@ def test_saveload(example, tempfile):
     - Loads the data back to verify correctness.
     - checks that the saved and loaded data match exactly.
     """
-    # Create a HabitDatabase instance with the temporary file path
-    db = HabitDatabase(tempfile)                   # tempfile is a fixture that provides a temporary file path for testing.
+    db = database                     # database is a fixture that provides an empty database on a temporary file.
     # Save the example habits to the file
     db.save_habits(example)
     loaded = db.load_habits()            # Load the habits back from the file
     assert loaded == example
 
 
-def test_emptyfileload(tempfile):   
+def test_emptyfileload(database):   
     """
     Tests loading habits from an empty file.
 
     - Ensures an empty habit database returns an empty list.
     """
-    # Create a HabitDatabase instance with the temporary file path
-    # and check if it returns an empty list when no habits are saved.
+    # check if the database returns an empty list when no habits are saved.
+    assert database.load_habits() == []
+
+
+def test_streaming(example, tmp_path):
+    """
+    Tests streaming habits in and out of JSON array and JSON Lines files.
+
+    - The streamed array file is identical to the old json.dump(indent=4) output.
+    - Tiny read chunks still give back every habit.
+    - Analytics work directly on the stream.
+    """
+    db = HabitDatabase(tmp_path / "stream.json")
+    db.save_habits(h for h in example)                      # a generator, not a list
+    with open(db.filename) as f:
+        assert f.read() == json.dumps(example, indent=4)
+    with open(db.filename) as f:
+        assert list(iter_json_array(f, chunk_size=7)) == example
+
+    lines = HabitDatabase(tmp_path / "stream.jsonl")
+    lines.save_habits(db.iter_habits())
+    assert lines.load_habits() == example
+    assert analytics.longest_streak(lines.iter_habits()) == 3
+    assert [h["name"] for h in analytics.iter_same_periodicity(lines.iter_habits(), "weekly")] == ["journal"]
+    assert analytics.longest_streak(iter([])) == 0
+
+
+def test_atomic_save(example, tempfile, monkeypatch):
+    """
+    Tests that a save failing halfway leaves the old file untouched,
+    and that unchanged data is not written again.
+    """
+    db = HabitDatabase(tempfile, fsync=True)
+    db.save_habits(example)
+
+    def broken_dumps(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(json, "dumps", broken_dumps)
+    with pytest.raises(OSError):
+        db.save_habits(example[:1])
+    monkeypatch.undo()
+    assert db.load_habits() == example
+    assert not os.path.exists(f"{tempfile}.tmp")
+
+    assert not db.dirty
+    assert not db.save_if_dirty([])                       # nothing changed: the file is not rewritten
+    db.log_event('checkoff', example[0])
+    assert db.dirty
+    assert db.save_if_dirty(example[:1])
+    assert not db.dirty and db.load_habits() == example[:1]
+
+
+def test_autosave(example, tempfile):
+    """
+    Tests that AutoSaver saves in the background after the configured number of changes,
+    and saves the rest when stopped.
+    """
     db = HabitDatabase(tempfile)
-    assert db.load_habits() == []
+    habits = []
+    saver = AutoSaver(db, lambda: list(habits), every=2)
+    saver.start()
+    habits.append(example[0])
+    db.mark_dirty()
+    habits.append(example[1])
+    db.mark_dirty()
+    for _ in range(200):                                   # wait up to 2 seconds for the background save
+        if not db.dirty:
+            break
+        time.sleep(0.01)
+    assert db.load_habits() == example[:2]
+
+    habits.append(example[2])
+    db.mark_dirty()
+    saver.stop()
+    assert db.load_habits() == example
+
+
+def test_autosave_change_during_snapshot(example, tempfile):
+    """
+    Tests that a change made in another thread while AutoSaver copies the habits is not marked as saved,
+    and ends up on disk.
+    """
+    db = HabitDatabase(tempfile)
+    habits = [example[0]]
+
+    def get_habits():
+        snapshot = list(habits)
+        if len(habits) == 1:                               # the main thread adds a habit while the copy is being made
+            main = threading.Thread(target=lambda: (habits.append(example[1]), db.log_event('add', example[1])))
+            main.start()
+            main.join()
+        return snapshot
+
+    saver = AutoSaver(db, get_habits)
+    db.log_event('add', example[0])
+    assert saver.flush()
+    assert not db.dirty and db.load_habits() == example[:2]
+
+
+def test_sqlite_autosave_rows(example, tmp_path, monkeypatch):
+    """
+    Tests that AutoSaver writes only the changed rows of an SQLite database instead of the whole table.
+    """
+    db = SQLiteHabitDatabase(tmp_path / "habits.db")
+    db.save_habits(example)
+    habits = [Habit.from_dict(d) for d in example]
+    saver = AutoSaver(db, lambda: [h.to_dict() for h in habits])
+
+    def no_rewrite(*args, **kwargs):
+        raise AssertionError("the whole table was rewritten")
+
+    monkeypatch.setattr(db, "save_habits", no_rewrite)
+    habits[0].check_off(datetime.date.today() + datetime.timedelta(days=1))
+    db.log_event('checkoff', habits[0])
+    db.log_event('remove', habits.pop(2))
+    assert saver.flush() and not db.dirty
+    loaded = db.load_habits()
+    assert [h['name'] for h in loaded] == ["exercise", "journal"] and loaded[0] == habits[0].to_dict()
+    db.close()
+
+
+def shared_worker(path, worker, rounds):
+    """
+    One process of the concurrency test: each round loads the shared file, checks off the shared habit
+    on its own day, adds a habit of its own and saves.
+    """
+    for i in range(rounds):
+        db = SharedHabitDatabase(path)
+        habits = HabitRegistry(Habit.from_dict(d) for d in db.load_habits())
+        shared = habits.get("shared")
+        shared.check_off(datetime.date(2025, 1, 1) + datetime.timedelta(days=worker * rounds + i))
+        db.log_event('checkoff', shared)
+        mine = Habit(f"worker {worker} habit {i}", "", "daily")
+        habits.append(mine)
+        db.log_event('add', mine.to_dict())
+        db.save_habits([h.to_dict() for h in habits])
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl file locks")
+def test_shared_database_concurrent(tmp_path):
+    """
+    Tests that concurrent processes saving to the same file lose none of each other's changes.
+    """
+    import multiprocessing
+    path = str(tmp_path / "shared.json")
+    HabitDatabase(path).save_habits([Habit("shared", "", "daily").to_dict()])
+
+    workers, rounds = 4, 10
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=shared_worker, args=(path, w, rounds)) for w in range(workers)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+        assert p.exitcode == 0
+
+    habits = {h["name"]: h for h in HabitDatabase(path).load_habits()}
+    assert len(habits) == 1 + workers * rounds                     # every added habit survived
+    assert len(habits["shared"]["completions"]) == workers * rounds  # every check-off survived
+    assert habits["shared"]["version"] == workers * rounds
+
+
+def test_shared_database_merge(example, tempfile):
+    """
+    Tests merging a changed habit with a change another process saved in the meantime.
+    """
+    SharedHabitDatabase(tempfile).save_habits(example)
+    one, two = SharedHabitDatabase(tempfile), SharedHabitDatabase(tempfile)
+    mine, theirs = ({h["name"]: Habit.from_dict(h) for h in db.load_habits()} for db in (one, two))
+
+    theirs["exercise"].check_off(datetime.date(2025, 1, 2))
+    two.log_event('checkoff', theirs["exercise"])
+    two.log_event('remove', theirs["journal"])
+    two.save_habits([h.to_dict() for name, h in theirs.items() if name != "journal"])
+
+    mine["exercise"].check_off(datetime.date(2025, 1, 1))
+    one.log_event('checkoff', mine["exercise"])
+    merged = {h["name"]: h for h in one.merge_save([h.to_dict() for h in mine.values()])}
+
+    assert "journal" not in merged                                  # their removal is kept
+    assert {"2025-01-01", "2025-01-02"} <= set(merged["exercise"]["completions"])
+    assert merged["exercise"]["version"] == 3                        # first save, their save, our save
+
+
+def test_shared_change_during_snapshot(example, tempfile):
+    """
+    Tests that a check-off logged while AutoSaver copies the habits of a shared database is merged by the next save.
+    """
+    SharedHabitDatabase(tempfile).save_habits(example)
+    db = SharedHabitDatabase(tempfile)
+    habits = [Habit.from_dict(h) for h in db.load_habits()]
+    day = datetime.date.today() + datetime.timedelta(days=1)
+
+    def get_habits():
+        snapshot = [h.to_dict() for h in habits]
+        if habits[0].last != day.toordinal():              # the main thread checks off while the copy is being made
+            main = threading.Thread(target=lambda: (habits[0].check_off(day), db.log_event('checkoff', habits[0])))
+            main.start()
+            main.join()
+        return snapshot
+
+    db.log_event('checkoff', habits[1])
+    assert AutoSaver(db, get_habits).flush()
+    assert not db.dirty
+    assert HabitDatabase(tempfile).load_habits()[0]['last_completed'] == day.isoformat()
+
+
+def test_targeted_methods(example, database):
+    """
+    Tests reading, updating and deleting single habits.
+    """
+    database.save_habits(example)
+    assert database.get_habit("journal") == example[1]
+    assert database.get_habit("nonexistent") is None
+
+    example[0]['streak'] = 10
+    database.update_habit(example[0])
+    assert database.get_habit("exercise")['streak'] == 10
+    assert [h['name'] for h in database.habits_by_periodicity("daily")] == ["exercise", "broken"]
+
+    assert database.delete_habit("broken")
+    assert not database.delete_habit("broken")
+    assert [h['name'] for h in database.load_habits()] == ["exercise", "journal"]
+
+
+def test_name_index(example, tempfile, monkeypatch):
+    """
+    Tests single-habit operations through the name -> position index:
+
+    - Check-offs that fit the habit's slot, new habits and deletions are written in place (no full rewrite),
+      and the index changes are appended to the index file, which another instance reads back.
+    - An outdated index is rebuilt by reading the habits file, without writing it.
+    """
+    db = HabitDatabase(tempfile, index=True)
+    db.save_habits(example)
+    assert os.path.exists(db.indexfile)
+    assert db.get_habit("journal") == example[1]
+    assert db.get_habit("nonexistent") is None
+
+    example[1]['streak'] = 12
+    db.update_habit(example[1])                                    # outgrows its slot once: rewritten with room to spare
+
+    def no_rewrite(*args, **kwargs):
+        raise AssertionError("the whole file was rewritten")
+
+    monkeypatch.setattr(db, '_write_file', no_rewrite)
+    example[1]['streak'] = 13
+    db.update_habit(example[1])
+    db.update_habit(dict(example[0], name="new"))
+    assert db.delete_habit("exercise")
+    assert not db.delete_habit("exercise")
+    expected = [example[1], example[2], dict(example[0], name="new")]
+    assert HabitDatabase(tempfile).load_habits() == expected
+    with open(tempfile) as f:
+        assert json.load(f) == expected
+    other = HabitDatabase(tempfile, index=True)
+    assert [other.get_habit(h['name']) for h in expected] == expected
+    assert other.get_habit("exercise") is None
+
+    HabitDatabase(tempfile).save_habits(example[:1])            # written without updating the index
+    assert db.get_habit("exercise") == example[0]
+    assert db.get_habit("journal") is None
+    db.update_habit(example[2])
+    assert HabitDatabase(tempfile).load_habits() == [example[0], example[2]]
+
+
+def test_delta_save(example, tempfile):
+    """
+    Tests differential saves:
+
+    - Only the changed habits are written (to the delta file); the habits file is left alone.
+    - Loading and streaming merge the delta file, giving the same habits a full save would.
+    - A full save, or an indexed single-habit change, folds the delta file into the habits file;
+      an indexed read takes the habit from the delta file.
+    """
+    db = HabitDatabase(tempfile, delta=True)
+    db.save_habits(example)
+    with open(tempfile) as f:
+        before = f.read()
+
+    journal = Habit.from_dict(example[1])
+    journal.check_off(datetime.date.today() + datetime.timedelta(days=7))
+    db.log_event('checkoff', journal)
+    db.log_event('remove', example[0])
+    db.log_event('add', dict(example[0], name="new"))
+    assert db.save_changes() and not db.dirty
+    assert not db.save_changes()                                   # nothing left to save
+    with open(tempfile) as f:
+        assert f.read() == before
+    assert db.delta_records == 3
+
+    expected = [journal.to_dict(), example[2], dict(example[0], name="new")]
+    assert HabitDatabase(tempfile).load_habits() == expected
+    assert list(HabitDatabase(tempfile).iter_habits()) == expected
+
+    version = db.version
+    db.log_event('checkoff', journal)                              # logged while the habits below were being copied
+    db.save_habits(expected, version)
+    assert db.dirty and list(db.changes) == ["journal"]            # still pending for the next save
+    assert not os.path.exists(db.deltafile)
+    db.save_changes()
+
+    indexed = HabitDatabase(tempfile, index=True)
+    assert indexed.get_habit("journal") == journal.to_dict()
+    assert os.path.exists(db.deltafile)                            # reading leaves the delta file alone
+    indexed.update_habit(example[2])
+    assert not os.path.exists(db.deltafile)                        # merged before changing the file in place
+    with open(tempfile) as f:
+        assert f.read() == json.dumps(expected, indent=4)
+
+
+def test_cli_single_habit(example, tempfile, monkeypatch):
+    """
+    Tests that a single add/checkoff/remove from the command line does not load the whole file.
+    """
+    HabitDatabase(tempfile, index=True).save_habits(example)
+    monkeypatch.setattr(HabitDatabase, "load_habits", lambda self: pytest.fail("full load"))
+    assert cli.main(["--file", str(tempfile), "checkoff", "journal", "--date", "2030-01-01"]) == 0
+    assert cli.main(["--file", str(tempfile), "add", "read", "--periodicity", "weekly"]) == 0
+    assert cli.main(["--file", str(tempfile), "add", "read"]) == 1
+    assert cli.main(["--file", str(tempfile), "remove", "broken"]) == 0
+    assert cli.main(["--file", str(tempfile), "remove", "broken"]) == 1
+    monkeypatch.undo()
+
+    habits = {h['name']: h for h in HabitDatabase(tempfile).load_habits()}
+    assert list(habits) == ["exercise", "journal", "read"]
+    assert habits["journal"]['last_completed'] == "2030-01-01"
+
+
+def test_binary_store(example, tmp_path):
+    """
+    Tests the binary format.
+
+    - Converting a file written by the app JSON -> binary -> JSON gives back the identical file, unknown keys included.
+    - Single habits and streak scans are read from the mapped records.
+    """
+    example[0]["version"] = 3                              # a key the app does not know about
+    source = str(tmp_path / "habits.json")
+    HabitDatabase(source).save_habits(Habit.from_dict(h).to_dict() for h in example)
+    assert convert(source, str(tmp_path / "habits.bin")) == 3
+    convert(str(tmp_path / "habits.bin"), str(tmp_path / "back.json"))
+    with open(source) as a, open(tmp_path / "back.json") as b:
+        assert a.read() == b.read()
+
+    with BinaryHabitFile(str(tmp_path / "habits.bin")) as f:
+        assert len(f) == 3 and f.name(2) == "broken"
+        assert f.get_habit("exercise")["version"] == 3
+        assert f.get_habit("journal")["last_completed"] == example[1]["last_completed"]
+        assert f.get_habit("missing") is None
+        assert f.longest_streak() == analytics.longest_streak(example) == 3
+
+
+def test_binary_round_trip(tmp_path):
+    """
+    Tests that JSON -> binary -> JSON gives back exactly the input: the repository's habits.json (no completion
+    history or longest streak stored) and habits with null values and unsorted check-offs.
+    """
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)), "habits.json")
+    convert(source, str(tmp_path / "habits.bin"))
+    convert(str(tmp_path / "habits.bin"), str(tmp_path / "back.json"))
+    with open(source) as a, open(tmp_path / "back.json") as b:
+        assert [list(h.items()) for h in json.load(b)] == [list(h.items()) for h in json.load(a)]    # same keys, same order
+
+    odd = [{"name": "odd", "description": None, "periodicity": "daily", "date_created": None, "last_completed": None},
+           {"name": "late", "periodicity": "weekly", "streak": 2, "completions": ["2025-01-08", "2025-01-01"]}]
+    HabitDatabase(str(tmp_path / "odd.bin")).save_habits(odd)
+    assert HabitDatabase(str(tmp_path / "odd.bin")).load_habits() == odd
+
+
+def test_log_replay(example, tempfile):
+    """
+    Tests the append-only log mode.
+
+    - Logged add/checkoff/remove events are replayed on load without any save.
+    - A backfilled check-off and the longest streak survive the replay (also after a reset).
+    """
+    db = HabitLogDatabase(tempfile)
+    for h in example:
+        db.log_event('add', h)
+    read = Habit("read", "", "daily")
+    db.log_event('add', read)
+    for day in (1, 2, 4, 3):                                       # the 3rd is entered late
+        read.check_off(datetime.date(2025, 5, day))
+        db.log_event('checkoff', read)
+    read['streak'] = 0
+    db.log_event('reset', read)
+    db.log_event('remove', example[2])
+
+    loaded = HabitLogDatabase(tempfile).load_habits()
+    assert [h['name'] for h in loaded] == ["exercise", "journal", "read"]
+    assert loaded[2]['completions'] == ["2025-05-01", "2025-05-02", "2025-05-03", "2025-05-04"]
+    assert (loaded[2]['streak'], loaded[2]['longest_streak']) == (0, 4)
+
+    with open(db.logfile, 'a') as f:                                # a log written before whole habits were logged
+        f.write('{"op":"checkoff","name":"exercise","date":"2024-12-31","streak":7}\n')
+    exercise = HabitLogDatabase(tempfile).load_habits()[0]
+    assert exercise['completions'] == ["2024-12-31"] and exercise['longest_streak'] == 7
+
+
+def test_log_compaction_keeps_later_events(example, tempfile):
+    """
+    Tests that an event logged while AutoSaver copies the habits for a compaction stays in the log.
+    """
+    db = HabitLogDatabase(tempfile, compact_every=1)
+    habits = [example[0]]
+
+    def get_habits():
+        snapshot = list(habits)
+        if len(habits) == 1:                               # the main thread adds a habit while the copy is being made
+            main = threading.Thread(target=lambda: (habits.append(example[1]), db.log_event('add', example[1])))
+            main.start()
+            main.join()
+        return snapshot
+
+    db.log_event('add', example[0])
+    assert AutoSaver(db, get_habits).flush()
+    assert not db.dirty and HabitLogDatabase(tempfile).load_habits() == example[:2]
+    assert db.pending == 1
+
+
+def test_log_compaction(example, tempfile):
+    """
+    Tests that the log is folded into the snapshot once it is long enough,
+    and that replaying the same events on top of the snapshot changes nothing.
+    """
+    db = HabitLogDatabase(tempfile, compact_every=3)
+    for h in example:
+        db.log_event('add', h)
+    db.log_event('checkoff', example[0])
+    habits = db.load_habits()
+    with open(db.logfile) as f:
+        events = f.read()
+
+    db.save_habits(habits)
+    assert os.path.getsize(db.logfile) == 0              # log cleared after compaction
+    assert HabitDatabase(tempfile).load_habits() == habits
+
+    with open(db.logfile, 'w') as f:                    # simulate a crash right before the log was cleared
+        f.write(events)
+    assert db.load_habits() == habits
+
+
+# ---------- SHARDING MODULE TEST ----------
+
+def test_sharded_store(example, tmp_path):
+    """
+    Tests that habits are split by user and by name into shard files,
+    and that single-habit requests only open the shard holding the habit.
+    """
+    store = ShardedHabitStore(tmp_path / "root", shards=4)
+    store.save_habits("alice", example)
+    store.save_habits("bob", example[:1])
+    assert store.users() == ["alice", "bob"]
+    assert sorted(h['name'] for h in store.load_habits("alice")) == ["broken", "exercise", "journal"]
+    assert store.load_habits("carol") == []
+
+    fresh = ShardedHabitStore(tmp_path / "root")                     # shard count is read back from the store
+    assert fresh.get_habit("alice", "journal") == example[1]
+    assert list(fresh._open) == [("alice", fresh.shard_of("journal"))]
+    assert fresh.delete_habit("bob", "exercise")
+    assert fresh.get_habit("bob", "exercise") is None
+
+    with pytest.raises(ValueError):
+        ShardedHabitStore(tmp_path / "root", shards=8)
+    with pytest.raises(ValueError):
+        store.load_habits("../elsewhere")
+
+
+def test_sharded_summary(example, tmp_path):
+    """
+    Tests that the parallel cross-shard summary matches the analytics over all habits at once.
+    """
+    store = ShardedHabitStore(tmp_path / "root", shards=3)
+    store.save_habits("alice", example)
+    store.save_habits("bob", example[:2])
+    everything = example + example[:2]
+
+    summary = store.summary(workers=2)
+    assert summary == store.summary(workers=1) == analytics.summarize(everything)
+    assert summary['longest_streak'] == analytics.longest_streak(everything) == 3
+    assert summary['by_periodicity'] == {"daily": 3, "weekly": 2}
+    assert store.summary("bob")['habits'] == 2
+
+
+def test_parallel_analytics(example, tmp_path):
+    """
+    Tests the map-reduce over many habit files.
+
+    - Folders and glob patterns are expanded to the habit files (a saved report is not one).
+    - The parallel, chunked result equals the one computed in this process and the analytics over all habits.
+    - A damaged file is reported instead of stopping the job.
+    """
+    for user in ("alice", "bob", "carol"):
+        os.makedirs(tmp_path / user)
+        HabitDatabase(tmp_path / user / "habits.json").save_habits(example)
+    (tmp_path / "bob" / "notes.txt").write_text("not a habits file")
+    (tmp_path / "zed.json").write_text("[{")
+    reports.export_report(reports.build_report(example), str(tmp_path / "alice" / "report.json"))    # not a habits file
+    files = parallel_analytics.find_files([str(tmp_path)])
+    assert len(files) == 4
+    assert parallel_analytics.find_files([str(tmp_path / "*" / "habits.json")]) == files[:3]
+
+    progress = []
+    result = parallel_analytics.analyze_files(files, workers=2, chunk_size=1, progress=lambda done, total: progress.append(done))
+    assert result == parallel_analytics.analyze_files(files, workers=1)
+    assert sorted(progress) == [1, 2, 3, 4] and result["files"] == 4
+    everything = analytics.summarize(example * 3)
+    assert (result["habits"], result["longest_streak"], result["by_periodicity"]) == (9, 3, everything["by_periodicity"])
+    assert result["broken"] == [[f, "broken"] for f in files[:3]]
+    assert [e[0] for e in result["errors"]] == [files[3]]
+
+    (tmp_path / "legacy.json").write_text('[{"name": "legacy", "periodicity": "daily", "streak": 1}]')    # missing keys
+    (tmp_path / "numbers.json").write_text('[1, 2]')
+    files = parallel_analytics.find_files([str(tmp_path)])
+    result = parallel_analytics.analyze_files(files, workers=1)
+    assert (result["files"], result["habits"]) == (6, 9)
+    assert sorted(e[0] for e in result["errors"]) == sorted(files[3:])
+
+
+# ---------- REGISTRY MODULE TEST ----------
+
+def test_registry(example):
+    """
+    Tests the name index and periodicity buckets of HabitRegistry.
+
+    - Looks habits up by name and filters by periodicity.
+    - Removing a habit updates both indexes.
+    - Duplicate names are rejected.
+    """
+    registry = HabitRegistry(example)
+    events = []
+    registry.listeners.append(lambda op, h: events.append((op, h['name'])))
+    assert len(registry) == 3
+    assert registry.get("journal") is example[1]
+    assert registry.get("nonexistent") is None
+    assert registry.by_periodicity("daily") == [example[0], example[2]]
+
+    assert registry.remove("exercise") is example[0]
+    assert registry.remove("exercise") is None
+    assert "exercise" not in registry
+    assert registry.by_periodicity("daily") == [example[2]]
+
+    with pytest.raises(ValueError):
+        registry.append(dict(example[1]))
+    assert registry.to_list() == [example[1], example[2]]
+    registry.changed(example[1])
+    assert events == [("remove", "exercise"), ("change", "journal")]
+    assert registry.version == 5                              # three adds, one remove, one change
+
+
+def test_analytics_on_habit_objects(example):
+    """
+    Tests that the analytics functions give the same results on Habit objects as on dictionaries.
+    """
+    habits = [Habit.from_dict(d) for d in example]
+    assert analytics.longest_streak(habits) == analytics.longest_streak(example)
+    assert [analytics.streak_evaluate(h) for h in habits] == [analytics.streak_evaluate(d) for d in example]
+    analytics.reset_broken_streaks(habits)
+    assert [h.streak for h in habits] == [3, 1, 0]
+
+
+def test_analytics_on_registry(example):
+    """
+    Tests that the analytics functions give the same results on a registry as on a list.
+    """
+    registry = HabitRegistry(example)
+    assert analytics.same_periodicity_habits(registry, "daily") == analytics.same_periodicity_habits(example, "daily")
+    assert analytics.longest_streak(registry) == analytics.longest_streak(example)
+    assert analytics.habit_longest_streak(registry, "exercise") == 3
+    assert analytics.habit_longest_streak(registry, "nonexistent") == 0
+
+
+# ---------- SEARCH MODULE TEST ----------
+
+def test_search(example):
+    """
+    Tests prefix completion and suggestions of HabitSearch.
+
+    - Completion is case-insensitive and alphabetical.
+    - Misspelled names and words of a description find the habit.
+    - Adding and removing habits updates both indexes.
+    """
+    registry = HabitRegistry(example)
+    search = HabitSearch(registry)
+    assert search.complete("J") == ["journal"]
+    assert search.complete("") == ["broken", "exercise", "journal"]
+    assert search.complete("x") == []
+
+    assert search.suggest("exersise")[0] == "exercise"
+    assert search.suggest("journl") == ["journal"]
+    assert search.suggest("qqqq") == []
+    assert search.find("jour") == ["journal"]
+
+    registry.append(Habit("Exercise evening", "stretching before bed", "daily"))
+    assert search.complete("exer") == ["exercise", "Exercise evening"]
+    assert search.suggest("stretchin") == ["Exercise evening"]
+    registry.remove("exercise")
+    assert search.complete("exer") == ["Exercise evening"]
+    assert "exercise" not in search.suggest("exercise")
+
+    for i in range(500):                                  # names that mostly share the same (common) trigrams
+        registry.append(Habit(f"habit {i:04d}", "", "daily"))
+    assert search.suggest("ahbit 0271")[0] == "habit 0271"
+    assert search.suggest("habit 0417")[0] == "habit 0417"
+
+
+# ---------- BATCH ANALYTICS MODULE TEST ----------
+
+def random_habits(rng, n):
+    """
+    Random habits for property checks: every periodicity, never/long-ago/recent/future check-offs.
+    """
+    today = datetime.date.today()
+    habits = []
+    for i in range(n):
+        offset = rng.choice([None, rng.randint(-3, 80)])
+        habits.append({
+            "name": f"habit {i}",
+            "description": "random",
+            "periodicity": rng.choice(["daily", "weekly", "monthly", "every-3-days", "yearly"]),
+            "date_created": "2025-01-01",
+            "last_completed": None if offset is None else (today - datetime.timedelta(days=offset)).isoformat(),
+            "streak": rng.randint(0, 50),
+        })
+    return habits
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_batch_matches_scalar(seed):
+    """
+    Property check: for random habits and dates the vectorized results equal the scalar analytics.
+    """
+    pytest.importorskip("numpy")
+    from batch_analytics import HabitBatch
+    import random
+
+    rng = random.Random(seed)
+    habits = random_habits(rng, rng.randint(0, 60))
+    day = datetime.date.today() + datetime.timedelta(days=rng.randint(-5, 10))
+    batch = HabitBatch(habits)
+
+    expected = [analytics.streak_evaluate(h, day) for h in habits]
+    assert batch.effective_streaks(day).tolist() == expected
+    assert HabitBatch([Habit.from_dict(h) for h in habits]).effective_streaks(day).tolist() == expected
+    assert batch.longest_streak(day) == max(expected, default=0)
+    assert batch.broken(day) == [h["name"] for h, e in zip(habits, expected) if e == 0]
+    for freq, stats in batch.periodicity_stats(day).items():
+        streaks = [e for h, e in zip(habits, expected) if h["periodicity"] == freq]
+        assert stats["count"] == len(streaks)
+        assert stats["longest_streak"] == max(streaks)
+
+    copies = [dict(h) for h in habits]
+    analytics.reset_broken_streaks(copies)
+    batch.reset_broken_streaks()
+    assert habits == copies
+
+
+# ---------- ANALYTICS CACHE MODULE TEST ----------
+
+@pytest.mark.parametrize("seed", range(10))
+def test_cache_matches_analytics(seed):
+    """
+    Property check: after random adds, check-offs and removes the cached answers equal the analytics functions.
+    """
+    import random
+
+    rng = random.Random(seed)
+    habits = [Habit.from_dict(d) for d in random_habits(rng, 40)]
+    registry = HabitRegistry(habits[:30])
+    cache = AnalyticsCache(registry)
+    today = datetime.date.today()
+    for step in range(60):
+        op = rng.choice(["add", "checkoff", "checkoff", "remove", "query"])
+        if op == "add" and habits[30:]:
+            registry.append(habits.pop(30))
+        elif op == "checkoff" and len(registry):
+            h = rng.choice(registry.to_list())
+            if h.check_off(today - datetime.timedelta(days=rng.randint(0, 10))):
+                registry.changed(h)
+        elif op == "remove" and len(registry):
+            registry.remove(rng.choice(registry.to_list())['name'])
+        assert cache.longest_streak() == analytics.longest_streak(registry)
+        h = rng.choice(registry.to_list() or [habits[0]])
+        assert cache.streak(h['name']) == (analytics.streak_evaluate(h) if h['name'] in registry else 0)
+    for freq in ("daily", "weekly", "yearly"):
+        assert cache.same_periodicity_habits(freq) == analytics.same_periodicity_habits(registry, freq)
+
+    later = today + datetime.timedelta(days=rng.randint(1, 40))
+    assert cache.longest_streak(later) == max((analytics.streak_evaluate(h, later) for h in registry), default=0)
+    copies = [Habit.from_dict(h.to_dict()) for h in registry]
+    analytics.reset_broken_streaks(copies)
+    cache.reset_broken_streaks()
+    assert [h.to_dict() for h in registry] == [h.to_dict() for h in copies]
+    assert cache.reset_broken_streaks() == []                   # nothing left to reset
+
+
+# ---------- SCHEDULER MODULE TEST ----------
+
+@pytest.mark.parametrize("seed", range(10))
+def test_scheduler_roll_over(seed):
+    """
+    Property check: after each day's roll-over every stored streak equals its evaluated streak,
+    and only habits whose streak actually broke are reset.
+    """
+    import random
+
+    rng = random.Random(seed)
+    registry = HabitRegistry(Habit.from_dict(d) for d in random_habits(rng, 40))
+    scheduler = ExpiryScheduler(registry)
+    cache = AnalyticsCache(registry)
+    start = datetime.date.today()
+    for offset in range(60):
+        day = start + datetime.timedelta(days=offset)
+        for h in rng.sample(registry.to_list(), 3):             # a few check-offs every day
+            if h.check_off(day):
+                registry.changed(h)
+        before = {h['name']: h['streak'] for h in registry}
+        expired = scheduler.roll_over(day)
+        assert all(h['streak'] == analytics.streak_evaluate(h, day) for h in registry)
+        assert sorted(expired) == sorted(name for name, streak in before.items() if streak != registry.get(name)['streak'])
+        assert cache.longest_streak(day) == max(h['streak'] for h in registry)
+        next_expiry = scheduler.next_expiry
+        assert next_expiry is None or next_expiry > day
+
+
+# ---------- STREAK TIMELINE MODULE TEST ----------
+
+@pytest.mark.parametrize("seed", range(10))
+def test_timeline_matches_analytics(seed):
+    """
+    Property check: on every day of a range, the one-sweep timeline equals streak_evaluate day by day.
+    """
+    import random
+
+    rng = random.Random(seed)
+    habits = random_habits(rng, rng.randint(0, 60))
+    timeline = StreakTimeline(Habit.from_dict(d) for d in habits)
+    start = datetime.date.today() - datetime.timedelta(days=100)
+    rows = timeline.sweep(start, start + datetime.timedelta(days=130))
+    assert len(rows) == 131
+    for row in rows:
+        day = datetime.date.fromisoformat(row["date"])
+        evaluated = [analytics.streak_evaluate(h, day) for h in habits]
+        assert row["longest_streak"] == timeline.longest_streak(day) == analytics.longest_streak(habits, day)
+        assert row["valid"] == timeline.valid(day) == sum(e > 0 for e in evaluated)
+        assert row["broken"] == timeline.broken(day) == sum(e == 0 < h["streak"] for e, h in zip(evaluated, habits))
+        assert [timeline.streak(h["name"], day) for h in habits] == evaluated
 
 
 # ---------- ANALYTICS MODULE TEST ----------
@@ -163,6 +1063,10 @@ def test_habit_longest_streak(example):
     assert analytics.habit_longest_streak(example, "journal") == 1
     assert analytics.habit_longest_streak(example, "nonexistent") == 0
 
+    analytics.reset_broken_streaks(example)
+    example[2]["longest_streak"] = 7
+    assert analytics.habit_longest_streak(example, "broken") == 7     # longest ever, even though the streak is broken now
+
 
 def test_reset_broken_streaks(example):
     """
@@ -178,3 +1082,222 @@ def test_reset_broken_streaks(example):
             assert h["streak"] == 0
         else:
             assert h["streak"] > 0
+
+
+# ---------- REPORTS MODULE TEST ----------
+
+def test_build_report(tmp_path):
+    """
+    Tests the one-pass report on habits with known check-offs.
+
+    - Completion rates count periods with a check-off, from the creation day for new habits.
+    - Heatmap, rankings and trend agree with the check-offs.
+    - The exported JSON is the same report.
+    """
+    today = datetime.date(2025, 6, 1)                                   # a Sunday
+    day = lambda n: (today - datetime.timedelta(days=n)).toordinal()
+    run = Habit("run", "", "daily", created=day(30))
+    for n in range(6, -1, -1):                                          # every day of the last week
+        run.check_off(today - datetime.timedelta(days=n))
+    read = Habit("read", "", "weekly", created=day(13))                 # two weeks old, checked off in one of them
+    read.check_off(today)
+    idle = Habit("idle", "", "daily", created=day(100))
+
+    report = reports.build_report([run, read, idle.to_dict()], today, window=14, trend_window=7, top=2)
+    assert report["completion_rate"] == {"run": 0.5, "read": 0.5, "idle": 0.0}
+    assert report["best"] == [["read", 0.5], ["run", 0.5]]
+    assert report["worst"] == [["idle", 0.0], ["read", 0.5]]
+    assert report["longest_ever"] == [["run", 7], ["read", 1]]
+    assert report["weekday_heatmap"]["all"] == [1, 1, 1, 1, 1, 1, 2]
+    assert report["weekday_heatmap"]["weekly"] == [0, 0, 0, 0, 0, 0, 1]
+    assert [t["completions"] for t in report["trend"]] == [0] * 7 + [1] * 6 + [2]
+    assert report["trend"][-1]["rolling_average"] == pytest.approx(8 / 7, abs=1e-3)
+
+    reports.export_report(report, tmp_path / "report.json")
+    with open(tmp_path / "report.json") as f:
+        assert json.load(f) == report
+
+
+# ---------- METRICS MODULE TEST ----------
+
+def test_metrics(example, tempfile, monkeypatch):
+    """
+    Tests the instrumentation.
+
+    - Nothing is recorded while metrics are disabled.
+    - Enabled, loads/saves record calls and bytes, and streamed loads are timed to the end.
+    - The registry renders as JSON and Prometheus text.
+    """
+    monkeypatch.setattr(metrics, "REGISTRY", metrics.MetricsRegistry())
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    db = HabitDatabase(tempfile)
+    db.save_habits(example)
+    assert metrics.REGISTRY.snapshot() == {}
+
+    metrics.enable()
+    try:
+        db.save_habits(example)
+        db.load_habits()
+        assert len(list(db.iter_habits())) == 3
+        analytics.longest_streak(example)
+        with metrics.timed("custom") as t:
+            t.bytes = 10
+    finally:
+        metrics.disable()
+    size = os.path.getsize(tempfile)
+    snapshot = metrics.REGISTRY.snapshot()
+    assert snapshot["database.save"]["calls"] == 1 and snapshot["database.save"]["bytes"] == size
+    assert snapshot["database.load"]["bytes"] == size
+    assert snapshot["database.iter"]["calls"] == 1 and snapshot["analytics.longest_streak"]["calls"] == 1
+    assert snapshot["custom"] == {"calls": 1, "seconds": snapshot["custom"]["seconds"], "bytes": 10}
+    assert json.loads(metrics.REGISTRY.to_json()) == snapshot
+    assert f'habits_operation_bytes_total{{operation="database.save"}} {size}' in metrics.REGISTRY.to_prometheus()
+
+
+# ---------- SERVICE MODULE TEST ----------
+
+def test_service_batches_saves(example, tempfile):
+    """
+    Tests the async service: changes are applied at once, many changes are written by one background save.
+    """
+    HabitDatabase(tempfile).save_habits(example)
+    db = HabitDatabase(tempfile)
+    saves = []
+    save_habits = db.save_habits
+    db.save_habits = lambda habits, version=None: saves.append(1) or save_habits(habits, version)
+
+    async def scenario():
+        service = HabitService(db, save_delay=0.05)
+        await service.start()
+        await service.add("read", "read a book", "daily")
+        await asyncio.gather(*(service.checkoff("read", f"2025-01-{day:02d}") for day in range(1, 11)))
+        with pytest.raises(NotFound):
+            await service.remove("nonexistent")
+        assert await service.habit_longest_streak("read") == 10
+        assert [h['name'] for h in await service.habits_by_periodicity("weekly")] == ["journal"]
+        await asyncio.sleep(0.2)
+        assert len(saves) == 1                                  # eleven changes, one save
+        await service.remove("broken")
+        await service.close()
+
+    asyncio.run(scenario())
+    saved = {h['name']: h for h in HabitDatabase(tempfile).load_habits()}
+    assert sorted(saved) == ["exercise", "journal", "read"]
+    assert saved["read"]['longest_streak'] == 10 and len(saved["read"]['completions']) == 10
+
+
+def test_service_saves_resets(example, tempfile):
+    """
+    Tests that streaks reset by the roll-over of a query are saved without any other change.
+    """
+    HabitDatabase(tempfile).save_habits(example)
+
+    async def scenario():
+        service = HabitService(HabitDatabase(tempfile), save_delay=0.01)
+        await service.start()
+        assert [h['streak'] for h in await service.all_habits()] == [3, 1, 0]
+        await asyncio.sleep(0.1)
+        assert [h['streak'] for h in HabitDatabase(tempfile).load_habits()] == [3, 1, 0]
+        await service.close()
+
+    asyncio.run(scenario())
+
+
+def test_service_http(example, tempfile):
+    """
+    Tests the HTTP/JSON endpoint with several clients at once.
+    """
+    HabitDatabase(tempfile).save_habits(example)
+
+    async def request(port, method, path, body=None):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        payload = json.dumps(body).encode() if body is not None else b''
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+        status = int((await reader.readline()).split()[1])
+        result = json.loads((await reader.read()).split(b'\r\n\r\n', 1)[1])
+        writer.close()
+        return status, result
+
+    async def scenario():
+        service = HabitService(HabitDatabase(tempfile))
+        await service.start()
+        server = await serve(service, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            assert (await request(port, 'POST', '/habits', {"name": "morning run", "periodicity": "weekly"}))[0] == 201
+            results = await asyncio.gather(*(request(port, 'POST', f'/habits/{name}/checkoff') for name in ("exercise", "journal", "morning%20run")))
+            assert [status for status, _ in results] == [200, 200, 200]
+            assert await request(port, 'GET', '/longest-streak') == (200, {"longest_streak": 3})
+            assert (await request(port, 'GET', '/habits?periodicity=weekly'))[1][1]['name'] == "morning run"
+            assert (await request(port, 'DELETE', '/habits/nonexistent'))[0] == 404
+            assert (await request(port, 'POST', '/habits', {"name": "x", "periodicity": "dialy"}))[0] == 400
+        await service.close()
+
+    asyncio.run(scenario())
+    assert len(HabitDatabase(tempfile).load_habits()) == 4
+
+
+# ---------- COMMAND LINE MODULE TEST ----------
+
+def test_cli_batch(tmp_path, capsys):
+    """
+    Tests running many commands from one file against a single load/save.
+    - Valid lines are applied, invalid ones are reported without stopping the batch.
+    """
+    store = str(tmp_path / "habits.json")
+    ops = tmp_path / "ops.txt"
+    ops.write_text(
+        'add "morning run" --periodicity daily\n'
+        'add journal --periodicity weekly\n'
+        'checkoff "morning run" --date 2025-05-01\n'
+        'checkoff "morning run" --date 2025-05-02\n'
+        '# comments and blank lines are skipped\n'
+        '\n'
+        'checkoff nonexistent\n'
+        'remove journal\n'
+    )
+    assert cli.main(["--file", store, "batch", str(ops)]) == 1          # one line failed
+    assert "line 7" in capsys.readouterr().err
+
+    habits = HabitDatabase(store).load_habits()
+    assert [h["name"] for h in habits] == ["morning run"]
+    assert habits[0]["streak"] == 2 and habits[0]["completions"] == ["2025-05-01", "2025-05-02"]
+
+
+def test_cli_report_saves_resets(example, tempfile, capsys):
+    """
+    Tests that the broken streaks reset by the report command are saved.
+    """
+    HabitDatabase(tempfile).save_habits(example)
+    assert cli.main(["--file", str(tempfile), "report"]) == 0
+    assert "1 broken" in capsys.readouterr().out
+    assert [h["streak"] for h in HabitDatabase(tempfile).load_habits()] == [3, 1, 0]
+
+
+def test_cli_import_bad_periodicity(tmp_path, capsys):
+    """
+    Tests that a CSV import with an invalid periodicity is reported as an error.
+    """
+    source = tmp_path / "habits.csv"
+    source.write_text("name,periodicity\nread,daily\nrun,dialy\n")
+    store = str(tmp_path / "habits.json")
+    assert cli.main(["--file", store, "import", str(source)]) == 1
+    assert "line 3: 'dialy' is not a valid periodicity" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("extension", ["csv", "jsonl", "json", "bin"])
+def test_cli_import_export(example, tmp_path, extension):
+    """
+    Tests that exporting and importing habits gives back the same habits.
+    """
+    source = str(tmp_path / "source.json")
+    HabitDatabase(source).save_habits(example)
+    exported = str(tmp_path / f"export.{extension}")
+    assert cli.main(["--file", source, "export", exported]) == 0
+
+    target = str(tmp_path / "target.json")
+    assert cli.main(["--file", target, "import", exported]) == 0
+    loaded = HabitDatabase(target).load_habits()
+    assert [h["name"] for h in loaded] == [h["name"] for h in example]
+    assert [h["last_completed"] for h in loaded] == [h["last_completed"] for h in example]
+    assert [h["streak"] for h in loaded] == [h["streak"] for h in example]